@@ -0,0 +1,239 @@
+"""
+Benchmarks for the bot's hot paths against an in-process fake transport (no network).
+
+    python benchmarks/bench_bot.py --products 10,100,500 --rows 1000,100000
+    python benchmarks/bench_bot.py --compare benchmarks/results/old.json benchmarks/results/new.json
+
+Results are written as JSON (one file per run) so runs from different versions of src/main.py can be compared.
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import requests  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+
+
+class FakeTransport(BaseAdapter):
+    """
+    Requests adapter answering exchange calls from the deterministic MockExchange model, in-process.
+    """
+
+    def __init__(self, exchange):
+        super().__init__()
+        self.exchange = exchange
+
+    def send(self, request, **kwargs):
+        from urllib.parse import urlparse, parse_qs
+        url = urlparse(request.url)
+        body = request.body.decode() if isinstance(request.body, bytes) else request.body
+        status, payload = self.exchange._route(request.method, url.path, parse_qs(url.query), body)
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'repeat': len(samples),
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'min': samples[0],
+    }
+
+
+def import_time(module_name, workdir):
+    """
+    :return: Seconds a fresh interpreter spends importing the module (interpreter startup excluded)
+    """
+    code = f'import time; started = time.perf_counter(); import {module_name}; print(time.perf_counter() - started)'
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=workdir, text=True,
+                                     env=dict(os.environ, PYTHONPATH=REPO_ROOT))
+    return float(output.split()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def run(args):
+    # The bot's database, snapshots and log are created in the working directory
+    workdir = tempfile.mkdtemp(prefix='bot-bench-')
+    os.chdir(workdir)
+    logging.basicConfig(filename='bot_log.txt', level=logging.INFO)
+    results = []
+
+    def record(name, params, stats):
+        results.append({'name': name, 'params': params, **stats})
+        print(f"{name:<28} {json.dumps(params):<32} mean {stats['mean'] * 1000:9.3f} ms  p95 {stats['p95'] * 1000:9.3f} ms")
+
+    # Measured in fresh interpreters before this process imports anything heavy
+    for module_name in ('src.main', 'src.cli'):
+        record('import', {'module': module_name},
+               summarize([import_time(module_name, workdir) for _ in range(args.repeat)]))
+
+    import pandas as pd
+    import src.main as bot
+    from src.exchange_client import ExchangeClient, TokenBucket
+    from src.market_store import MarketStore
+    from src.mock_exchange import MockExchange
+    from src.signer import RequestSigner
+    from src.universe import ProductUniverse
+
+    # The placeholder API_SECRET isn't base64, so with it every signing call fails and only the error
+    # path would be timed
+    bot.signer = RequestSigner('bench-key', base64.b64encode(b'bench-secret' * 4).decode(), 'bench-passphrase')
+    assert bot.create_request_headers('/orders', 'POST', '{}') is not None
+
+    record('create_request_headers', {}, timed(lambda: bot.create_request_headers('/orders', 'POST', '{}'),
+                                                args.repeat * 100))
+
+    for n_products in args.products:
+        products = {f'P{i}-USD': 100.0 + i for i in range(n_products)}
+        exchange = MockExchange(products=products)
+        if args.rate_limited:
+            client = ExchangeClient('http://bench')
+        else:
+            client = ExchangeClient('http://bench', public_bucket=TokenBucket(1e9, 1e9),
+                                    private_bucket=TokenBucket(1e9, 1e9))
+        client.session.mount('http://bench', FakeTransport(exchange))
+
+        # A fresh universe per size; within one size it is cached across sweeps, as in production
+        universe = ProductUniverse(bot.fetch_products, bot.fetch_product_stats)
+        with patch.object(bot, 'client', client), patch.object(bot, 'market_store', MarketStore(':memory:')), \
+                patch.object(bot, 'universe', universe):
+            def sweep():
+                bot.candle_store.candles.clear()
+                bot.run_buy_sweep()
+
+            record('buy_sweep', {'products': n_products}, timed(sweep, args.repeat))
+
+            # Every held position's price is flat, so no tick sells (nearly every tick in practice)
+            exchange.price = lambda product_id, at: 100.0
+            for i in range(min(n_products, args.positions)):
+                bot.positions.open(f'P{i}-USD', 100.0, 1.0, datetime.now())
+
+            record('sell_check_tick', {'products': n_products, 'positions': len(bot.positions)},
+                   timed(bot.sell_check_tick, args.repeat * 10))
+            for product_id in bot.positions.product_ids():
+                bot.positions.close(product_id)
+
+    for n_rows in args.rows:
+        row = pd.DataFrame([{'product_id': 'BTC-USD', 'purchase_price': 1.0, 'amount_bought': 1.0,
+                             'time': datetime.now()}])
+        file_name = os.path.join(workdir, f'orders_{n_rows}.csv')
+        pd.concat([row] * n_rows).to_csv(file_name, index=False)
+
+        def append():
+            # append_to_csv only queues the row; the flush includes the write into the n-row file
+            bot.append_to_csv(row, file_name)
+            bot.writer.flush()
+
+        record('append_to_csv', {'rows': n_rows}, timed(append, args.repeat * 10))
+
+        store = MarketStore(':memory:')
+        n_products = max(1, n_rows // 1000)
+        per_product = n_rows // n_products
+        for i in range(n_products):
+            store.upsert_candles(f'P{i}-USD', pd.DataFrame({
+                'time': 300 * pd.RangeIndex(per_product), 'low': 1.0, 'high': 1.0, 'open': 1.0, 'close': 1.0,
+                'volume': 1.0}))
+        with patch.object(bot, 'market_store', store):
+            def cold_lookup():
+                bot.price_index.prices.clear()
+                bot.fetch_last_checked_price('P0-USD')
+
+            record('fetch_last_checked_price', {'rows': n_rows, 'index': 'cold'}, timed(cold_lookup, args.repeat * 10))
+            record('fetch_last_checked_price', {'rows': n_rows, 'index': 'warm'},
+                   timed(lambda: bot.fetch_last_checked_price('P0-USD'), args.repeat * 10))
+
+    return {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rate_limited': args.rate_limited,
+        'results': results,
+    }
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    for result in new:
+        key = (result['name'], json.dumps(result['params'], sort_keys=True))
+        if key in old:
+            ratio = result['mean'] / old[key]['mean']
+            flag = '  REGRESSION' if ratio > 1.2 else ''
+            print(f"{key[0]:<28} {key[1]:<32} {ratio:6.2f}x{flag}")
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trading bot hot paths.')
+    parser.add_argument('--products', type=int_list, default=[10, 100], help='Comma-separated universe sizes')
+    parser.add_argument('--rows', type=int_list, default=[1000, 100000], help='Comma-separated stored row counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--positions', type=int, default=1, help='Open positions during the sell-check tick')
+    parser.add_argument('--rate-limited', action='store_true', help='Keep the exchange token buckets on')
+    parser.add_argument('--output', help='Result file (default benchmarks/results/<revision>-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # run() changes into a scratch directory
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    report = run(args)
+    output = args.output or os.path.join(REPO_ROOT, 'benchmarks', 'results',
+                                         f"{report['revision']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from src.candle_store import CANDLE_COLUMNS
+from src.exchange_client import ExchangeClient
+from src.market_store import MarketStore
+
+# The exchange caps a candles response at this many bars
+PAGE_BARS = 300
+# Concurrent page downloads; the client's token bucket keeps them within the rate limit
+BACKFILL_WORKERS = 8
+
+BackfillResult = namedtuple('BackfillResult', ['pages', 'skipped', 'failed', 'bars', 'elapsed'])
+
+
+def plan_pages(start_ts, end_ts, granularity=300, page_bars=PAGE_BARS):
+    """
+    Splits [start_ts, end_ts] into pages of at most `page_bars` bars, aligned to the granularity.
+
+    :return: [(first bucket, last bucket), ...] oldest first
+    """
+    first = int(start_ts) // granularity * granularity
+    last = int(end_ts) // granularity * granularity
+    span = page_bars * granularity
+    return [(page_start, min(page_start + span - granularity, last)) for page_start in range(first, last + 1, span)]
+
+
+def page_marker(product_id, granularity, page_start):
+    return f'backfill:{product_id}:{granularity}:{page_start}'
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def fetch_page(client, product_id, page_start, page_end, granularity):
+    """
+    :return: Candle DataFrame for the page, or None if the request failed
+    """
+    response = client.get(f'/products/{product_id}/candles', params={
+        'start': _iso(page_start),
+        'end': _iso(page_end),
+        'granularity': granularity
+    }, name='backfill')
+    if response.status_code != 200:
+        logging.warning(f"Failed to fetch {product_id} candles from {_iso(page_start)}: {response.status_code}")
+        return None
+    return pd.DataFrame(response.json(), columns=CANDLE_COLUMNS)
+
+
+def backfill(client, store, product_ids, start_ts, end_ts, granularity=300, max_workers=BACKFILL_WORKERS,
+             page_bars=PAGE_BARS):
+    """
+    Downloads candles for every product over [start_ts, end_ts] into the store, page by page and
+    concurrently. Each page is written together with its checkpoint, so a rerun after an
+    interruption only fetches the pages still missing. The page holding the still-forming bar is
+    never checkpointed.
+
+    :param client: ExchangeClient
+    :param store: MarketStore to write into
+    :param product_ids: Products to backfill
+    :param start_ts: Range start (unix time)
+    :param end_ts: Range end (unix time)
+    :param granularity: Candle size in seconds
+    :param max_workers: Concurrent page downloads
+    :param page_bars: Bars per request (the exchange caps responses at 300)
+    :return: BackfillResult
+    """
+    started = time.monotonic()
+    pages = plan_pages(start_ts, end_ts, granularity, page_bars)
+    todo = []
+    skipped = 0
+    for product_id in product_ids:
+        done = store.markers(f'backfill:{product_id}:{granularity}:')
+        for page_start, page_end in pages:
+            if page_marker(product_id, granularity, page_start) in done:
+                skipped += 1
+            else:
+                todo.append((product_id, page_start, page_end))
+
+    forming = int(time.time()) // granularity * granularity
+    stopping = threading.Event()
+
+    def run(task):
+        product_id, page_start, page_end = task
+        data = fetch_page(client, product_id, page_start, page_end, granularity)
+        if data is None or stopping.is_set():
+            return None
+        complete = page_end < forming
+        store.upsert_candles(product_id, data, granularity,
+                             marker=page_marker(product_id, granularity, page_start) if complete else None)
+        return len(data)
+
+    failed = 0
+    bars = 0
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(run, task): task for task in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                count = future.result()
+            except Exception as e:
+                logging.error(f"Error backfilling {futures[future][0]}: {e}")
+                count = None
+            if count is None:
+                failed += 1
+            else:
+                bars += count
+            if i % 100 == 0:
+                logging.info(f"Backfill progress: {i}/{len(todo)} pages")
+    except KeyboardInterrupt:
+        # Leaving the with-block would wait for every queued page; drop them instead. Pages already
+        # downloading are not written, so nothing touches the store once the caller closes it.
+        stopping.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logging.warning(f"Backfill interrupted; {len(todo)} pages planned, {bars} bars written")
+        raise
+    pool.shutdown()
+
+    result = BackfillResult(len(todo) - failed, skipped, failed, bars, time.monotonic() - started)
+    logging.info(f"Backfilled {result.pages} pages ({result.bars} bars), skipped {result.skipped} already done, "
+                 f"{result.failed} failed, in {result.elapsed:.1f}s")
+    return result
+
+
+def parse_date(value):
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download historical candles into market_data.db (resumable).')
+    parser.add_argument('products', nargs='*', help='Product ids; all tradable products if omitted')
+    parser.add_argument('--start', required=True, help='Range start, ISO date/time (UTC if no offset)')
+    parser.add_argument('--end', help='Range end, ISO date/time (default: now)')
+    parser.add_argument('--granularity', type=int, default=300)
+    parser.add_argument('--db', default='market_data.db')
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS)
+    parser.add_argument('--api-url', default=os.environ.get('EXCHANGE_API_URL', 'https://api.pro.coinbase.com'))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    client = ExchangeClient(args.api_url, pool_size=args.workers)
+    store = MarketStore(args.db)
+    try:
+        product_ids = args.products
+        if not product_ids:
+            response = client.get('/products')
+            response.raise_for_status()
+            product_ids = [product['id'] for product in response.json() if not product['trading_disabled']]
+        end_ts = parse_date(args.end) if args.end else time.time()
+        result = backfill(client, store, product_ids, parse_date(args.start), end_ts, args.granularity, args.workers)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume")
+        return
+    finally:
+        store.close()
+        client.close()
+    print(f"Pages: {result.pages} fetched, {result.skipped} already done, {result.failed} failed  "
+          f"Bars: {result.bars}  Time: {result.elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
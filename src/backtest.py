@@ -0,0 +1,225 @@
+import argparse
+import logging
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.rules import DEFAULT_THRESHOLDS, percent_change, is_buy_signal, is_sell_signal
+
+# Candles for every product on one shared time grid; opens/closes are (products, bars) arrays
+Market = namedtuple('Market', ['product_ids', 'times', 'opens', 'closes', 'granularity'])
+
+BacktestResult = namedtuple('BacktestResult', ['trades', 'total_pnl', 'total_return', 'max_drawdown'])
+
+# Bars checked for a sell before looking further ahead (doubles each time)
+EXIT_WINDOW = 64
+
+TRADE_COLUMNS = ['product_id', 'entry_time', 'entry_price', 'exit_time', 'exit_price', 'pnl', 'return_pct', 'status']
+
+
+def load_candles(path, product_id=None, granularity=300):
+    """
+    Loads candles from a CSV (e.g. historical_data.csv) or a MarketStore database.
+
+    :param path: .csv file or .db file
+    :param product_id: Product to attribute rows to when the CSV has no product_id column
+    :param granularity: Candle size to read from a database, which can hold several
+    :return: DataFrame with product_id, time, open, close (plus whatever else the source has)
+    """
+    if path.endswith('.db'):
+        import sqlite3
+        with sqlite3.connect(path) as conn:
+            return pd.read_sql_query('SELECT product_id, time, low, high, open, close, volume FROM candles '
+                                     'WHERE granularity = ?', conn, params=(granularity,))
+    candles = pd.read_csv(path)
+    if 'product_id' not in candles.columns:
+        if product_id is None:
+            raise ValueError(f"{path} has no product_id column; pass the product it belongs to")
+        candles['product_id'] = product_id
+    return candles
+
+
+def prepare_market(candles, granularity=300):
+    """
+    Pivots long-format candles onto a (products, bars) grid. Gaps are NaN.
+    """
+    candles = candles.dropna(subset=['time', 'open', 'close'])
+    codes, product_ids = pd.factorize(candles['product_id'], sort=True)
+    bar_times = candles['time'].to_numpy(dtype=np.int64) // granularity * granularity
+    first, last = bar_times.min(), bar_times.max()
+    times = np.arange(first, last + granularity, granularity)
+    columns = (bar_times - first) // granularity
+
+    opens = np.full((len(product_ids), len(times)), np.nan)
+    closes = np.full((len(product_ids), len(times)), np.nan)
+    opens[codes, columns] = candles['open'].to_numpy(dtype=float)
+    closes[codes, columns] = candles['close'].to_numpy(dtype=float)
+    return Market(list(product_ids), times, opens, closes, granularity)
+
+
+def forward_fill(values):
+    """
+    Carries the last valid value forward along each row.
+    """
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return values[np.arange(values.shape[0])[:, None], index]
+
+
+def shifted(values, bars):
+    """
+    values shifted right by `bars` columns, NaN-padded, so column t holds column t - bars.
+    """
+    result = np.full_like(values, np.nan)
+    if bars < values.shape[1]:
+        result[:, bars:] = values[:, :values.shape[1] - bars]
+    return result
+
+
+def buy_changes(market, sweep_interval=3600):
+    """
+    The changes the hourly sweep would see at every bar's close: 2h and 1h change from the
+    window's first open, and change since the previous sweep's close. They don't depend on the
+    thresholds, so a parameter sweep computes them once.
+
+    :return: (change_2h, change_1h, change_since_last) float (products, bars) arrays
+    """
+    bars_2h = 7200 // market.granularity
+    bars_1h = 3600 // market.granularity
+    sweep_bars = sweep_interval // market.granularity
+    closes = forward_fill(market.closes)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change_2h = percent_change(market.closes, shifted(market.opens, bars_2h - 1))
+        change_1h = percent_change(market.closes, shifted(market.opens, bars_1h - 1))
+        change_since_last = percent_change(market.closes, shifted(closes, sweep_bars))
+    return change_2h, change_1h, change_since_last
+
+
+def buy_signals(market, thresholds=DEFAULT_THRESHOLDS, sweep_interval=3600, changes=None):
+    """
+    Buy signal and ranking score for every product at every bar, as the hourly sweep would see them
+    at that bar's close.
+
+    :param changes: Result of buy_changes() for the same market, if already computed
+    :return: (signal, score) boolean and float (products, bars) arrays
+    """
+    change_2h, change_1h, change_since_last = changes if changes is not None else buy_changes(market, sweep_interval)
+    with np.errstate(invalid='ignore'):
+        signal = is_buy_signal(change_2h, change_1h, change_since_last, thresholds)
+    score = np.fmax(np.fmax(change_2h, change_1h), change_since_last)
+    return signal, score
+
+
+def find_exit(prices, purchase_price, thresholds=DEFAULT_THRESHOLDS, window=EXIT_WINDOW):
+    """
+    Index of the first price that triggers a sell, or None. Mirrors the live sell check: the first
+    tick's previous price is itself and the high is tracked from the first tick after the buy.
+
+    Prices are checked in windows that double in size, so a trade that exits early doesn't pay for
+    scanning the rest of the series.
+    """
+    if len(prices) == 0:
+        return None
+    previous, highest = prices[0], -np.inf
+    start = 0
+    while start < len(prices):
+        chunk = prices[start:start + window]
+        chunk_previous = np.concatenate(([previous], chunk[:-1]))
+        chunk_highest = np.maximum(np.maximum.accumulate(chunk), highest)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sell = is_sell_signal(percent_change(chunk, chunk_previous), percent_change(chunk, chunk_highest),
+                                  percent_change(chunk, purchase_price), thresholds)
+        hits = np.flatnonzero(sell)
+        if len(hits):
+            return start + hits[0]
+        previous, highest = chunk[-1], chunk_highest[-1]
+        start += len(chunk)
+        window *= 2
+    return None
+
+
+def simulate(market, thresholds=DEFAULT_THRESHOLDS, funds=1000.0, fee=0.005, slippage=0.001, sweep_interval=3600,
+             changes=None, closes=None):
+    """
+    Replays the market through the bot's rules: one position at a time, an hourly buy sweep while
+    flat that buys the strongest candidate, and a sell check at every bar close while holding.
+
+    Fill model: market orders fill at the bar close moved against us by `slippage`, and pay `fee`
+    on each side. Every trade spends `funds`; returns and drawdown are percentages of it.
+
+    :param changes: buy_changes() for the market, to reuse across runs
+    :param closes: forward_fill(market.closes), to reuse across runs
+    :return: BacktestResult
+    """
+    signal, score = buy_signals(market, thresholds, sweep_interval, changes)
+    score = np.where(signal, score, -np.inf)
+    if closes is None:
+        closes = forward_fill(market.closes)
+    times = market.times
+    sweep_columns = np.flatnonzero(times % sweep_interval == 0)
+
+    trades = []
+    column = 0
+    for sweep in sweep_columns:
+        if sweep < column:
+            continue  # Still holding at this sweep
+        best = score[:, sweep].argmax()
+        if not np.isfinite(score[best, sweep]):
+            continue
+
+        entry_price = market.closes[best, sweep] * (1 + slippage)
+        prices = closes[best, sweep + 1:]
+        exit_offset = find_exit(prices, entry_price, thresholds)
+        if exit_offset is None:
+            exit_column, status = len(times) - 1, 'open'  # Marked to the last close
+        else:
+            exit_column, status = sweep + 1 + exit_offset, 'closed'
+        exit_price = closes[best, exit_column] * (1 - slippage)
+
+        units = funds * (1 - fee) / entry_price
+        pnl = units * exit_price * (1 - fee) - funds
+        trades.append((market.product_ids[best], int(times[sweep]), entry_price, int(times[exit_column]),
+                       exit_price, pnl, pnl / funds * 100, status))
+        column = exit_column + 1
+
+    trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+    equity = funds + np.concatenate(([0.0], trades['pnl'].cumsum().to_numpy()))
+    # Every trade stakes the same funds, so drawdown is measured against that stake
+    max_drawdown = float((equity - np.maximum.accumulate(equity)).min() / funds * 100)
+    total_pnl = float(trades['pnl'].sum())
+    return BacktestResult(trades, total_pnl, total_pnl / funds * 100, max_drawdown)
+
+
+def run_backtest(path, product_id=None, granularity=300, **kwargs):
+    start = time.monotonic()
+    market = prepare_market(load_candles(path, product_id, granularity), granularity)
+    result = simulate(market, **kwargs)
+    logging.info(f"Backtest of {len(market.product_ids)} products x {len(market.times)} bars "
+                 f"took {time.monotonic() - start:.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay stored candles through the buy/sell rules.')
+    parser.add_argument('path', help='Candle CSV (e.g. historical_data.csv) or market_data.db')
+    parser.add_argument('--product-id', help='Product for CSVs without a product_id column')
+    parser.add_argument('--granularity', type=int, default=300)
+    parser.add_argument('--funds', type=float, default=1000.0)
+    parser.add_argument('--fee', type=float, default=0.005)
+    parser.add_argument('--slippage', type=float, default=0.001)
+    parser.add_argument('--trades', default='backtest_trades.csv', help='Where to write the trade log')
+    args = parser.parse_args()
+
+    result = run_backtest(args.path, args.product_id, args.granularity,
+                          funds=args.funds, fee=args.fee, slippage=args.slippage)
+    result.trades.to_csv(args.trades, index=False)
+    print(f"Trades: {len(result.trades)}  P&L: {result.total_pnl:.2f}  "
+          f"Return: {result.total_return:.2f}%  Max drawdown: {result.max_drawdown:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
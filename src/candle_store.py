@@ -0,0 +1,92 @@
+import logging
+import threading
+from datetime import datetime
+
+CANDLE_COLUMNS = ['time', 'low', 'high', 'open', 'close', 'volume']
+
+# Two days of 5-minute bars per product is plenty for the 1h/2h buy windows
+MAX_BARS = 576
+
+
+class CandleStore:
+    """
+    Per-product candle cache keyed by (product_id, granularity, bucket time).
+
+    Windows are served from memory and only bars newer than the last one held are requested
+    from the exchange. The newest held bar is always re-fetched because it may still be forming.
+    If `backend` is given (a MarketStore), a series is seeded from it on first use so a restart
+    does not start cold. Persisting fetched bars is left to the fetch function.
+
+    :param fetch: Callable (product_id, start_time, end_time, granularity) -> candle DataFrame
+    :param backend: Optional store providing get_recent(product_id, limit, granularity)
+    :param max_bars: Number of most recent bars kept per series
+    """
+
+    def __init__(self, fetch, backend=None, max_bars=MAX_BARS):
+        self.fetch = fetch
+        self.backend = backend
+        self.max_bars = max_bars
+        self.candles = {}  # (product_id, granularity) -> {bucket time: (low, high, open, close, volume)}
+        self.covered_from = {}  # (product_id, granularity) -> earliest bucket time fetched without gaps
+        self.lock = threading.Lock()
+
+    def _series(self, key):
+        series = self.candles.get(key)
+        if series is None:
+            series = {}
+            if self.backend is not None:
+                try:
+                    product_id, granularity = key
+                    data = self.backend.get_recent(product_id, self.max_bars, granularity)
+                    for row in data.itertuples(index=False):
+                        series[int(row.time)] = (row.low, row.high, row.open, row.close, row.volume)
+                    if series:
+                        self.covered_from[key] = min(series)
+                except Exception as e:
+                    logging.error(f"Error loading stored candles for {key[0]}: {e}")
+            self.candles[key] = series
+        return series
+
+    def get_window(self, product_id, start_time, end_time, granularity=300):
+        """
+        Returns the candles between start_time and end_time, oldest first.
+
+        :param product_id: Product id, e.g. 'BTC-USD'
+        :param start_time: Window start (datetime)
+        :param end_time: Window end (datetime)
+        :param granularity: Candle size in seconds
+        :return: DataFrame with CANDLE_COLUMNS sorted by time ascending
+        """
+        key = (product_id, granularity)
+        start_ts = start_time.timestamp()
+        end_ts = end_time.timestamp()
+
+        with self.lock:
+            series = self._series(key)
+            covered_from = self.covered_from.get(key)
+            last = max(series) if series else None
+
+        # Only ask for what we don't already hold
+        if last is not None and covered_from is not None and covered_from <= start_ts <= last:
+            fetch_start = datetime.fromtimestamp(last)
+        else:
+            fetch_start = start_time
+
+        data = self.fetch(product_id, fetch_start, end_time, granularity)
+
+        with self.lock:
+            if data is not None and not data.empty:
+                if last is None or fetch_start == start_time:
+                    # Full re-fetch: drop whatever was held so the series stays gap-free
+                    series.clear()
+                    self.covered_from[key] = int(start_ts)
+                for row in data[CANDLE_COLUMNS].itertuples(index=False):
+                    series[int(row.time)] = (row.low, row.high, row.open, row.close, row.volume)
+            if len(series) > self.max_bars:
+                for t in sorted(series)[:len(series) - self.max_bars]:
+                    del series[t]
+                self.covered_from[key] = min(series)
+            rows = [(t,) + series[t] for t in sorted(series) if start_ts <= t <= end_ts]
+
+        import pandas as pd
+        return pd.DataFrame(rows, columns=CANDLE_COLUMNS)
@@ -0,0 +1,203 @@
+import argparse
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Subcommands handled by another module's own argument parser
+DELEGATED = {
+    'backtest': 'src.backtest',
+    'backfill': 'src.backfill',
+    'sweep': 'src.param_sweep',
+    'mock-exchange': 'src.mock_exchange',
+}
+
+
+def prewarm(*module_names):
+    """
+    Imports heavy modules on a background thread while the bot starts talking to the exchange.
+    """
+    def load():
+        for module_name in module_names:
+            try:
+                importlib.import_module(module_name)
+            except ImportError:
+                pass
+    threading.Thread(target=load, name='prewarm-imports', daemon=True).start()
+
+
+def run(args):
+    import src.main as bot
+    if args.ticker_feed:
+        bot.USE_TICKER_FEED = True
+    if args.scan_processes is not None:
+        bot.SCAN_PROCESSES = args.scan_processes
+    if args.max_positions is not None:
+        bot.MAX_POSITIONS = args.max_positions
+    if args.metrics_port is not None:
+        bot.METRICS_SERVER_PORT = args.metrics_port or None
+    recorder = None
+    if args.record:
+        from src.transport import SessionRecorder, install_recorder, record_jobs
+        recorder = SessionRecorder(args.record)
+        install_recorder(bot.client, recorder)
+        install_recorder(bot.order_client, recorder)
+        record_jobs(bot, recorder)
+    # Needed by the first sweep, not by startup
+    prewarm('pandas', 'src.signals')
+    try:
+        bot.main()
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def replay(args):
+    """
+    Reruns a recorded session offline in a scratch directory and prints what the bot did.
+    """
+    import logging
+    import tempfile
+    from src.transport import SessionReplay, replay_session
+    recording = os.path.abspath(args.recording)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bot-replay-')
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # Orders, candles and snapshots written during the replay stay out of the live files
+    logging.basicConfig(filename='bot_log.txt', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    import src.main as bot
+
+    summary = replay_session(bot, SessionReplay(recording), args.speed)
+    bot.writer.close()
+    print(f"Replayed {summary['jobs']} job runs with {summary['served']} recorded responses "
+          f"in {summary['elapsed']:.2f}s (output in {workdir})")
+    for product_id, side in summary['orders']:
+        print(f"  {side:<4} {product_id}")
+    if summary['misses']:
+        print(f"Requests without a recorded response: {summary['misses']}")
+
+
+def scan_once(args):
+    import logging
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    import src.main as bot
+
+    bot.signer.calibrate(bot.client)
+    try:
+        if args.buy:
+            # Held positions count against MAX_POSITIONS, and new ones must be there for the next run
+            bot.positions.attach(bot.state_journal)
+            held = set(bot.positions.product_ids())
+            bot.run_buy_sweep()
+            # A buy not filled within FILL_TIMEOUT is confirmed in the background; its position is
+            # only journaled once the fill arrives
+            if not bot.order_router.join(args.fill_wait):
+                for order in bot.order_router.unconfirmed():
+                    logging.warning(f"Buy order {order.client_oid} for {order.product_id} still unfilled after "
+                                    f"{args.fill_wait}s; its position is not tracked")
+                    print(f"Unconfirmed: {order.product_id} (client_oid {order.client_oid}); check the exchange")
+            bought = [product_id for product_id in bot.positions.product_ids() if product_id not in held]
+            print(f"Bought: {', '.join(bought) or 'nothing'}")
+            return
+        candidates, evaluated = bot.find_buy_candidates()
+        print(f"{len(candidates)} candidates among {evaluated} products")
+        for candidate in candidates:
+            print(f"{candidate.product_id:<12} score {candidate.score:8.2f}  2h {candidate.change_2h:8.2f}%  "
+                  f"1h {candidate.change_1h:8.2f}%  since last {candidate.change_since_last:8.2f}%")
+    finally:
+        # Fill confirmations write order rows, so they stop before the writer does
+        bot.order_router.close()
+        bot.writer.close()
+        bot.price_index.snapshot()
+        bot.state_journal.close()
+
+
+def status(args):
+    """
+    Reports what the bot has stored, without importing the bot or pandas.
+    """
+    from src.state_journal import StateJournal
+    held = StateJournal(args.journal).restore(clean=False)
+    print(f"Positions: {len(held)}")
+    for product_id, position in held.items():
+        print(f"  {product_id:<12} bought {position['amount']} at {position['purchase_price']} on {position['time']}, "
+              f"high {position['highest_price']}, last {position['previous_price']}")
+
+    if os.path.isfile(args.prices):
+        with open(args.prices) as f:
+            prices = json.load(f)
+        newest = max((seen_at for _, seen_at in prices.values()), default=None)
+        age = f"{time.time() - newest:.0f}s old" if newest else 'no timestamps'
+        print(f"Last prices: {len(prices)} products ({age})")
+    else:
+        print(f"Last prices: {args.prices} not found")
+
+    if os.path.isfile(args.db):
+        conn = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+        try:
+            count, products, latest = conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT product_id), MAX(time) FROM candles').fetchone()
+        finally:
+            conn.close()
+        latest_text = time.strftime('%Y-%m-%d %H:%M', time.localtime(latest)) if latest else '-'
+        print(f"Candles: {count} bars for {products} products, latest {latest_text}")
+    else:
+        print(f"Candles: {args.db} not found")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='Crypto trading bot.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the bot until SIGTERM/Ctrl-C')
+    run_parser.add_argument('--ticker-feed', action='store_true', help='Stream prices over the WebSocket feed')
+    run_parser.add_argument('--scan-processes', type=int, help='Shard the buy sweep across N processes')
+    run_parser.add_argument('--max-positions', type=int)
+    run_parser.add_argument('--metrics-port', type=int, help='Port for /metrics (0 disables)')
+    run_parser.add_argument('--record', metavar='PATH',
+                            help='Record exchange responses and job runs (.jsonl.gz); not with --ticker-feed')
+    run_parser.set_defaults(handler=run)
+
+    replay_parser = commands.add_parser('replay', help='Rerun a recorded session offline')
+    replay_parser.add_argument('recording')
+    replay_parser.add_argument('--speed', type=float, default=0.0,
+                               help='1 for the recorded pacing, N for N times faster; 0 (default) for no waiting')
+    replay_parser.add_argument('--workdir', help='Where the replayed bot writes its files (default: a temp dir)')
+    replay_parser.set_defaults(handler=replay)
+
+    scan_parser = commands.add_parser('scan-once', help='Run one buy sweep and print the candidates')
+    scan_parser.add_argument('--buy', action='store_true', help='Place the buy orders too')
+    scan_parser.add_argument('--fill-wait', type=float, default=600,
+                             help='Seconds to wait for buys still unfilled after the sweep (default 600)')
+    scan_parser.set_defaults(handler=scan_once)
+
+    status_parser = commands.add_parser('status', help='Summarize the held positions, stored prices and candles')
+    status_parser.add_argument('--journal', default='positions.journal')
+    status_parser.add_argument('--prices', default='last_prices.json')
+    status_parser.add_argument('--db', default='market_data.db')
+    status_parser.set_defaults(handler=status)
+
+    for command, module_name in DELEGATED.items():
+        commands.add_parser(command, help=f'See python -m {module_name} --help', add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in DELEGATED:
+        sys.argv = [f'{sys.argv[0]} {argv[0]}'] + argv[1:]
+        importlib.import_module(DELEGATED[argv[0]]).main()
+        return
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'run' and args.record and args.ticker_feed:
+        # Streamed prices aren't recorded; a replay would fall back to REST tickers it has no answers for
+        parser.error('--record cannot be combined with --ticker-feed')
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
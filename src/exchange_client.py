@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Coinbase Pro request budgets (requests per second, burst)
+PUBLIC_RATE = 10
+PUBLIC_BURST = 15
+PRIVATE_RATE = 15
+PRIVATE_BURST = 30
+
+# Statuses worth retrying: throttled or a transient server-side failure
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Refills at `rate` tokens per second up to `capacity`.
+
+    :param rate: Tokens added per second
+    :param capacity: Maximum number of tokens the bucket can hold (the burst size)
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` are available, then spends them.
+
+        :param tokens: Number of tokens to spend
+        :return: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class ExchangeClient:
+    """
+    Pooled keep-alive HTTP client for the exchange REST API.
+
+    GET requests are retried with exponential backoff on 429/5xx (honouring Retry-After).
+    POSTs are never retried here, since an order that timed out may still have been placed.
+    Every request spends a token from the public or private bucket before it goes out.
+
+    With a Metrics registry, every call records its count by status, latency, retries, response bytes
+    and rate-limit wait, labelled by `name` (or the endpoint when no name is given).
+    """
+
+    def __init__(self, api_url, pool_size=10, max_retries=3, backoff_factor=0.5, timeout=10,
+                 public_bucket=None, private_bucket=None, metrics=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.metrics = metrics
+        self.public_bucket = public_bucket or TokenBucket(PUBLIC_RATE, PUBLIC_BURST)
+        self.private_bucket = private_bucket or TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, endpoint, headers=None, params=None, private=False, name=None):
+        bucket = self.private_bucket if private else self.public_bucket
+        waited = bucket.acquire()
+        return self._send('GET', name or endpoint, waited, self.session.get, self.api_url + endpoint,
+                          headers=headers, params=params, timeout=self.timeout)
+
+    def post(self, endpoint, headers=None, data=None, private=True, name=None):
+        bucket = self.private_bucket if private else self.public_bucket
+        waited = bucket.acquire()
+        return self._send('POST', name or endpoint, waited, self.session.post, self.api_url + endpoint,
+                          headers=headers, data=data, timeout=self.timeout)
+
+    def _send(self, method, name, waited, send, url, **kwargs):
+        if self.metrics is None:
+            return send(url, **kwargs)
+        self.metrics.inc('exchange_rate_limit_wait_seconds_total', waited, endpoint=name)
+        started = time.perf_counter()
+        try:
+            response = send(url, **kwargs)
+        except Exception as e:
+            self.metrics.inc('exchange_requests_total', endpoint=name, method=method, status=type(e).__name__)
+            raise
+        finally:
+            self.metrics.observe('exchange_request_seconds', time.perf_counter() - started, endpoint=name)
+        self.metrics.inc('exchange_requests_total', endpoint=name, method=method, status=response.status_code)
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        if retries is not None and retries.history:
+            self.metrics.inc('exchange_retries_total', len(retries.history), endpoint=name)
+        content = response.content
+        if isinstance(content, bytes):
+            self.metrics.inc('exchange_response_bytes_total', len(content), endpoint=name)
+        return response
+
+    def close(self):
+        self.session.close()
+        logging.info("Exchange client session closed")
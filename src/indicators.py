@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import deque
+
+from src.rules import percent_change
+
+# Rolling windows kept per product, in seconds
+WINDOWS = (3600, 7200)
+
+
+class RollingBars:
+    """
+    Ring buffer of one product's most recent bars, addressed by bucket number so any bar in range is
+    read or overwritten in O(1). A monotonic deque per window keeps the running high in amortized O(1).
+
+    :param granularity: Bar size in seconds
+    :param windows: Window lengths in seconds; the buffer is sized for the longest
+    """
+
+    __slots__ = ('granularity', 'size', 'windows', 'times', 'opens', 'highs', 'closes', 'latest', 'first',
+                 'high_deques', 'updated_at')
+
+    def __init__(self, granularity=300, windows=WINDOWS):
+        self.granularity = granularity
+        self.windows = windows
+        self.size = max(windows) // granularity + 1  # Window bars plus the forming one
+        self.times = [None] * self.size
+        self.opens = [0.0] * self.size
+        self.highs = [0.0] * self.size
+        self.closes = [0.0] * self.size
+        self.latest = None  # Bucket time of the newest bar
+        self.first = None  # Bucket time of the oldest bar seen since the series started without gaps
+        self.high_deques = {window: deque() for window in windows}  # (bucket, high), highs decreasing
+        self.updated_at = 0.0
+
+    def _slot(self, bucket):
+        return (bucket // self.granularity) % self.size
+
+    def update(self, at, open_price, high, close, tick=False):
+        """
+        Applies a bar (or, with tick=True, a single trade price) at unix time `at`.
+        """
+        bucket = int(at) // self.granularity * self.granularity
+        if self.latest is not None and bucket <= self.latest - self.size * self.granularity:
+            return  # Older than anything the buffer holds
+        slot = self._slot(bucket)
+        existing = self.times[slot] == bucket
+
+        if tick and existing:
+            self.highs[slot] = max(self.highs[slot], close)
+            self.closes[slot] = close
+        else:
+            self.times[slot] = bucket
+            self.opens[slot] = open_price
+            self.highs[slot] = high
+            self.closes[slot] = close
+
+        if self.latest is None or bucket > self.latest:
+            if self.latest is not None and bucket - self.latest > self.size * self.granularity:
+                self.first = bucket  # Gap longer than the buffer: start over
+            self.latest = bucket
+            if self.first is None:
+                self.first = bucket
+            self._push_high(bucket, self.highs[slot])
+        elif bucket == self.latest:
+            self._push_high(bucket, self.highs[slot])
+        else:
+            self.first = min(self.first, bucket)
+            self._rebuild_highs()  # Out-of-order bar: rare, so rebuild
+        self.updated_at = time.time()
+
+    def _push_high(self, bucket, high):
+        for window, highs in self.high_deques.items():
+            while highs and highs[-1][1] <= high:
+                highs.pop()
+            highs.append((bucket, high))
+            start = bucket - window
+            while highs[0][0] <= start:
+                highs.popleft()
+
+    def _rebuild_highs(self):
+        for highs in self.high_deques.values():
+            highs.clear()
+        buckets = sorted(t for t in self.times if t is not None and t > self.latest - self.size * self.granularity)
+        for bucket in buckets:
+            self._push_high(bucket, self.highs[self._slot(bucket)])
+
+    def bar(self, bucket):
+        slot = self._slot(bucket)
+        if self.times[slot] != bucket:
+            return None
+        return self.opens[slot], self.highs[slot], self.closes[slot]
+
+    def window_open(self, window):
+        """
+        Open of the oldest bar inside the window (the first bar present, if the window starts in a gap).
+        """
+        bucket = self.latest - window + self.granularity
+        while bucket <= self.latest:
+            bar = self.bar(bucket)
+            if bar is not None:
+                return bar[0]
+            bucket += self.granularity
+        return None
+
+    def is_warm(self, window):
+        return self.first is not None and self.first <= self.latest - window + self.granularity
+
+
+class IndicatorBook:
+    """
+    Streaming rolling-window indicators for every product, fed by ticks and candles.
+
+    Reads return None until the product has data covering the window, so callers can fall back to
+    fetching candles.
+
+    :param granularity: Bar size in seconds
+    :param windows: Window lengths in seconds
+    """
+
+    def __init__(self, granularity=300, windows=WINDOWS):
+        self.granularity = granularity
+        self.windows = windows
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _bars(self, product_id):
+        bars = self.series.get(product_id)
+        if bars is None:
+            bars = self.series[product_id] = RollingBars(self.granularity, self.windows)
+        return bars
+
+    def on_tick(self, product_id, price, at=None):
+        if price is None:
+            return
+        with self.lock:
+            self._bars(product_id).update(at if at is not None else time.time(), price, price, price, tick=True)
+
+    def on_bar(self, product_id, at, open_price, high, close):
+        with self.lock:
+            self._bars(product_id).update(at, open_price, high, close)
+
+    def on_candles(self, product_id, data):
+        """
+        Applies a candle DataFrame (any row order) from the exchange.
+        """
+        if data is None or data.empty:
+            return
+        data = data.sort_values('time')
+        with self.lock:
+            bars = self._bars(product_id)
+            for row in data[['time', 'open', 'high', 'close']].itertuples(index=False):
+                bars.update(row.time, row.open, row.high, row.close)
+
+    def is_fresh(self, product_id, max_age):
+        bars = self.series.get(product_id)
+        return bars is not None and time.time() - bars.updated_at <= max_age and \
+            bars.latest >= int(time.time()) // self.granularity * self.granularity - self.granularity
+
+    def close(self, product_id):
+        bars = self.series.get(product_id)
+        if bars is None or bars.latest is None:
+            return None
+        return bars.bar(bars.latest)[2]
+
+    def change(self, product_id, window):
+        """
+        :return: Percent change from the window's first open to the latest close, or None if not warm
+        """
+        bars = self.series.get(product_id)
+        if bars is None or not bars.is_warm(window):
+            return None
+        with self.lock:
+            open_price = bars.window_open(window)
+            close = bars.bar(bars.latest)[2]
+        return percent_change(close, open_price) if open_price else None
+
+    def high(self, product_id, window):
+        """
+        :return: Highest price within the window, or None if there is no data
+        """
+        bars = self.series.get(product_id)
+        if bars is None or not bars.high_deques[window]:
+            return None
+        return bars.high_deques[window][0][1]
+
+    def high_since(self, product_id, since):
+        """
+        :return: Highest price in the bars after the one holding unix time `since` (as far back as the
+                 longest window reaches), or None if there are none
+        """
+        bars = self.series.get(product_id)
+        if bars is None:
+            return None
+        bucket = int(since) // self.granularity * self.granularity
+        with self.lock:
+            # Entries are the running maxima of each suffix of the window, oldest first
+            for entry_bucket, high in bars.high_deques[max(self.windows)]:
+                if entry_bucket > bucket:
+                    return high
+        return None
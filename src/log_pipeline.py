@@ -0,0 +1,149 @@
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# Rotate the log file at this size or this many seconds after it was opened, whichever comes first
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_ROTATE_INTERVAL = 24 * 3600
+LOG_BACKUP_COUNT = 7
+# Identical messages below ERROR are logged at most once per this many seconds
+REPEAT_INTERVAL = 60
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, thread, message (and traceback if any).
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        return json.dumps(entry, default=str)
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Drops a message repeated within `interval` seconds of the last time it was let through. The next
+    copy that gets through carries the number dropped in between as `record.suppressed`.
+
+    :param interval: Seconds between copies of the same message
+    :param max_level: Messages at or above this level are never dropped
+    """
+
+    def __init__(self, interval=REPEAT_INTERVAL, max_level=logging.ERROR):
+        super().__init__()
+        self.interval = interval
+        self.max_level = max_level
+        self.seen = {}  # (logger, level, message) -> [last emitted at, suppressed since]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.max_level:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            record.suppressed = entry[1] if entry is not None else 0
+            self.seen[key] = [now, 0]
+            if len(self.seen) > 10000:
+                self.seen.clear()  # Bounded memory if messages carry varying values
+        return True
+
+
+class RotatingLogFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that also rolls over once the file has been open `interval` seconds.
+    """
+
+    def __init__(self, file_name, max_bytes=LOG_MAX_BYTES, interval=LOG_ROTATE_INTERVAL,
+                 backup_count=LOG_BACKUP_COUNT):
+        super().__init__(file_name, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval = interval
+        self.rollover_at = time.time() + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+
+class LogPipeline:
+    """
+    Non-blocking logging: the root logger gets a QueueHandler, and a listener thread formats the
+    records and does all file I/O. Repeated messages are filtered before they are queued.
+
+    :param file_name: Log file
+    :param level: Root log level
+    :param json_lines: Write JSON lines instead of the plain text format
+    :param max_bytes: Size at which the file rotates (0 disables)
+    :param interval: Age in seconds at which the file rotates (0 disables)
+    :param backup_count: Rotated files kept
+    :param repeat_interval: Seconds between copies of the same message (0 disables)
+    """
+
+    def __init__(self, file_name='bot_log.txt', level=logging.INFO, json_lines=True, max_bytes=LOG_MAX_BYTES,
+                 interval=LOG_ROTATE_INTERVAL, backup_count=LOG_BACKUP_COUNT, repeat_interval=REPEAT_INTERVAL):
+        self.file_name = file_name
+        self.level = level
+        self.json_lines = json_lines
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.repeat_interval = repeat_interval
+        self.queue_handler = None
+        self.listener = None
+
+    def start(self):
+        if self.listener is not None:
+            return self
+        file_handler = RotatingLogFileHandler(self.file_name, self.max_bytes, self.interval, self.backup_count)
+        if self.json_lines:
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+        self.queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        if self.repeat_interval:
+            self.queue_handler.addFilter(RepeatFilter(self.repeat_interval))
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, file_handler,
+                                                       respect_handler_level=True)
+        root = logging.getLogger()
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """
+        Detaches from the root logger and writes out everything still queued.
+        """
+        if self.listener is None:
+            return
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
@@ -1,20 +1,37 @@
-import requests
 import logging
 import json
-import base64
-import hmac
-import hashlib
 import time
 from datetime import datetime, timedelta
-import pandas as pd
 import os
-
-
-def rate_limiter():
-    time.sleep(1)  # Adjust the duration based on the API's rate limit it should be 30
-
-# Configure logging to write to a file
-logging.basicConfig(filename='bot_log.txt', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.candle_store import CANDLE_COLUMNS, CandleStore
+from src.exchange_client import ExchangeClient
+from src.indicators import IndicatorBook
+from src.log_pipeline import LogPipeline
+from src.market_store import MarketStore
+from src.metrics import Metrics, MetricsServer, METRICS_PORT, SWEEP_BUCKETS
+from src.orders import KEEPALIVE_INTERVAL, ORDER_TIMEOUT, OrderRouter
+from src.portfolio import PositionBook
+from src.state_journal import StateJournal
+from src.price_index import LastPriceIndex
+from src.rules import DEFAULT_THRESHOLDS, is_sell_signal
+from src.scanner import SCAN_WORKERS, scan_products
+from src.scheduler import Scheduler
+from src.signer import RequestSigner
+from src.universe import ProductUniverse
+from src.ticker_feed import TickerFeed, WS_URL
+from src.writer import BufferedWriter
+
+# pandas, numpy and the multiprocess scanner are imported where first used: importing this module
+# opens no files and starts no threads, so tests, tools and restarts don't pay for them up front
+
+# Log file, written by a background listener thread (see main())
+LOG_FILE = 'bot_log.txt'
+# Write the log as JSON lines instead of plain text
+LOG_JSON = True
 
 # Replace with  Coinbase Pro API creds when ready after mock test passes
 API_KEY = 'API_KEY'
@@ -22,26 +39,123 @@ API_SECRET = 'API_SECRET'
 API_PASSPHRASE = 'API_PASSPHRASE'
 
 # Coinbase Pro API endpoints
-API_URL = 'https://api.pro.coinbase.com'
+API_URL = os.environ.get('EXCHANGE_API_URL', 'https://api.pro.coinbase.com')  # Override to use src/mock_exchange.py
+
+# Stream prices over the WebSocket feed instead of polling /ticker (needs the 'websockets' package)
+USE_TICKER_FEED = False
+
+# Maximum number of positions held at once
+MAX_POSITIONS = 1
+
+# Products scanned by the buy sweep: quote currency and minimum 24h activity
+QUOTE_CURRENCIES = ('USD',)
+MIN_QUOTE_VOLUME = 100000  # In the quote currency
+MIN_DAILY_RANGE = 1.0  # Percent; a product this quiet over 24h is very unlikely to jump 5-10% in an hour
+
+# Worker processes the buy sweep is sharded across (0 scans in this process with threads)
+SCAN_PROCESSES = 0
+
+# Streaming indicators older than this are not trusted by the buy sweep
+INDICATOR_MAX_AGE = 5
+# The same for products on a connected feed: no update then means no trades, not missing data
+STREAMED_INDICATOR_MAX_AGE = 300
+# Seconds between sell checks while a position is held
+SELL_CHECK_INTERVAL = 1
+# Seconds between housekeeping runs (price snapshot, clock calibration)
+HOUSEKEEPING_INTERVAL = 60
+# A buy sweep starting later than this after the top of the hour is reported as a missed deadline
+BUY_SWEEP_TOLERANCE = 5
+
+# Port of the local Prometheus /metrics endpoint (None disables it)
+METRICS_SERVER_PORT = METRICS_PORT
+
+# Request, sweep and decision-latency metrics, scraped from /metrics
+metrics = Metrics()
+metrics.describe('exchange_requests_total', 'Exchange REST calls by endpoint, method and status')
+metrics.describe('exchange_request_seconds', 'Exchange REST call latency, including retries')
+metrics.describe('exchange_retries_total', 'Retries made by the HTTP adapter')
+metrics.describe('exchange_response_bytes_total', 'Response body bytes received')
+metrics.describe('exchange_rate_limit_wait_seconds_total', 'Time spent waiting for a rate-limit token')
+metrics.describe('buy_sweep_seconds', 'Duration of the hourly buy sweep')
+metrics.describe('buy_sweep_products', 'Products evaluated by the last buy sweep')
+metrics.describe('buy_sweep_candidates', 'Candidates found by the last buy sweep')
+metrics.describe('tick_to_decision_seconds', 'Time from receiving a price to the sell decision')
+metrics.describe('orders_total', 'Orders placed by side and outcome')
+metrics.describe('order_ack_seconds', 'Time from sending an order to its acknowledgement, including retries')
+metrics.describe('tick_to_order_ack_seconds', 'Time from receiving the triggering price to the order acknowledgement')
+metrics.describe('order_fill_seconds', 'Time from acknowledgement to confirmed fill')
+metrics.describe('order_retries_total', 'Order resubmissions after a timeout or server error')
+metrics.describe('order_lookups_total', 'Order lookups by client_oid after an unknown outcome')
+metrics_server = None
+
+# Queue-based logging: file I/O, JSON formatting and rotation happen off the trading path
+log_pipeline = LogPipeline(LOG_FILE, json_lines=LOG_JSON)
+
+# Decodes the secret once and keeps the clock offset to the exchange
+signer = RequestSigner(API_KEY, API_SECRET, API_PASSPHRASE)
+
+# Shared keep-alive client; its token buckets replace the old fixed one-second rate_limiter()
+client = ExchangeClient(API_URL, metrics=metrics)
+
+# Orders get their own warm connection so they never queue behind sweep requests; no adapter
+# retries, the router retries itself with the same client_oid. Fill polls use the shared client.
+order_client = ExchangeClient(API_URL, pool_size=1, max_retries=0, timeout=ORDER_TIMEOUT,
+                              public_bucket=client.public_bucket, private_bucket=client.private_bucket,
+                              metrics=metrics)
+order_router = OrderRouter(order_client, lambda endpoint, method, body: create_request_headers(endpoint, method, body),
+                           metrics, status_client=client)
+
+# Indexed candle storage; replaces the append-only historical_data.csv
+market_store = MarketStore('market_data.db')
+
+# Last-seen price per product, fed by every ticker and candle response
+price_index = LastPriceIndex('last_prices.json')
+
+# Cached product list, refreshed hourly, with the 24h stats snapshot refreshed every 10 minutes
+universe = ProductUniverse(lambda: fetch_products(), lambda: fetch_product_stats(), QUOTE_CURRENCIES,
+                           MIN_QUOTE_VOLUME, MIN_DAILY_RANGE)
+
+# Multi-process sweep, created in main() when SCAN_PROCESSES is set
+sharded_scanner = None
+
+# Rolling 1h/2h windows per product, fed by every tick and candle
+indicators = IndicatorBook()
+
+# Candle cache; only bars newer than the last one held are requested on each sweep
+candle_store = CandleStore(
+    lambda product_id, start_time, end_time, granularity: fetch_historical_data(product_id, start_time, end_time, granularity),
+    backend=market_store
+)
+
+# Order rows and candle upserts are written off the trading path
+writer = BufferedWriter()
+
+# Streaming feed when USE_TICKER_FEED is on
+ticker_feed = None
+
+# Hourly buy sweep, sell-check ticks and housekeeping run as scheduled jobs
+scheduler = Scheduler()
+sell_check_job = None
+sell_checks_lock = threading.Lock()
+# The buy sweep runs on its own thread, so a slow sweep (or an order waiting for its fill) never
+# holds up the 1s sell checks; at most one sweep runs at a time
+sweep_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='buy-sweep')
+sweep_future = None
+# Long-lived pool for the sell checks' batched price fetch; a pool per 1s tick would start and
+# join its threads every second
+price_executor = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix='price-fetch')
+# perf_counter() time of the first streamed tick not yet acted on, per held product
+streamed_tick_at = {}
+
+# Open positions with their trailing high and previous price
+positions = PositionBook()
+# Journal of position changes, restored into `positions` by main()
+state_journal = StateJournal('positions.journal')
 
 
 def create_request_headers(endpoint, method='GET', body=''):
     try:
-        timestamp = str(time.time())
-        message = timestamp + method + endpoint + (body if body else '')
-        signature = hmac.new(
-            key=base64.b64decode(API_SECRET),
-            msg=message.encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).hexdigest()
-        headers = {
-            'CB-ACCESS-KEY': API_KEY,
-            'CB-ACCESS-SIGN': signature,
-            'CB-ACCESS-TIMESTAMP': timestamp,
-            'CB-ACCESS-PASSPHRASE': API_PASSPHRASE,
-            'Content-Type': 'application/json'
-        }
-        return headers
+        return signer.sign(endpoint, method, body)
     except Exception as e:
         logging.error(f"Error creating request headers: {e}")
         return None
@@ -56,31 +170,44 @@ def fetch_historical_data(product_id, start_time, end_time, granularity=300):
             'granularity': granularity
         }
         headers = create_request_headers(endpoint, 'GET')
-        response = requests.get(API_URL + endpoint, headers=headers, params=params)
+        response = client.get(endpoint, headers=headers, params=params, name='fetch_historical_data')
 
         if response.status_code == 200:
+            import pandas as pd
             data = pd.DataFrame(response.json(), columns=['time', 'low', 'high', 'open', 'close', 'volume'])
 
-            # Append data to CSV
-            append_to_csv(data, 'historical_data.csv')
+            # Store the candles under their product id
+            writer.submit(market_store.upsert_candles, product_id, data, granularity)
+            indicators.on_candles(product_id, data)
+            if not data.empty:
+                latest = data.loc[data['time'].idxmax()]
+                price_index.update(product_id, latest['close'], float(latest['time']))
 
             return data
         else:
             logging.warning(f"Failed to fetch historical data for {product_id}: {response.status_code}")
-            return pd.DataFrame()
+            return empty_candles()
     except Exception as e:
         logging.error(f"Error fetching historical data for {product_id}: {e}")
-        return pd.DataFrame()
+        return empty_candles()
+
+
+def empty_candles():
+    import pandas as pd
+    return pd.DataFrame()
 
 def fetch_current_price_data(product_id):
     try:
         endpoint = f'/products/{product_id}/ticker'
         headers = create_request_headers(endpoint, 'GET')
-        response = requests.get(API_URL + endpoint, headers=headers)
+        response = client.get(endpoint, headers=headers, name='fetch_current_price_data')
 
         if response.status_code == 200:
             data = response.json()
-            return float(data['price'])  # Assuming the response contains a 'price' field
+            price = float(data['price'])  # Assuming the response contains a 'price' field
+            price_index.update(product_id, price)
+            indicators.on_tick(product_id, price)
+            return price
         else:
             logging.warning(f"Failed to fetch current price for {product_id}: {response.status_code}")
             return None
@@ -88,61 +215,138 @@ def fetch_current_price_data(product_id):
         logging.error(f"Error fetching current price for {product_id}: {e}")
         return None
 
+def get_current_price(product_id):
+    """
+    Returns the current price, from the streaming feed when it has a fresh one, otherwise via REST.
+
+    :param product_id: Product id, e.g. 'BTC-USD'
+    :return: Price as float, or None if unavailable
+    """
+    if ticker_feed is not None:
+        price = ticker_feed.get_price(product_id)
+        if price is not None:
+            price_index.update(product_id, price)
+            indicators.on_tick(product_id, price)
+            return price
+    return fetch_current_price_data(product_id)
+
+
+def on_streamed_price(product_id, price):
+    indicators.on_tick(product_id, price)
+    # Run the sell check as soon as the held product's price moves
+    if product_id in positions and sell_check_job is not None:
+        streamed_tick_at.setdefault(product_id, time.perf_counter())
+        scheduler.trigger(sell_check_job)
+
+
+def get_current_prices(product_ids):
+    """
+    Returns current prices for several products in one batch: fresh streamed prices where the feed
+    has them, and one concurrent round of REST calls on price_executor for the rest (a single
+    missing price is fetched on the calling thread).
+
+    :param product_ids: Products to price
+    :return: {product_id: price or None}
+    """
+    prices = {}
+    missing = []
+    for product_id in product_ids:
+        price = ticker_feed.get_price(product_id) if ticker_feed is not None else None
+        if price is not None:
+            price_index.update(product_id, price)
+            prices[product_id] = price
+        else:
+            missing.append(product_id)
+    if len(missing) == 1:
+        prices[missing[0]] = fetch_current_price_data(missing[0])
+    elif missing:
+        prices.update(zip(missing, price_executor.map(fetch_current_price_data, missing)))
+    return prices
+
+
 def fetch_last_checked_price(product_id):
     try:
-        # Read the historical data CSV file
-        historical_data = pd.read_csv('historical_data.csv')
-
-        # Filter the data for the given product_id and get the most recent entry
-        filtered_data = historical_data[historical_data['product_id'] == product_id]
-        if not filtered_data.empty:
-            last_checked_price = filtered_data.iloc[-1]['close']  # Assuming 'close' column has the last price
+        # O(1) in-memory lookup; the market store is only consulted for products not seen yet
+        last_checked_price = price_index.get(product_id)
+        if last_checked_price is None:
+            last_checked_price = market_store.latest_close(product_id)
+            price_index.update(product_id, last_checked_price, 0)
+        if last_checked_price is not None:
             return last_checked_price
         else:
             return 0  # Return a default value if no data is found for the product_id
-    except FileNotFoundError:
-        return 0  # Return a default value if the file does not exist
     except Exception as e:
         logging.error(f"Error fetching last checked price for {product_id}: {e}")
         return 0
 
 
 
-def get_available_products():
+def fetch_products():
+    """
+    :return: The exchange's product dicts, or None if the request failed
+    """
     try:
         endpoint = '/products'
         headers = create_request_headers(endpoint, 'GET')
-        response = requests.get(API_URL + endpoint, headers=headers)
+        response = client.get(endpoint, headers=headers, name='get_available_products')
 
         if response.status_code == 200:
-            products = json.loads(response.text)
-            return [product['id'] for product in products if product['trading_disabled'] == False]
+            return json.loads(response.text)
         else:
             logging.warning(f"Failed to fetch products: {response.status_code}")
-            return []
+            return None
     except Exception as e:
         logging.error(f"Error fetching products: {e}")
+        return None
+
+
+def fetch_product_stats():
+    """
+    :return: 24h and 30d stats for every product in one call, or None if the request failed
+    """
+    try:
+        endpoint = '/products/stats'
+        headers = create_request_headers(endpoint, 'GET')
+        response = client.get(endpoint, headers=headers, name='fetch_product_stats')
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logging.warning(f"Failed to fetch product stats: {response.status_code}")
+            return None
+    except Exception as e:
+        logging.error(f"Error fetching product stats: {e}")
+        return None
+
+
+def get_available_products():
+    products = fetch_products()
+    if products is None:
         return []
+    return [product['id'] for product in products if product['trading_disabled'] == False]
 
 def append_to_csv(data, file_name):
     """
-    Appends a DataFrame to a CSV file. Creates the file if it does not exist.
+    Queues rows to be appended to a CSV file by the background writer.
+    Creates the file if it does not exist.
 
-    :param data: DataFrame to append
+    :param data: DataFrame or list of row dicts to append
     :param file_name: Name of the CSV file
     """
     try:
-        # Check if the file exists
-        file_exists = os.path.isfile(file_name)
-
-        # Append data to the CSV file; create a new file if it doesn't exist
-        data.to_csv(file_name, mode='a', header=not file_exists, index=False)
-        logging.info(f"Data appended to {file_name}")
+        writer.write_csv(file_name, data)
     except Exception as e:
         logging.error(f"Error appending data to CSV: {e}")
 
 
-def check_and_execute_buy(product_id, last_checked_price):
+def evaluate_buy_conditions(product_id, last_checked_price):
+    """
+    Evaluates the buy conditions for a product without placing an order.
+
+    :param product_id: Product to evaluate, e.g. 'BTC-USD'
+    :param last_checked_price: Price recorded at the previous check
+    :return: True if any buy condition is met
+    """
     try:
         now = datetime.now()
 
@@ -152,129 +356,258 @@ def check_and_execute_buy(product_id, last_checked_price):
 
         # Condition 1: 10% increase over the past 2 hours
         start_time_2h = now - timedelta(hours=2)
-        historical_data_2h = fetch_historical_data(product_id, start_time_2h, now)
+        historical_data_2h = candle_store.get_window(product_id, start_time_2h, now)
         if not historical_data_2h.empty:
             price_increase_2h = (historical_data_2h['close'].iloc[-1] - historical_data_2h['open'].iloc[0]) / \
                                 historical_data_2h['open'].iloc[0] * 100
-            if price_increase_2h >= 10:
+            if price_increase_2h >= DEFAULT_THRESHOLDS.buy_change_2h:
                 is_buy_condition_met = True
 
         # Condition 2: 10% increase over the past 1 hour
         start_time_1h = now - timedelta(hours=1)
-        historical_data_1h = fetch_historical_data(product_id, start_time_1h, now)
+        # The 1h window is a subset of the 2h one, so slice it instead of fetching again
+        historical_data_1h = historical_data_2h[historical_data_2h['time'] >= start_time_1h.timestamp()]
         if not historical_data_1h.empty:
             price_increase_1h = (historical_data_1h['close'].iloc[-1] - historical_data_1h['open'].iloc[0]) / \
                                 historical_data_1h['open'].iloc[0] * 100
-            if price_increase_1h >= 10:
+            if price_increase_1h >= DEFAULT_THRESHOLDS.buy_change_1h:
                 is_buy_condition_met = True
 
         # Condition 3: 5% increase since the last API call
-        current_price = fetch_current_price_data(product_id)
+        current_price = get_current_price(product_id)
         if current_price is not None and last_checked_price is not None:
             price_increase_since_last_check = (current_price - last_checked_price) / last_checked_price * 100
-            if price_increase_since_last_check >= 5:
+            if price_increase_since_last_check >= DEFAULT_THRESHOLDS.buy_change_since_last:
                 is_buy_condition_met = True
 
-        # If any buy condition is met, execute buy order
-        if is_buy_condition_met:
-            global held_crypto, owned_crypto
-            # Execute buy order logic
-            # Define the amount to buy or the funds to use
-            buy_order_data = {
-                'type': 'market',
-                'product_id': product_id,
-                'funds': 'FIAT_AMOUNT_TO_SPEND'  # Replace with the fiat amount we will want to spend
-            }
-
-            endpoint = '/orders'
-            body = json.dumps(buy_order_data)
-            headers = create_request_headers(endpoint, 'POST', body)
-            response = requests.post(API_URL + endpoint, headers=headers, data=body)
-
-            if response.status_code == 200:
-                response_data = response.json()
-                # Assuming response contains the amount of crypto bought
-                amount_bought = response_data['filled_size']
-                purchase_price = response_data['executed_value'] / amount_bought
-
-                # Update held_crypto
-                held_crypto = {
-                    'product_id': product_id,
-                    'purchase_price': purchase_price,
-                    'amount': amount_bought,
-                    'time': datetime.now()
-                }
-
-                # Append order details to CSV
-                order_details_df = pd.DataFrame([{
-                    'product_id': product_id,
-                    'purchase_price': purchase_price,
-                    'amount_bought': amount_bought,
-                    'time': datetime.now()
-                }])
-                append_to_csv(order_details_df, 'buy_orders.csv')
-
-                logging.info(f"Successfully executed buy order for {product_id}: Bought {amount_bought} units at {purchase_price} each.")
-            else:
-                logging.warning(f"Failed to execute buy order for {product_id}: {response.status_code}, Response: {response.text}")
+        return is_buy_condition_met
+    except Exception as e:
+        logging.error(f"Error evaluating buy conditions for {product_id}: {e}")
+        return False
+
+
+def execute_buy_order(product_id):
+    """
+    Places a market buy order for a product and records it.
+
+    :param product_id: Product to buy
+    :return: True if the order was filled
+    """
+    try:
+        # Define the amount to buy or the funds to use
+        order = order_router.prepare(product_id, 'buy', funds='FIAT_AMOUNT_TO_SPEND')  # Replace with the fiat amount we will want to spend
+        ack = order_router.submit(order)
+        if ack is None:
+            metrics.inc('orders_total', side='buy', outcome='rejected')
+            logging.warning(f"Failed to execute buy order for {product_id}")
+            return False
+
+        # The position needs the fill price, so buys wait for the fill
+        fill = order_router.wait_for_fill(order, ack)
+        if fill is None:
+            # The coins are (being) bought: keep confirming in the background and track the position once filled
+            logging.warning(f"Buy order {order.client_oid} for {product_id} accepted but not filled yet; "
+                            f"confirming in the background")
+            order_router.confirm(order, ack, lambda order, fill: record_buy_fill(order, fill, late=True))
+            return False
+        return record_buy_fill(order, fill)
+    except Exception as e:
+        logging.error(f"Error executing buy order for {product_id}: {e}")
+        return False
+
+
+def record_buy_fill(order, fill, late=False):
+    """
+    Opens the position for a filled buy and records it.
+
+    :param late: The fill was confirmed in the background after execute_buy_order() returned, so
+                 nothing else will start the sell checks
+    :return: True if anything was bought
+    """
+    product_id = order.product_id
+    amount_bought = float(fill.get('filled_size') or 0)
+    if not amount_bought:
+        # Done without a fill (e.g. cancelled): nothing was bought
+        metrics.inc('orders_total', side='buy', outcome='cancelled')
+        logging.warning(f"Buy order {order.client_oid} for {product_id} finished unfilled "
+                        f"({fill.get('done_reason', 'no reason given')})")
+        return False
+    metrics.inc('orders_total', side='buy', outcome='filled')
+    purchase_price = float(fill['executed_value']) / amount_bought
+
+    positions.open(product_id, purchase_price, amount_bought, datetime.now())
+    # The sell order is ready before the first sell check
+    order_router.prepare_sell(product_id, amount_bought)
 
+    # Append order details to CSV
+    order_details = [{
+        'product_id': product_id,
+        'purchase_price': purchase_price,
+        'amount_bought': amount_bought,
+        'time': datetime.now()
+    }]
+    append_to_csv(order_details, 'buy_orders.csv')
+
+    logging.info(f"Successfully executed buy order for {product_id}: Bought {amount_bought} units at {purchase_price} each.")
+    if late:
+        start_sell_checks()
+    return True
+
+
+def check_and_execute_buy(product_id, last_checked_price):
+    try:
+        # If any buy condition is met, execute buy order
+        if evaluate_buy_conditions(product_id, last_checked_price):
+            execute_buy_order(product_id)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
 
     return False
 
 
+def fetch_sweep_inputs(product_id, start_time, end_time):
+    """
+    Gathers what the signal engine needs for one product: its 2h candle window (or the 2h/1h changes
+    when the streaming indicators already cover them), last checked price and current price.
+    The last checked price is read before the current price updates it.
 
-def check_and_execute_sell_order(product_id, purchase_price, highest_price, previous_price, purchase_time):
-    global held_crypto, owned_crypto
+    :return: (window or None, last checked price, current price, (change_2h, change_1h) or None)
+    """
+    last_checked_price = fetch_last_checked_price(product_id)
+    streamed = (ticker_feed is not None and ticker_feed.connected.is_set() and
+                product_id in ticker_feed.product_ids)
+    if indicators.is_fresh(product_id, STREAMED_INDICATOR_MAX_AGE if streamed else INDICATOR_MAX_AGE):
+        change_2h = indicators.change(product_id, 7200)
+        change_1h = indicators.change(product_id, 3600)
+        if change_2h is not None and change_1h is not None:
+            # No HTTP calls and no DataFrame: the rolling windows are already up to date
+            current_price = indicators.close(product_id)
+            price_index.update(product_id, current_price)
+            return None, last_checked_price, current_price, (change_2h, change_1h)
+    window = candle_store.get_window(product_id, start_time, end_time)
+    current_price = get_current_price(product_id)
+    return window, last_checked_price, current_price, None
+
+
+def run_buy_sweep():
+    """
+    Fetches inputs for every available product concurrently, evaluates the buy conditions for the
+    whole universe in one vectorized pass, then buys the strongest candidates not already held
+    until MAX_POSITIONS are open.
+
+    :return: True if any buy order was filled
+    """
+    with metrics.timer('buy_sweep_seconds', buckets=SWEEP_BUCKETS):
+        candidates, evaluated = find_buy_candidates()
+    metrics.set('buy_sweep_products', evaluated)
+    metrics.set('buy_sweep_candidates', len(candidates))
+    bought = False
+    for candidate in candidates:
+        if len(positions) >= MAX_POSITIONS:
+            break
+        if candidate.product_id not in positions and execute_buy_order(candidate.product_id):
+            bought = True
+    return bought
+
+
+def find_buy_candidates():
+    """
+    :return: (buy candidates strongest first, number of products evaluated)
+    """
+    available_products = universe.product_ids()
+    now = datetime.now()
+    if sharded_scanner is not None:
+        return find_buy_candidates_sharded(available_products, now)
+    from src.signals import evaluate_universe
+    results, elapsed = scan_products(
+        available_products,
+        lambda product_id: fetch_sweep_inputs(product_id, now - timedelta(hours=2), now)
+    )
+    results = [(product_id, inputs) for product_id, inputs in results if inputs is not None]
+    candidates = evaluate_universe(
+        {product_id: inputs[0] for product_id, inputs in results if inputs[3] is None},
+        {product_id: inputs[2] for product_id, inputs in results},
+        {product_id: inputs[1] for product_id, inputs in results},
+        now.timestamp(),
+        changes={product_id: inputs[3] for product_id, inputs in results if inputs[3] is not None}
+    )
+    logging.info(f"Buy sweep found {len(candidates)} candidates among {len(results)} products")
+    return candidates, len(results)
+
+
+def find_buy_candidates_sharded(product_ids, now):
+    """
+    Worker processes fetch and evaluate their shards of the universe; their candidate lists are
+    merged here, and the candles and prices they saw are recorded as if fetched in this process.
 
-    current_data = fetch_current_price_data(product_id)  # Ensure this function is implemented to get the current price
-    if current_data.empty or not owned_crypto or not held_crypto:
+    :return: (buy candidates strongest first, number of products evaluated)
+    """
+    import pandas as pd
+    last_prices = {product_id: fetch_last_checked_price(product_id) for product_id in product_ids}
+    candidates, observed, elapsed = sharded_scanner.scan(product_ids, last_prices, now - timedelta(hours=2), now,
+                                                         clock_offset=signer.offset)
+    for product_id, (rows, price) in observed.items():
+        data = pd.DataFrame(rows, columns=CANDLE_COLUMNS)
+        writer.submit(market_store.upsert_candles, product_id, data, 300)
+        indicators.on_candles(product_id, data)
+        if price is not None:
+            price_index.update(product_id, price)
+            indicators.on_tick(product_id, price)
+    logging.info(f"Buy sweep found {len(candidates)} candidates among {len(observed)} products")
+    return candidates, len(observed)
+
+
+
+def record_sell_fill(order, fill, decision_price):
+    """
+    Records a confirmed sell fill; runs on the order confirmation thread.
+    """
+    amount_sold = float(fill.get('filled_size') or 0)
+    executed_value = float(fill.get('executed_value') or 0)
+    metrics.inc('orders_total', side='sell', outcome='filled')
+    order_details = [{
+        'product_id': order.product_id,
+        'amount_sold': amount_sold,
+        'sell_price': executed_value / amount_sold if amount_sold else decision_price,
+        'time': datetime.now(),
+    }]
+    append_to_csv(order_details, 'sell_orders.csv')
+    logging.info(f"Successfully executed sell order for {order.product_id}: Sold {amount_sold} units.")
+
+
+def check_and_execute_sell_order(product_id, purchase_price, highest_price, previous_price, purchase_time, current_price=None,
+                                 tick_at=None):
+    position = positions.get(product_id)
+    if current_price is None:
+        current_price = get_current_price(product_id)
+    if current_price is None or position is None:
         logging.info("No data to check sell condition or no cryptocurrency currently held to sell.")
         return False
 
-    current_price = current_data['price']
     price_drop_from_previous = (current_price - previous_price) / previous_price * 100
     price_drop_from_highest = (current_price - highest_price) / highest_price * 100
     price_gain_from_purchase = (current_price - purchase_price) / purchase_price * 100
 
     # Check the selling conditions
-    if price_drop_from_previous <= -5 or price_drop_from_highest <= -5 or price_gain_from_purchase >= 25:
+    if is_sell_signal(price_drop_from_previous, price_drop_from_highest, price_gain_from_purchase):
         # Execute sell order if conditions are met
-        amount_to_sell = held_crypto['amount']  # Amount of cryptocurrency to sell
+        amount_to_sell = position.amount  # Amount of cryptocurrency to sell
 
         try:
-            sell_order_data = {
-                'type': 'market',
-                'product_id': product_id,
-                'size': str(amount_to_sell)
-            }
-            endpoint = '/orders'
-            body = json.dumps(sell_order_data)
-            headers = create_request_headers(endpoint, 'POST', body)
-            response = requests.post(API_URL + endpoint, headers=headers, data=body)
-
-            if response.status_code == 200:
-                response_data = response.json()
-                logging.info(f"Successfully executed sell order for {product_id}: Sold {amount_to_sell} units.")
-
-                # Append order details to CSV
-                order_details_df = pd.DataFrame([{
-                    'product_id': product_id,
-                    'amount_sold': amount_to_sell,
-                    'sell_price': current_price,  # Assuming you want to record the sell price
-                    'time': datetime.now(),
-                    # Include other relevant details from response_data if and when needed
-                }])
-                append_to_csv(order_details_df, 'sell_orders.csv')
-
-                # Resetting owned_crypto and held_crypto after successful sell
-                owned_crypto = False
-                held_crypto = None
-                return True
-            else:
-                logging.warning(f"Failed to execute sell order for {product_id}: {response.status_code}, Response: {response.text}")
+            order = order_router.take_sell(product_id, amount_to_sell)
+            ack = order_router.submit(order, tick_at)
+            if ack is None:
+                metrics.inc('orders_total', side='sell', outcome='rejected')
+                logging.warning(f"Failed to execute sell order for {product_id}")
+                # A fresh client_oid for the next attempt
+                order_router.prepare_sell(product_id, amount_to_sell)
                 return False
+
+            # The exchange has the order: stop trading the position now and record the fill when it is confirmed
+            positions.close(product_id)
+            logging.info(f"Sell order for {product_id} accepted: Selling {amount_to_sell} units.")
+            order_router.confirm(order, ack, lambda order, fill: record_sell_fill(order, fill, current_price))
+            return True
         except Exception as e:
             logging.error(f"Error executing sell order for {product_id}: {e}")
             return False
@@ -282,43 +615,156 @@ def check_and_execute_sell_order(product_id, purchase_price, highest_price, prev
         logging.info("Sell conditions not met.")
         return False
 
-def main():
-    global owned_crypto, held_crypto
-    highest_price = 0  # Initialize the highest price
-    previous_price = 0  # Initialize the previous price
-    while True:
-        try:
-            current_time = datetime.now()
-
-            # Check buy conditions only if no cryptocurrency is currently owned
-            if not owned_crypto and current_time.minute == 0 and current_time.second == 0:
-                available_products = get_available_products()
-                for product_id in available_products:
-                    rate_limiter()  # Apply rate limiting here
-                    last_checked_price = fetch_last_checked_price(product_id)  # You need to define this
-                    if check_and_execute_buy(product_id, last_checked_price):
-                        owned_crypto = True
-                        break  # Exit the loop after buying a cryptocurrency
-
-            # Update the highest price and check sell condition for the owned cryptocurrency
-            if owned_crypto and held_crypto:
-                rate_limiter()  # Apply rate limiting here
-                current_data = fetch_current_price_data(held_crypto['product_id'])
-                if not current_data.empty:
-                    current_price = current_data['price']
-                    highest_price = max(highest_price, current_price)
-                    if check_and_execute_sell_order(held_crypto['product_id'], held_crypto['purchase_price'], highest_price, previous_price, held_crypto['time']):
-                        owned_crypto = False
-                        held_crypto = None
-                        highest_price = 0  # Reset the highest price
-                    previous_price = current_price
-
-            time.sleep(1)  # Sleep to avoid too much CPU usage and hitting rate limits
+def buy_sweep_job():
+    # Check buy conditions only while there is room for another position
+    if len(positions) < MAX_POSITIONS and run_buy_sweep():
+        start_sell_checks()
 
-        except Exception as e:
-            logging.error(f"Error in main loop: {e}")
 
-if __name__ == "__main__":
-    main()
+def run_buy_sweep_job():
+    try:
+        buy_sweep_job()
+    except Exception as e:
+        logging.error(f"Error in buy sweep: {e}")
+
+
+def dispatch_buy_sweep():
+    """
+    Hands the buy sweep to the sweep thread and returns at once, so the scheduler thread stays free
+    for sell checks. A sweep still running from the previous hour is left to finish and this run skipped.
+
+    :return: True if a sweep was started
+    """
+    global sweep_future
+    if sweep_future is not None and not sweep_future.done():
+        logging.warning("Previous buy sweep still running; skipping this one")
+        metrics.inc('buy_sweeps_skipped_total')
+        return False
+    sweep_future = sweep_executor.submit(run_buy_sweep_job)
+    return True
+
+
+def subscribe_universe():
+    """
+    Streams every product the buy sweep scans, not only the held ones, so the sweep reads the
+    rolling indicators instead of fetching candles.
+    """
+    if ticker_feed is not None:
+        ticker_feed.subscribe(universe.product_ids())
+
 
+def start_sell_checks():
+    global sell_check_job
+    if ticker_feed is not None:
+        ticker_feed.subscribe(positions.product_ids())
+    # Called from the sweep thread and from fill confirmations, while the scheduler thread may be stopping them
+    with sell_checks_lock:
+        if sell_check_job is None or sell_check_job.cancelled:
+            sell_check_job = scheduler.every(SELL_CHECK_INTERVAL, sell_check_tick, name='sell_check')
 
+
+def stop_sell_checks():
+    """
+    Cancels the sell checks once nothing is held. The check is made under the lock, so a position
+    opened by the sweep thread meanwhile keeps them running.
+    """
+    with sell_checks_lock:
+        if sell_check_job is not None and not positions:
+            scheduler.cancel(sell_check_job)
+
+
+def sell_check_tick():
+    if not positions:
+        stop_sell_checks()
+        return
+
+    # One batched price fetch for every held product, then update and check each position
+    prices = get_current_prices(positions.product_ids())
+    received_at = time.perf_counter()
+    for position in positions:
+        current_price = prices.get(position.product_id)
+        if current_price is None:
+            continue
+        # A streamed tick that triggered this check counts from its arrival, otherwise from the price reply
+        streamed_at = streamed_tick_at.pop(position.product_id, None)
+        # Trades between two checks can reach a higher high than the prices the checks sampled
+        purchased_at = position.time.timestamp() if isinstance(position.time, datetime) else None
+        high = indicators.high_since(position.product_id, purchased_at) if purchased_at is not None else None
+        previous_price = positions.observe(position.product_id, current_price, high)
+        check_and_execute_sell_order(position.product_id, position.purchase_price, position.highest_price,
+                                     previous_price, position.time, current_price,
+                                     streamed_at if streamed_at is not None else received_at)
+        if streamed_at is not None:
+            metrics.observe('tick_to_decision_seconds', time.perf_counter() - streamed_at, source='stream')
+        else:
+            metrics.observe('tick_to_decision_seconds', time.perf_counter() - received_at, source='rest')
+
+    if not positions:
+        stop_sell_checks()
+
+
+def housekeeping_job():
+    price_index.maybe_snapshot()
+    # Off the sell path: sell checks only append to the journal
+    state_journal.maybe_compact()
+    subscribe_universe()  # Picks up products added when the cached universe refreshes
+    if signer.needs_calibration():
+        signer.calibrate(client)
+
+
+def main():
+    global ticker_feed, metrics_server, sharded_scanner
+    log_pipeline.start()
+    # Warm restart: positions and trailing prices as they were before the last stop or crash
+    positions.attach(state_journal)
+    for position in positions:
+        order_router.prepare_sell(position.product_id, position.amount)
+    # One-time import of candles recorded before the SQLite store existed
+    market_store.migrate_csv('historical_data.csv')
+    price_index.load()
+    if METRICS_SERVER_PORT is not None:
+        metrics_server = MetricsServer(metrics, METRICS_SERVER_PORT).start()
+    signer.calibrate(client)
+    if SCAN_PROCESSES:
+        from src.sharded_scan import ShardedScanner
+        sharded_scanner = ShardedScanner(API_URL, (API_KEY, API_SECRET, API_PASSPHRASE), SCAN_PROCESSES,
+                                         metrics=metrics)
+        # The bot's own calls, orders included, draw from the same budget as the workers
+        for bot_client in (client, order_client):
+            bot_client.public_bucket = sharded_scanner.public_bucket
+            bot_client.private_bucket = sharded_scanner.private_bucket
+    if USE_TICKER_FEED:
+        ticker_feed = TickerFeed(WS_URL, on_price=on_streamed_price)
+        ticker_feed.start()
+        subscribe_universe()
+
+    # The process sleeps until the next deadline instead of waking every second
+    scheduler.every(3600, dispatch_buy_sweep, name='buy_sweep', align=True, tolerance=BUY_SWEEP_TOLERANCE)
+    scheduler.every(HOUSEKEEPING_INTERVAL, housekeeping_job, name='housekeeping',
+                    start=time.time() + HOUSEKEEPING_INTERVAL)
+    # Keeps the order connection open so an order never waits for a TCP/TLS handshake
+    scheduler.every(KEEPALIVE_INTERVAL, order_router.keepalive, name='order_keepalive')
+    if positions:
+        start_sell_checks()
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run()
+    finally:
+        # Durable shutdown: nothing queued for disk is lost
+        # A sweep in progress finishes its order, so the fill is recorded before anything closes
+        sweep_executor.shutdown(wait=True, cancel_futures=True)
+        price_executor.shutdown()
+        if sharded_scanner is not None:
+            sharded_scanner.close()
+        # Fill confirmations write order rows, so they stop before the writer does
+        order_router.close()
+        writer.close()
+        price_index.snapshot()
+        state_journal.compact()
+        state_journal.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        log_pipeline.stop()
+
+if __name__ == "__main__":
+    main()
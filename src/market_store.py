@@ -0,0 +1,162 @@
+import logging
+import os
+import sqlite3
+import threading
+
+from src.candle_store import CANDLE_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    product_id TEXT NOT NULL,
+    granularity INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    low REAL,
+    high REAL,
+    open REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (product_id, granularity, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class MarketStore:
+    """
+    SQLite market-data store indexed by (product_id, granularity, time).
+
+    The primary key doubles as the lookup index, so "latest close for X" and "range for X" are
+    single index seeks instead of a scan over every row ever recorded.
+
+    The database is opened on first use, so creating a store touches no files.
+
+    :param path: Database file, or ':memory:'
+    """
+
+    def __init__(self, path='market_data.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connect_lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        # Shared by the scanner threads; every access goes through self.lock
+        if self._conn is None:
+            with self.connect_lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    if self.path != ':memory:':
+                        conn.execute('PRAGMA journal_mode=WAL')
+                        conn.execute('PRAGMA synchronous=NORMAL')
+                    conn.executescript(SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    def upsert_candles(self, product_id, data, granularity=300, marker=None):
+        """
+        Inserts or replaces candles for a product.
+
+        :param product_id: Product id, e.g. 'BTC-USD'
+        :param data: DataFrame with CANDLE_COLUMNS
+        :param granularity: Candle size in seconds
+        :param marker: Optional meta key recorded in the same transaction (e.g. a backfill checkpoint)
+        """
+        empty = data is None or data.empty
+        if empty and marker is None:
+            return
+        rows = [] if empty else [
+            (product_id, granularity, int(row.time), row.low, row.high, row.open, row.close, row.volume)
+            for row in data[CANDLE_COLUMNS].itertuples(index=False)
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            if marker is not None:
+                self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (marker, str(len(rows))))
+
+    def markers(self, prefix):
+        """
+        :return: Set of meta keys starting with prefix
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT key FROM meta WHERE key >= ? AND key < ?',
+                                     (prefix, prefix + '\uffff')).fetchall()
+        return {row[0] for row in rows}
+
+    def latest_close(self, product_id, granularity=300):
+        """
+        :return: Close of the most recent candle for the product, or None if none is stored
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT close FROM candles WHERE product_id = ? AND granularity = ? ORDER BY time DESC LIMIT 1',
+                (product_id, granularity)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_range(self, product_id, start_ts, end_ts, granularity=300):
+        """
+        :return: DataFrame with CANDLE_COLUMNS for start_ts <= time <= end_ts, oldest first
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT time, low, high, open, close, volume FROM candles '
+                'WHERE product_id = ? AND granularity = ? AND time BETWEEN ? AND ? ORDER BY time',
+                (product_id, granularity, int(start_ts), int(end_ts))
+            ).fetchall()
+        import pandas as pd  # Only the DataFrame readers need pandas
+        return pd.DataFrame(rows, columns=CANDLE_COLUMNS)
+
+    def get_recent(self, product_id, limit, granularity=300):
+        """
+        :return: DataFrame with the `limit` most recent candles, oldest first
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT time, low, high, open, close, volume FROM candles '
+                'WHERE product_id = ? AND granularity = ? ORDER BY time DESC LIMIT ?',
+                (product_id, granularity, limit)
+            ).fetchall()
+        import pandas as pd
+        return pd.DataFrame(rows[::-1], columns=CANDLE_COLUMNS)
+
+    def migrate_csv(self, file_name, product_id=None, granularity=300):
+        """
+        One-time import of a legacy candle CSV. Files already imported are skipped.
+
+        Rows are attributed to their own product_id column when the file has one, otherwise to
+        `product_id`. Files with neither are skipped since their rows can't be attributed.
+
+        :return: Number of rows imported
+        """
+        marker = f'migrated:{os.path.abspath(file_name)}'
+        with self.lock:
+            if self.conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+                return 0
+        if not os.path.isfile(file_name):
+            return 0
+
+        import pandas as pd
+        data = pd.read_csv(file_name)
+        if 'product_id' not in data.columns:
+            if product_id is None:
+                logging.warning(f"Skipping migration of {file_name}: rows carry no product_id")
+                return 0
+            data['product_id'] = product_id
+        data = data.dropna(subset=['time'])
+
+        for pid, group in data.groupby('product_id'):
+            self.upsert_candles(pid, group, granularity)
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (marker, str(len(data))))
+        logging.info(f"Migrated {len(data)} rows from {file_name} into {self.path}")
+        return len(data)
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
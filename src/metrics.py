@@ -0,0 +1,222 @@
+import copy
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets in seconds, from a fast cached call up to a timed-out request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Histogram buckets in seconds for a whole-universe sweep: a few hundred products at the public
+# rate limit take minutes
+SWEEP_BUCKETS = (1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Default local port for the /metrics endpoint
+METRICS_PORT = 9108
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of one labelled series.
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, gauges and histograms, rendered in the Prometheus text format.
+
+    Metrics are created on first use; describe() only adds the HELP line.
+    """
+
+    def __init__(self, prefix='bot_'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.types = {}  # name -> 'counter' | 'gauge' | 'histogram'
+        self.help = {}
+        self.series = {}  # name -> {label key: value or Histogram}
+
+    def describe(self, name, help_text):
+        self.help[name] = help_text
+
+    def _series(self, name, kind):
+        known = self.types.setdefault(name, kind)
+        if known != kind:
+            raise ValueError(f"Metric {name} is a {known}, not a {kind}")
+        return self.series.setdefault(name, {})
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            series = self._series(name, 'counter')
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self._series(name, 'gauge')[_label_key(labels)] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        with self.lock:
+            series = self._series(name, 'histogram')
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, buckets=LATENCY_BUCKETS, **labels):
+        """
+        Observes the duration of the with-block in seconds, also when it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, buckets, **labels)
+
+    def get(self, name, **labels):
+        """
+        :return: Counter/gauge value, or (count, sum) for a histogram; None if never recorded
+        """
+        with self.lock:
+            value = self.series.get(name, {}).get(_label_key(labels))
+            if isinstance(value, Histogram):
+                return value.count, value.sum
+            return value
+
+    def snapshot(self):
+        """
+        :return: Picklable copy of every series, for merge() into a registry in another process
+        """
+        with self.lock:
+            return {name: (self.types[name], copy.deepcopy(series)) for name, series in self.series.items()}
+
+    def merge(self, snapshot):
+        """
+        Adds another registry's snapshot() to this one: counters and histograms are summed, gauges
+        take the snapshot's value.
+        """
+        with self.lock:
+            for name, (kind, series) in snapshot.items():
+                target = self._series(name, kind)
+                for key, value in series.items():
+                    if kind == 'counter':
+                        target[key] = target.get(key, 0) + value
+                    elif kind == 'gauge':
+                        target[key] = value
+                    else:
+                        histogram = target.get(key)
+                        if histogram is None:
+                            histogram = target[key] = Histogram(value.buckets)
+                        histogram.counts = [a + b for a, b in zip(histogram.counts, value.counts)]
+                        histogram.sum += value.sum
+                        histogram.count += value.count
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name in sorted(self.series):
+                full_name = self.prefix + name
+                if name in self.help:
+                    lines.append(f'# HELP {full_name} {self.help[name]}')
+                kind = self.types[name]
+                lines.append(f'# TYPE {full_name} {kind}')
+                for key, value in sorted(self.series[name].items()):
+                    if kind != 'histogram':
+                        lines.append(f'{full_name}{_format_labels(key)} {_format_value(value)}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f'{full_name}_bucket{_format_labels(key, [("le", bound)])} {cumulative}')
+                    lines.append(f'{full_name}_bucket{_format_labels(key, [("le", "+Inf")])} {value.count}')
+                    lines.append(f'{full_name}_sum{_format_labels(key)} {_format_value(value.sum)}')
+                    lines.append(f'{full_name}_count{_format_labels(key)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Serves Metrics.render() on GET /metrics from a background thread.
+
+    :param metrics: Metrics registry to expose
+    :param port: Port to listen on (0 picks a free one)
+    :param host: Interface to bind; local only by default
+    """
+
+    def __init__(self, metrics, port=METRICS_PORT, host='127.0.0.1'):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/metrics'
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would otherwise flood the bot's log
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+        logging.info(f"Serving metrics on {self.url}")
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
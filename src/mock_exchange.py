@@ -0,0 +1,248 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+
+from src.exchange_client import TokenBucket
+
+# The exchange caps a candles response at this many bars
+MAX_CANDLES = 300
+
+DEFAULT_PRODUCTS = {'BTC-USD': 45000.0, 'ETH-USD': 3000.0, 'SOL-USD': 100.0, 'DOGE-USD': 0.08}
+# 24h volume in the quote currency reported for products without their own
+DEFAULT_QUOTE_VOLUME = 5000000.0
+
+
+def parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class MockExchange:
+    """
+    Local HTTP stand-in for the exchange REST API, for load-testing the bot offline.
+
+    Serves /products, /products/stats, /products/{id}/candles, /products/{id}/ticker, /time,
+    POST /orders and GET /orders/{id} (or client:{client_oid}) with the payload shapes the bot
+    parses. Prices are a deterministic function of product and time, so two runs with the same
+    settings see the same market.
+
+    :param products: Base price per product id
+    :param trends: Optional drift per product, in percent per hour, e.g. {'SOL-USD': 12} to trigger buys
+    :param volumes: Optional 24h volume in the quote currency per product
+    :param latency: Seconds added to every response, or a (min, max) range
+    :param rate_limit: Requests per second before answering 429 (None disables throttling)
+    :param error_rate: Fraction of requests answered with a random 5xx
+    :param seed: Seed for the error injection
+    """
+
+    def __init__(self, products=None, trends=None, volumes=None, latency=0.0, rate_limit=None, error_rate=0.0, seed=0,
+                 host='127.0.0.1', port=0):
+        self.products = dict(products or DEFAULT_PRODUCTS)
+        self.trends = dict(trends or {})
+        self.volumes = dict(volumes or {})
+        self.latency = latency
+        self.bucket = TokenBucket(rate_limit, rate_limit) if rate_limit else None
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.host = host
+        self.port = port
+        self.started_at = time.time()
+        self.stats = Counter()  # 'requests', 'throttled', 'errors' and one entry per route
+        self.stats_lock = threading.Lock()
+        self.orders = []
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-exchange', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def count(self, *keys):
+        with self.stats_lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def price(self, product_id, at):
+        """
+        Deterministic price of a product at a unix time: base price, a slow wave, per-minute noise and
+        the configured trend (relative to server start).
+        """
+        base = self.products[product_id]
+        wave = 0.02 * math.sin(at / 5400 + len(product_id))
+        noise = random.Random(f'{product_id}:{int(at // 60)}').gauss(0, 0.002)
+        trend = self.trends.get(product_id, 0) / 100 * (at - self.started_at) / 3600
+        return base * (1 + wave + noise) * max(1 + trend, 0.01)
+
+    def candles(self, product_id, start, end, granularity):
+        first = int(start // granularity * granularity)
+        last = int(end // granularity * granularity)
+        rows = []
+        for bucket in range(last, first - 1, -granularity)[:MAX_CANDLES]:  # Newest first, like the exchange
+            open_price = self.price(product_id, bucket)
+            close_price = self.price(product_id, bucket + granularity - 1)
+            rows.append([bucket, min(open_price, close_price) * 0.999, max(open_price, close_price) * 1.001,
+                         open_price, close_price, 10.0])
+        return rows
+
+    def day_stats(self, product_id, now):
+        """
+        24h stats in the /products/stats shape, from hourly price samples.
+        """
+        samples = [self.price(product_id, now - hours * 3600) for hours in range(24, -1, -1)]
+        last = samples[-1]
+        volume = self.volumes.get(product_id, DEFAULT_QUOTE_VOLUME) / last
+        return {'stats_24hour': {'open': f'{samples[0]:.8f}', 'high': f'{max(samples):.8f}',
+                                 'low': f'{min(samples):.8f}', 'last': f'{last:.8f}', 'volume': f'{volume:.8f}'},
+                'stats_30day': {'volume': f'{volume * 30:.8f}'}}
+
+    def _inject_fault(self):
+        if self.latency:
+            low, high = self.latency if isinstance(self.latency, tuple) else (self.latency, self.latency)
+            with self.random_lock:
+                delay = self.random.uniform(low, high)
+            time.sleep(delay)
+        if self.bucket is not None:
+            with self.bucket.lock:
+                self.bucket._refill()
+                if self.bucket.tokens < 1:
+                    self.count('throttled')
+                    return 429, {'message': 'Rate limit exceeded'}
+                self.bucket.tokens -= 1
+        with self.random_lock:
+            failed = self.random.random() < self.error_rate
+            status = self.random.choice((500, 502, 503))
+        if failed:
+            self.count('errors')
+            return status, {'message': 'Injected server error'}
+        return None
+
+    def _route(self, method, path, query, body):
+        parts = path.strip('/').split('/')
+        if method == 'GET' and parts == ['products']:
+            return 200, [{'id': product_id, 'base_currency': product_id.split('-')[0],
+                          'quote_currency': product_id.split('-')[1], 'status': 'online',
+                          'trading_disabled': False} for product_id in self.products]
+        if method == 'GET' and parts == ['products', 'stats']:
+            now = time.time()
+            return 200, {product_id: self.day_stats(product_id, now) for product_id in self.products}
+        if method == 'GET' and parts == ['time']:
+            now = time.time()
+            return 200, {'iso': datetime.fromtimestamp(now, timezone.utc).isoformat(), 'epoch': now}
+        if method == 'GET' and len(parts) == 3 and parts[0] == 'products':
+            product_id = parts[1]
+            if product_id not in self.products:
+                return 404, {'message': 'NotFound'}
+            if parts[2] == 'ticker':
+                now = time.time()
+                return 200, {'price': f'{self.price(product_id, now):.8f}', 'time': now}
+            if parts[2] == 'candles':
+                granularity = int(query.get('granularity', ['300'])[0])
+                end = parse_time(query['end'][0]) if 'end' in query else time.time()
+                start = parse_time(query['start'][0]) if 'start' in query else end - granularity * MAX_CANDLES
+                return 200, self.candles(product_id, start, end, granularity)
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'orders':
+            key = 'client_oid' if parts[1].startswith('client:') else 'id'
+            wanted = parts[1][len('client:'):] if key == 'client_oid' else parts[1]
+            for placed in self.orders:
+                if placed.get(key) == wanted:
+                    return 200, placed
+            return 404, {'message': 'NotFound'}
+        if method == 'POST' and parts == ['orders']:
+            order = json.loads(body or '{}')
+            product_id = order.get('product_id')
+            if product_id not in self.products:
+                return 400, {'message': 'Invalid product_id'}
+            price = self.price(product_id, time.time())
+            if 'size' in order:
+                size = float(order['size'])
+            else:
+                try:
+                    funds = float(order.get('funds'))
+                except (TypeError, ValueError):
+                    funds = 100.0  # The bot still sends a placeholder for funds
+                size = funds / price
+            response = {'id': str(uuid.uuid4()), 'product_id': product_id, 'side': order.get('side', 'buy'),
+                        'type': order.get('type', 'market'), 'status': 'done', 'settled': True,
+                        'filled_size': size, 'executed_value': size * price}
+            if 'client_oid' in order:
+                response['client_oid'] = order['client_oid']
+            self.orders.append(response)
+            return 200, response
+        return 404, {'message': 'NotFound'}
+
+    def _handler_class(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+            def _respond(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                exchange.count('requests', f'{method} {url.path}')
+                status, payload = exchange._inject_fault() or exchange._route(method, url.path, parse_qs(url.query), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock of the exchange REST API.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--rate-limit', type=float, help='Requests per second before answering 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with 5xx')
+    args = parser.parse_args()
+
+    exchange = MockExchange(latency=args.latency, rate_limit=args.rate_limit, error_rate=args.error_rate,
+                            port=args.port).start()
+    print(f"Mock exchange listening on {exchange.url} (set EXCHANGE_API_URL to point the bot at it)")
+    try:
+        exchange.thread.join()
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+if __name__ == "__main__":
+    main()
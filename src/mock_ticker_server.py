@@ -0,0 +1,106 @@
+import asyncio
+import json
+import random
+import threading
+
+import websockets
+
+
+class MockTickerServer:
+    """
+    Local stand-in for the exchange WebSocket feed, for running the streaming mode offline.
+
+    Accepts subscribe messages like the real feed and pushes random-walk ticker messages for the
+    subscribed products every `interval` seconds.
+
+    :param prices: Starting price per product
+    :param interval: Seconds between ticker messages per connection
+    :param volatility: Standard deviation of each step, as a fraction of the price
+    """
+
+    def __init__(self, prices=None, interval=0.05, volatility=0.001, host='127.0.0.1', port=0):
+        self.prices = dict(prices or {'BTC-USD': 45000.0})
+        self.interval = interval
+        self.volatility = volatility
+        self.host = host
+        self.port = port
+        self.connections = set()
+        self.subscribe_count = 0
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._serve, name='mock-ticker-server', daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+    def drop_connections(self):
+        """
+        Closes every client connection, to exercise reconnect handling.
+        """
+        for websocket in list(self.connections):
+            asyncio.run_coroutine_threadsafe(websocket.close(), self.loop)
+
+    def set_price(self, product_id, price):
+        self.prices[product_id] = price
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self._listen())
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+
+    async def _listen(self):
+        return await websockets.serve(self._handler, self.host, self.port)
+
+    async def _handler(self, websocket):
+        self.connections.add(websocket)
+        subscribed = set()
+        sender = asyncio.ensure_future(self._push(websocket, subscribed))
+        try:
+            async for message in websocket:
+                data = json.loads(message)
+                if data.get('type') == 'subscribe':
+                    self.subscribe_count += 1
+                    subscribed.update(data.get('product_ids', []))
+                    await websocket.send(json.dumps({
+                        'type': 'subscriptions',
+                        'channels': [{'name': 'ticker', 'product_ids': sorted(subscribed)}]
+                    }))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.connections.discard(websocket)
+
+    async def _push(self, websocket, subscribed):
+        sequence = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            for product_id in sorted(subscribed):
+                price = self.prices.setdefault(product_id, 100.0)
+                price *= 1 + random.gauss(0, self.volatility)
+                self.prices[product_id] = price
+                sequence += 1
+                await websocket.send(json.dumps({
+                    'type': 'ticker',
+                    'sequence': sequence,
+                    'product_id': product_id,
+                    'price': f'{price:.8f}'
+                }))
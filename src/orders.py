@@ -0,0 +1,316 @@
+import json
+import logging
+import threading
+import time
+import uuid
+
+import requests
+
+# Seconds before an unacknowledged order is looked up by its client_oid
+ORDER_TIMEOUT = 5
+# Submissions of the same order (same client_oid) before giving up
+ORDER_ATTEMPTS = 3
+# After an unknown outcome, lookups by client_oid at 0.5s, 1s and 2s before the order counts as absent;
+# an order still being processed isn't visible right away
+LOOKUP_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+# Fill confirmation polling
+FILL_POLL_INTERVAL = 0.5
+FILL_TIMEOUT = 60
+# Seconds close() waits for confirmation threads to finish
+CLOSE_TIMEOUT = 10
+# Seconds between keep-alive requests on the order connection (well under typical idle timeouts)
+KEEPALIVE_INTERVAL = 20
+
+
+class PreparedOrder:
+    """
+    A market order ready to send: payload serialized once, with its own client_oid.
+    """
+
+    __slots__ = ('product_id', 'side', 'client_oid', 'body', 'created_at')
+
+    def __init__(self, product_id, side, **fields):
+        self.product_id = product_id
+        self.side = side
+        self.client_oid = str(uuid.uuid4())
+        payload = {'type': 'market', 'side': side, 'product_id': product_id, 'client_oid': self.client_oid}
+        payload.update(fields)
+        self.body = json.dumps(payload)
+        self.created_at = time.time()
+
+
+class OrderRouter:
+    """
+    Order submission path kept apart from market-data traffic.
+
+    Orders go out on a dedicated client (its own keep-alive connection, kept warm by keepalive())
+    with a client-generated client_oid. Only order POSTs and the lookups after a failed POST use that
+    connection; fill polls go over status_client, so a poll never holds it when an order is sent. A request that times out or fails with a 5xx is looked up
+    by client_oid, with backoff, and only sent again once the exchange has repeatedly reported it
+    absent; if the lookups themselves fail the order is not resent. A 429 is retried after backing
+    off, since a throttled order was never accepted. Sell orders
+    for held positions are built ahead of time with prepare_sell(). Fills are confirmed on a
+    background thread and handed to a callback.
+
+    :param client: ExchangeClient reserved for orders (no adapter retries, short timeout)
+    :param status_client: ExchangeClient for fill polls; defaults to `client`
+    :param sign: Callable (endpoint, method, body) -> request headers
+    :param metrics: Optional Metrics registry for ack/fill latencies
+    :param attempts: Submissions of the same order before giving up
+    :param lookups: Lookups after an unknown outcome before the order counts as absent
+    :param backoff: First wait in seconds before a lookup or a throttled retry (doubles each time)
+    """
+
+    def __init__(self, client, sign, metrics=None, attempts=ORDER_ATTEMPTS, fill_poll_interval=FILL_POLL_INTERVAL,
+                 fill_timeout=FILL_TIMEOUT, lookups=LOOKUP_ATTEMPTS, backoff=RETRY_BACKOFF, status_client=None):
+        self.client = client
+        self.status_client = status_client or client
+        self.sign = sign
+        self.metrics = metrics
+        self.attempts = attempts
+        self.lookups = lookups
+        self.backoff = backoff
+        self.fill_poll_interval = fill_poll_interval
+        self.fill_timeout = fill_timeout
+        self.prepared = {}  # product_id -> PreparedOrder for selling the held position
+        self.lock = threading.Lock()
+        self.in_flight = threading.Lock()  # Held while an order request is on the order connection
+        self.stopping = threading.Event()
+        self.confirming = {}  # Live confirmation thread -> PreparedOrder
+
+    def prepare(self, product_id, side, **fields):
+        return PreparedOrder(product_id, side, **fields)
+
+    def prepare_sell(self, product_id, size):
+        order = self.prepare(product_id, 'sell', size=str(size))
+        with self.lock:
+            self.prepared[product_id] = order
+        return order
+
+    def take_sell(self, product_id, size):
+        """
+        :return: The pre-built sell order for the product (built now if there is none)
+        """
+        with self.lock:
+            order = self.prepared.pop(product_id, None)
+        if order is None or json.loads(order.body).get('size') != str(size):
+            order = self.prepare(product_id, 'sell', size=str(size))
+        return order
+
+    def discard(self, product_id):
+        with self.lock:
+            self.prepared.pop(product_id, None)
+
+    def _observe(self, name, value, **labels):
+        if self.metrics is not None:
+            self.metrics.observe(name, value, **labels)
+
+    def _inc(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, **labels)
+
+    def lookup(self, order):
+        """
+        :return: The exchange's record of the order, or None if it was never placed
+        """
+        endpoint = f'/orders/client:{order.client_oid}'
+        self._inc('order_lookups_total', side=order.side)
+        with self.in_flight:
+            response = self.client.get(endpoint, headers=self.sign(endpoint, 'GET', ''), private=True,
+                                       name='order_lookup')
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return None
+        raise requests.HTTPError(f"Order lookup failed: {response.status_code}")
+
+    def find_placed(self, order):
+        """
+        Looks the order up after an unknown outcome, waiting with backoff before each lookup.
+
+        :return: (ack, absent): the exchange's record of the order if found, and whether the
+                 exchange reported it absent on the last lookup (so it is safe to resend)
+        """
+        delay = self.backoff
+        absent = False
+        for _ in range(self.lookups):
+            time.sleep(delay)
+            delay *= 2
+            try:
+                ack = self.lookup(order)
+            except Exception as e:
+                logging.error(f"Error looking up order {order.client_oid}: {e}")
+                absent = False
+                continue
+            if ack is not None:
+                return ack, False
+            absent = True
+        return None, absent
+
+    def submit(self, order, tick_at=None):
+        """
+        Sends the order, retrying with the same client_oid only when it is known not to be placed.
+
+        :param order: PreparedOrder
+        :param tick_at: perf_counter() time of the price that triggered the order, for tick-to-ack latency
+        :return: The exchange's order acknowledgement, or None if the order was rejected or never placed
+        """
+        sent_at = time.perf_counter()
+        for attempt in range(self.attempts):
+            if attempt:
+                self._inc('order_retries_total', side=order.side)
+            try:
+                with self.in_flight:
+                    response = self.client.post('/orders', headers=self.sign('/orders', 'POST', order.body),
+                                                data=order.body, name=f'{order.side}_order')
+            except requests.RequestException as e:
+                logging.warning(f"Order {order.client_oid} for {order.product_id} got no answer: {e}")
+                response = None
+            if response is not None and response.status_code == 200:
+                return self._acknowledged(order, response.json(), sent_at, tick_at)
+            if response is not None and response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                wait = float(retry_after) if retry_after else self.backoff * 2 ** attempt
+                logging.warning(f"Order for {order.product_id} throttled; retrying in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+            if response is not None and response.status_code < 500:
+                logging.warning(f"Order for {order.product_id} rejected: {response.status_code}, "
+                                f"Response: {response.text}")
+                return None
+            # Timed out or 5xx: the order may be on the book already, or still being processed
+            ack, absent = self.find_placed(order)
+            if ack is not None:
+                return self._acknowledged(order, ack, sent_at, tick_at)
+            if not absent:
+                logging.error(f"Order {order.client_oid} for {order.product_id} has an unknown outcome; "
+                              f"not resending")
+                return None
+        logging.error(f"Order for {order.product_id} not placed after {self.attempts} attempts")
+        return None
+
+    def _acknowledged(self, order, ack, sent_at, tick_at):
+        acked_at = time.perf_counter()
+        self._observe('order_ack_seconds', acked_at - sent_at, side=order.side)
+        if tick_at is not None:
+            self._observe('tick_to_order_ack_seconds', acked_at - tick_at, side=order.side)
+        return ack
+
+    def fetch_fill(self, ack):
+        """
+        :return: The order once it is done, or None while it is still open
+        """
+        if ack.get('status') == 'done' and ack.get('settled', True):
+            return ack
+        endpoint = f"/orders/{ack['id']}"
+        response = self.status_client.get(endpoint, headers=self.sign(endpoint, 'GET', ''), private=True,
+                                          name='order_status')
+        if response.status_code == 200:
+            order = response.json()
+            if order.get('status') == 'done':
+                return order
+        return None
+
+    def wait_for_fill(self, order, ack):
+        """
+        Blocks until the order is done.
+
+        :return: The filled order, or None if it did not complete within fill_timeout (or close() was called)
+        """
+        deadline = time.monotonic() + self.fill_timeout
+        started = time.perf_counter()
+        while True:
+            try:
+                fill = self.fetch_fill(ack)
+            except Exception as e:
+                logging.error(f"Error confirming order {order.client_oid}: {e}")
+                fill = None
+            if fill is not None:
+                self._observe('order_fill_seconds', time.perf_counter() - started, side=order.side)
+                return fill
+            if time.monotonic() >= deadline:
+                logging.error(f"Order {order.client_oid} for {order.product_id} not filled within {self.fill_timeout}s")
+                return None
+            if self.stopping.wait(self.fill_poll_interval):
+                return None
+
+    def confirm(self, order, ack, on_fill):
+        """
+        Confirms the fill without blocking the caller; on_fill(order, fill) runs once it is done.
+        An accepted order is polled until it completes, however long that takes.
+        """
+        fill = ack if ack.get('status') == 'done' and ack.get('settled', True) else None
+        if fill is not None:
+            on_fill(order, fill)
+            return
+
+        def run():
+            try:
+                while not self.stopping.is_set():
+                    fill = self.wait_for_fill(order, ack)
+                    if fill is not None:
+                        try:
+                            on_fill(order, fill)
+                        except Exception as e:
+                            logging.error(f"Error recording the fill of order {order.client_oid}: {e}")
+                        return
+                    if not self.stopping.is_set():
+                        logging.warning(f"Still waiting for order {order.client_oid} for {order.product_id} to fill")
+                logging.warning(f"Stopped before order {order.client_oid} for {order.product_id} was confirmed")
+            finally:
+                with self.lock:
+                    self.confirming.pop(threading.current_thread(), None)
+        thread = threading.Thread(target=run, name=f'confirm-{order.client_oid[:8]}', daemon=True)
+        with self.lock:
+            self.confirming[thread] = order
+        thread.start()
+
+    def unconfirmed(self):
+        """
+        :return: Orders whose fill is still being confirmed in the background
+        """
+        with self.lock:
+            return list(self.confirming.values())
+
+    def join(self, timeout=None):
+        """
+        Waits for the background confirmations to finish, without stopping them.
+
+        :return: True if none is left
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            threads = list(self.confirming)
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not self.unconfirmed()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """
+        Stops polling for fills and waits for the confirmation threads, so none of them records a
+        fill after shutdown has moved on (e.g. after the writer has been closed).
+        """
+        self.stopping.set()
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            threads = list(self.confirming)
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logging.error(f"Order confirmation thread {thread.name} did not stop within {timeout}s")
+        self.client.close()
+
+    def keepalive(self):
+        """
+        Cheap request on the order connection so the next order skips the TCP/TLS handshake. Skipped
+        while an order request is using the connection, which keeps it warm anyway.
+        """
+        if not self.in_flight.acquire(blocking=False):
+            return
+        try:
+            self.client.get('/time', name='order_keepalive')
+        except Exception as e:
+            logging.warning(f"Order connection keep-alive failed: {e}")
+        finally:
+            self.in_flight.release()
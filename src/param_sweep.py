@@ -0,0 +1,190 @@
+import argparse
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import Market, buy_changes, forward_fill, load_candles, prepare_market, simulate
+from src.rules import DEFAULT_THRESHOLDS, Thresholds
+
+# Values tried per threshold by default: 5 x 5 x 4 x 4 x 4 x 5 = 8000 combinations
+DEFAULT_GRID = {
+    'buy_change_2h': (6, 8, 10, 12, 15),
+    'buy_change_1h': (6, 8, 10, 12, 15),
+    'buy_change_since_last': (3, 5, 7, 10),
+    'sell_drop_from_previous': (-3, -5, -7, -10),
+    'sell_drop_from_highest': (-3, -5, -7, -10),
+    'sell_gain_from_purchase': (10, 15, 20, 25, 35),
+}
+# Combinations per worker task; large enough that pickling results doesn't dominate
+CHUNK_SIZE = 64
+# Arrays written once by the parent and memory-mapped read-only by every worker
+SHARED_ARRAYS = ('times', 'opens', 'closes', 'filled_closes', 'change_2h', 'change_1h', 'change_since_last')
+
+RESULT_COLUMNS = list(Thresholds._fields) + ['trades', 'total_return', 'max_drawdown', 'win_rate']
+
+# Per-process state set by _init_worker
+_market = None
+_changes = None
+_closes = None
+_simulate_kwargs = None
+
+
+def grid_thresholds(grid=DEFAULT_GRID):
+    """
+    :param grid: {threshold field: values}; fields left out keep their DEFAULT_THRESHOLDS value
+    :return: Every combination, as Thresholds
+    """
+    values = [grid.get(field, (getattr(DEFAULT_THRESHOLDS, field),)) for field in Thresholds._fields]
+    return [Thresholds(*combination) for combination in itertools.product(*values)]
+
+
+def sample_thresholds(grid, count, seed=0):
+    """
+    Draws `count` distinct combinations from the grid without building all of it.
+    """
+    values = [grid.get(field, (getattr(DEFAULT_THRESHOLDS, field),)) for field in Thresholds._fields]
+    total = math.prod(len(options) for options in values)
+    samples = []
+    for index in random.Random(seed).sample(range(total), min(count, total)):
+        combination = []
+        for options in reversed(values):
+            index, position = divmod(index, len(options))
+            combination.append(options[position])
+        samples.append(Thresholds(*reversed(combination)))
+    return samples
+
+
+def share_market(market, directory, sweep_interval=3600):
+    """
+    Writes the market and the threshold-independent arrays every run needs to .npy files.
+    """
+    arrays = dict(zip(('change_2h', 'change_1h', 'change_since_last'), buy_changes(market, sweep_interval)))
+    arrays.update(times=market.times, opens=market.opens, closes=market.closes,
+                  filled_closes=forward_fill(market.closes))
+    for name in SHARED_ARRAYS:
+        np.save(os.path.join(directory, f'{name}.npy'), arrays[name])
+
+
+def _init_worker(directory, product_ids, granularity, simulate_kwargs):
+    global _market, _changes, _closes, _simulate_kwargs
+    # Plain ndarray views of the mappings: same shared pages, without np.memmap's per-operation overhead
+    arrays = {name: np.asarray(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r'))
+              for name in SHARED_ARRAYS}
+    _market = Market(product_ids, arrays['times'], arrays['opens'], arrays['closes'], granularity)
+    _changes = (arrays['change_2h'], arrays['change_1h'], arrays['change_since_last'])
+    _closes = arrays['filled_closes']
+    _simulate_kwargs = simulate_kwargs
+
+
+def evaluate_chunk(chunk):
+    """
+    Runs the backtest for each Thresholds in the chunk on the worker's shared market.
+
+    :return: Result rows, one per combination (see RESULT_COLUMNS)
+    """
+    rows = []
+    for thresholds in chunk:
+        result = simulate(_market, thresholds, changes=_changes, closes=_closes, **_simulate_kwargs)
+        trades = len(result.trades)
+        win_rate = float((result.trades['pnl'] > 0).mean() * 100) if trades else 0.0
+        rows.append(tuple(thresholds) + (trades, result.total_return, result.max_drawdown, win_rate))
+    return rows
+
+
+def sweep(market, combinations, processes=None, start_method='spawn', chunk_size=CHUNK_SIZE, **simulate_kwargs):
+    """
+    Backtests every threshold combination on a process pool. The candle arrays are written once to
+    a temporary directory and memory-mapped read-only by the workers, so they share the page cache
+    instead of each receiving a copy.
+
+    :param market: Market from prepare_market()
+    :param combinations: Thresholds to evaluate
+    :param processes: Worker processes (None for one per core, 0 to run in this process)
+    :param start_method: multiprocessing start method
+    :param chunk_size: Combinations per worker task
+    :param simulate_kwargs: funds, fee, slippage, sweep_interval for simulate()
+    :return: DataFrame of RESULT_COLUMNS, best total return first (smaller drawdown breaks ties)
+    """
+    started = time.monotonic()
+    chunks = [combinations[i:i + chunk_size] for i in range(0, len(combinations), chunk_size)]
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='param-sweep-') as directory:
+        share_market(market, directory, simulate_kwargs.get('sweep_interval', 3600))
+        initargs = (directory, list(market.product_ids), market.granularity, simulate_kwargs)
+        if processes == 0:
+            _init_worker(*initargs)
+            results = map(evaluate_chunk, chunks)
+            pool = None
+        else:
+            pool = multiprocessing.get_context(start_method).Pool(processes, initializer=_init_worker,
+                                                                  initargs=initargs)
+            results = pool.imap_unordered(evaluate_chunk, chunks)
+        try:
+            for i, chunk_rows in enumerate(results, 1):
+                rows.extend(chunk_rows)
+                if i % 20 == 0:
+                    logging.info(f"Parameter sweep progress: {len(rows)}/{len(combinations)} combinations")
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    ranked = pd.DataFrame(rows, columns=RESULT_COLUMNS).sort_values(
+        ['total_return', 'max_drawdown'], ascending=[False, False], kind='stable').reset_index(drop=True)
+    logging.info(f"Evaluated {len(ranked)} threshold combinations on {len(market.product_ids)} products x "
+                 f"{len(market.times)} bars in {time.monotonic() - started:.1f}s")
+    return ranked
+
+
+def parse_grid(specs):
+    """
+    :param specs: ['buy_change_2h=8,10,12', ...]
+    :return: DEFAULT_GRID with those fields replaced
+    """
+    grid = dict(DEFAULT_GRID)
+    for spec in specs:
+        field, _, values = spec.partition('=')
+        if field not in Thresholds._fields or not values:
+            raise ValueError(f"Bad --grid value {spec!r}; expected one of {', '.join(Thresholds._fields)}=v1,v2,...")
+        grid[field] = tuple(float(value) for value in values.split(','))
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest many buy/sell threshold combinations in parallel.')
+    parser.add_argument('path', help='Candle CSV (e.g. historical_data.csv) or market_data.db')
+    parser.add_argument('--product-id', help='Product for CSVs without a product_id column')
+    parser.add_argument('--granularity', type=int, default=300)
+    parser.add_argument('--grid', action='append', default=[], metavar='FIELD=V1,V2,...',
+                        help='Values to try for one threshold (repeatable); others use the default grid')
+    parser.add_argument('--samples', type=int, help='Evaluate this many random combinations instead of the full grid')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, help='Worker processes (default: one per core)')
+    parser.add_argument('--funds', type=float, default=1000.0)
+    parser.add_argument('--fee', type=float, default=0.005)
+    parser.add_argument('--slippage', type=float, default=0.001)
+    parser.add_argument('--top', type=int, default=20, help='Rows of the ranking to print')
+    parser.add_argument('--output', default='param_sweep.csv', help='Where to write the full ranking')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    grid = parse_grid(args.grid)
+    combinations = sample_thresholds(grid, args.samples, args.seed) if args.samples else grid_thresholds(grid)
+    market = prepare_market(load_candles(args.path, args.product_id, args.granularity), args.granularity)
+    ranked = sweep(market, combinations, args.processes, funds=args.funds, fee=args.fee, slippage=args.slippage)
+    ranked.to_csv(args.output, index=False)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(ranked.head(args.top).to_string(index=False, float_format=lambda value: f'{value:.2f}'))
+    print(f"{len(ranked)} combinations ranked; full table in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
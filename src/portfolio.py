@@ -0,0 +1,111 @@
+from datetime import datetime
+
+
+class Position:
+    """
+    One open position and its trailing prices.
+    """
+
+    __slots__ = ('product_id', 'purchase_price', 'amount', 'time', 'highest_price', 'previous_price')
+
+    def __init__(self, product_id, purchase_price, amount, time, highest_price=0.0, previous_price=0.0):
+        self.product_id = product_id
+        self.purchase_price = purchase_price
+        self.amount = amount
+        self.time = time
+        self.highest_price = highest_price
+        self.previous_price = previous_price
+
+    def observe(self, price, high=None):
+        """
+        Records a new price in O(1).
+
+        :param high: Highest price traded since the last observation, if known (e.g. from streamed ticks)
+        :return: The previous price (the new price itself on the first tick after the buy)
+        """
+        previous = self.previous_price or price
+        if price > self.highest_price:
+            self.highest_price = price
+        if high is not None and high > self.highest_price:
+            self.highest_price = high
+        self.previous_price = price
+        return previous
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PositionBook:
+    """
+    Open positions keyed by product id.
+
+    With a StateJournal attached, every open, close and trailing-price change is journaled so the
+    book can be restored exactly after a restart.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.journal = None
+
+    def attach(self, journal):
+        """
+        Restores the positions recorded in the journal and journals every change from now on.
+
+        :return: Number of positions restored
+        """
+        restored = journal.restore()
+        for product_id, state in restored.items():
+            opened_at = state['time']
+            try:
+                opened_at = datetime.fromisoformat(opened_at)
+            except (TypeError, ValueError):
+                pass
+            self.positions[product_id] = Position(product_id, state['purchase_price'], state['amount'], opened_at,
+                                                  state['highest_price'], state['previous_price'])
+        self.journal = journal
+        return len(restored)
+
+    def open(self, product_id, purchase_price, amount, time):
+        position = Position(product_id, purchase_price, amount, time)
+        self.positions[product_id] = position
+        if self.journal is not None:
+            state = position.as_dict()
+            state['time'] = time.isoformat() if isinstance(time, datetime) else time
+            del state['product_id']
+            self.journal.append('open', product_id, durable=True, **state)
+        return position
+
+    def observe(self, product_id, price, high=None):
+        """
+        Records a new price for a held product (see Position.observe) and journals the change.
+
+        :return: The previous price
+        """
+        position = self.positions[product_id]
+        highest, previous = position.highest_price, position.previous_price
+        result = position.observe(price, high)
+        if self.journal is not None and (position.highest_price, position.previous_price) != (highest, previous):
+            self.journal.append('observe', product_id, highest_price=position.highest_price,
+                                previous_price=position.previous_price)
+        return result
+
+    def close(self, product_id):
+        position = self.positions.pop(product_id, None)
+        if position is not None and self.journal is not None:
+            self.journal.append('close', product_id, durable=True)
+        return position
+
+    def get(self, product_id):
+        return self.positions.get(product_id)
+
+    def product_ids(self):
+        return list(self.positions)
+
+    def __contains__(self, product_id):
+        return product_id in self.positions
+
+    def __iter__(self):
+        return iter(list(self.positions.values()))
+
+    def __len__(self):
+        return len(self.positions)
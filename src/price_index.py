@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import threading
+import time
+
+# Seconds between snapshots written by maybe_snapshot()
+SNAPSHOT_INTERVAL = 60
+
+
+class LastPriceIndex:
+    """
+    In-memory last-seen price per product, snapshotted to disk at intervals.
+
+    Lookups are a dict access; the snapshot only exists so a restart keeps the
+    "since last check" baseline.
+
+    :param path: Snapshot file (JSON)
+    :param snapshot_interval: Minimum seconds between snapshots in maybe_snapshot()
+    """
+
+    def __init__(self, path='last_prices.json', snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.prices = {}  # product_id -> (price, unix time seen)
+        self.lock = threading.Lock()
+        self.last_snapshot = time.monotonic()
+        self.dirty = False
+
+    def update(self, product_id, price, seen_at=None):
+        if price is None:
+            return
+        seen_at = seen_at if seen_at is not None else time.time()
+        with self.lock:
+            entry = self.prices.get(product_id)
+            # A late-arriving older observation (e.g. a candle close) must not overwrite a newer tick
+            if entry is None or seen_at >= entry[1]:
+                self.prices[product_id] = (float(price), seen_at)
+                self.dirty = True
+
+    def get(self, product_id, default=None):
+        entry = self.prices.get(product_id)
+        return entry[0] if entry else default
+
+    def load(self):
+        """
+        Loads the snapshot if one exists.
+
+        :return: Number of products loaded
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            with self.lock:
+                self.prices = {product_id: (float(price), float(seen_at)) for product_id, (price, seen_at) in data.items()}
+                self.dirty = False
+            logging.info(f"Loaded {len(self.prices)} last prices from {self.path}")
+            return len(self.prices)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logging.error(f"Error loading last price snapshot: {e}")
+            return 0
+
+    def snapshot(self):
+        """
+        Writes the index to disk atomically (temp file + rename).
+        """
+        try:
+            with self.lock:
+                data = dict(self.prices)
+                self.dirty = False
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self.last_snapshot = time.monotonic()
+        except Exception as e:
+            logging.error(f"Error writing last price snapshot: {e}")
+
+    def maybe_snapshot(self):
+        if self.dirty and time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+            self.snapshot()
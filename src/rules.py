@@ -0,0 +1,45 @@
+from collections import namedtuple
+
+# Buy when any change (in percent) reaches its threshold; sell when any drop/gain crosses its threshold
+Thresholds = namedtuple('Thresholds', [
+    'buy_change_2h',
+    'buy_change_1h',
+    'buy_change_since_last',
+    'sell_drop_from_previous',
+    'sell_drop_from_highest',
+    'sell_gain_from_purchase'
+])
+
+DEFAULT_THRESHOLDS = Thresholds(
+    buy_change_2h=10,
+    buy_change_1h=10,
+    buy_change_since_last=5,
+    sell_drop_from_previous=-5,
+    sell_drop_from_highest=-5,
+    sell_gain_from_purchase=25
+)
+
+
+def percent_change(new, old):
+    """
+    Percent change from old to new. Works element-wise on NumPy arrays.
+    """
+    return (new - old) / old * 100
+
+
+def is_buy_signal(change_2h, change_1h, change_since_last, thresholds=DEFAULT_THRESHOLDS):
+    """
+    True if any buy condition is met. Works on scalars or NumPy arrays; NaN never triggers.
+    """
+    return ((change_2h >= thresholds.buy_change_2h) |
+            (change_1h >= thresholds.buy_change_1h) |
+            (change_since_last >= thresholds.buy_change_since_last))
+
+
+def is_sell_signal(drop_from_previous, drop_from_highest, gain_from_purchase, thresholds=DEFAULT_THRESHOLDS):
+    """
+    True if any sell condition is met. Works on scalars or NumPy arrays; NaN never triggers.
+    """
+    return ((drop_from_previous <= thresholds.sell_drop_from_previous) |
+            (drop_from_highest <= thresholds.sell_drop_from_highest) |
+            (gain_from_purchase >= thresholds.sell_gain_from_purchase))
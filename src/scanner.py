@@ -0,0 +1,31 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Enough workers to keep the public request budget busy; the client's token bucket does the throttling
+SCAN_WORKERS = 8
+
+
+def scan_products(product_ids, evaluate, max_workers=SCAN_WORKERS):
+    """
+    Evaluates products concurrently on a bounded thread pool.
+
+    :param product_ids: Products to evaluate
+    :param evaluate: Callable taking a product id and returning its result
+    :param max_workers: Maximum number of concurrent evaluations
+    :return: ([(product_id, result), ...] in the order of product_ids, elapsed seconds)
+    """
+    def safe_evaluate(product_id):
+        try:
+            return evaluate(product_id)
+        except Exception as e:
+            logging.error(f"Error scanning {product_id}: {e}")
+            return None
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # map() yields results in input order regardless of completion order
+        results = list(zip(product_ids, pool.map(safe_evaluate, product_ids)))
+    elapsed = time.monotonic() - start
+    logging.info(f"Scanned {len(results)} products in {elapsed:.2f}s with {max_workers} workers")
+    return results, elapsed
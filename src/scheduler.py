@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class Job:
+    """
+    A recurring task run by the Scheduler.
+
+    :param name: Name used in logs
+    :param function: Callable run at each deadline
+    :param interval: Seconds between deadlines
+    :param tolerance: Lateness in seconds after which a run counts as a missed deadline
+    """
+
+    def __init__(self, name, function, interval, tolerance):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.tolerance = tolerance
+        self.deadline = None
+        self.runs = 0
+        self.missed = 0
+        self.max_lateness = 0.0
+        self.cancelled = False
+
+
+class Scheduler:
+    """
+    Timer-heap scheduler. The thread calling run() sleeps until the earliest deadline and is woken
+    early only by stop(), trigger() or a newly added job.
+
+    A run that starts more than the job's tolerance after its deadline is logged as a missed deadline.
+    When a job overruns past later deadlines, those slots are skipped (and counted as missed) instead
+    of being run back to back.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()  # Tie-breaker so jobs with equal deadlines never get compared
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+
+    def every(self, interval, function, name=None, align=False, tolerance=1.0, start=None):
+        """
+        Schedules a recurring job.
+
+        :param interval: Seconds between runs
+        :param function: Callable to run
+        :param name: Name used in logs
+        :param align: Put deadlines on local wall-clock multiples of interval (e.g. the top of the hour)
+        :param tolerance: Lateness in seconds that still counts as on time
+        :param start: First deadline (unix time); defaults to now, or the next aligned time
+        :return: The Job, for cancel() and trigger()
+        """
+        job = Job(name or getattr(function, '__name__', 'job'), function, interval, tolerance)
+        now = time.time()
+        if start is not None:
+            deadline = start
+        elif align:
+            utc_offset = time.localtime(now).tm_gmtoff
+            deadline = ((now + utc_offset) // interval + 1) * interval - utc_offset
+        else:
+            deadline = now
+        self._push(job, deadline)
+        return job
+
+    def cancel(self, job):
+        job.cancelled = True
+
+    def trigger(self, job):
+        """
+        Runs the job as soon as possible instead of at its next deadline.
+        """
+        if not job.cancelled:
+            self._push(job, time.time())
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+
+    def _push(self, job, deadline):
+        with self.lock:
+            job.deadline = deadline
+            heapq.heappush(self.heap, (deadline, next(self.counter), job))
+        self.wakeup.set()
+
+    def _pop_due(self):
+        """
+        :return: (job, deadline) of the next due job, or (None, seconds to wait)
+        """
+        with self.lock:
+            while self.heap:
+                deadline, _, job = self.heap[0]
+                if job.cancelled or deadline != job.deadline:
+                    heapq.heappop(self.heap)  # Cancelled or superseded by trigger()
+                    continue
+                wait = deadline - time.time()
+                if wait > 0:
+                    return None, wait
+                heapq.heappop(self.heap)
+                return job, deadline
+        return None, None
+
+    def run_pending(self):
+        """
+        Runs every job that is due.
+
+        :return: Seconds until the next deadline, or None if nothing is scheduled
+        """
+        while True:
+            job, deadline = self._pop_due()
+            if job is None:
+                return deadline
+            self._run(job, deadline)
+
+    def run(self):
+        """
+        Runs jobs until stop() is called.
+        """
+        while not self.stopping:
+            wait = self.run_pending()
+            self.wakeup.clear()
+            if self.stopping:
+                break
+            if self.heap and self.heap[0][0] <= time.time():
+                continue  # Pushed between run_pending() and clear()
+            self.wakeup.wait(wait)
+
+    def _run(self, job, deadline):
+        started = time.time()
+        lateness = started - deadline
+        job.max_lateness = max(job.max_lateness, lateness)
+        if lateness > job.tolerance:
+            job.missed += 1
+            logging.warning(f"Job {job.name} missed its deadline by {lateness:.2f}s")
+        try:
+            job.function()
+        except Exception as e:
+            logging.error(f"Error in job {job.name}: {e}")
+        job.runs += 1
+
+        if job.cancelled or job.deadline != deadline:
+            return  # Cancelled or re-triggered while running
+        next_deadline = deadline + job.interval
+        now = time.time()
+        if next_deadline <= now:
+            skipped = int((now - next_deadline) // job.interval) + 1
+            job.missed += skipped
+            next_deadline += skipped * job.interval
+            logging.warning(f"Job {job.name} overran; skipped {skipped} run(s)")
+        self._push(job, next_deadline)
@@ -0,0 +1,188 @@
+import logging
+import multiprocessing
+import time
+
+import pandas as pd
+
+from src.candle_store import CANDLE_COLUMNS
+from src.exchange_client import ExchangeClient, PUBLIC_RATE, PUBLIC_BURST, PRIVATE_RATE, PRIVATE_BURST
+from src.metrics import Metrics
+from src.rules import DEFAULT_THRESHOLDS
+from src.scanner import scan_products
+from src.signals import evaluate_universe
+from src.signer import RequestSigner
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in shared memory, so every process holding it draws from one budget.
+    Same interface as TokenBucket; pass it to child processes when they are created.
+
+    :param rate: Tokens added per second
+    :param capacity: Maximum number of tokens the bucket can hold (the burst size)
+    :param context: multiprocessing context the shared memory is created with
+    """
+
+    def __init__(self, rate, capacity, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        # [tokens, last refill]; CLOCK_MONOTONIC is system-wide, so processes agree on it
+        self.state = context.Array('d', [float(capacity), time.monotonic()])
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` are available, then spends them.
+
+        :param tokens: Number of tokens to spend
+        :return: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.state.get_lock():
+                now = time.monotonic()
+                available = min(self.capacity, self.state[0] + (now - self.state[1]) * self.rate)
+                self.state[1] = now
+                if available >= tokens:
+                    self.state[0] = available - tokens
+                    return waited
+                self.state[0] = available
+                wait = (tokens - available) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# Per-process exchange client and signer, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(api_url, credentials, public_bucket, private_bucket):
+    _worker['client'] = ExchangeClient(api_url, public_bucket=public_bucket, private_bucket=private_bucket)
+    _worker['signer'] = RequestSigner(*credentials)
+
+
+def _get_json(endpoint, params=None, name=None):
+    try:
+        headers = _worker['signer'].sign(endpoint, 'GET')
+    except Exception as e:
+        logging.error(f"Error creating request headers: {e}")
+        headers = None
+    response = _worker['client'].get(endpoint, headers=headers, params=params, name=name)
+    if response.status_code != 200:
+        logging.warning(f"Failed to fetch {endpoint}: {response.status_code}")
+        return None
+    return response.json()
+
+
+def _fetch_product(product_id, start_time, end_time, granularity):
+    rows = _get_json(f'/products/{product_id}/candles', {
+        'start': start_time.isoformat(),
+        'end': end_time.isoformat(),
+        'granularity': granularity
+    }, name='fetch_historical_data')
+    ticker = _get_json(f'/products/{product_id}/ticker', name='fetch_current_price_data')
+    return rows or [], float(ticker['price']) if ticker else None
+
+
+def scan_shard(product_ids, last_prices, start_time, end_time, granularity, thresholds, clock_offset):
+    """
+    Runs in a worker process: fetches the 2h window and current price of every product in the shard
+    and evaluates the buy conditions for them.
+
+    :return: (candidates, {product_id: (candle rows, current price)}, Metrics.snapshot() of the shard's requests)
+    """
+    _worker['signer'].offset = clock_offset
+    # Fresh per shard, so the parent can add the snapshot without counting a request twice
+    metrics = _worker['client'].metrics = Metrics()
+    results, elapsed = scan_products(
+        product_ids, lambda product_id: _fetch_product(product_id, start_time, end_time, granularity))
+    observed = {product_id: result for product_id, result in results if result is not None}
+    candidates = evaluate_universe(
+        {product_id: pd.DataFrame(rows, columns=CANDLE_COLUMNS) for product_id, (rows, _) in observed.items()},
+        {product_id: price for product_id, (_, price) in observed.items()},
+        last_prices,
+        end_time.timestamp(),
+        granularity,
+        thresholds
+    )
+    return candidates, observed, metrics.snapshot()
+
+
+class ShardedScanner:
+    """
+    Splits the buy sweep across worker processes. Workers share one public and one private
+    rate-limit bucket in shared memory, so together they stay within the exchange limits; give the
+    parent's ExchangeClient the same buckets to include its own calls in the budget.
+
+    The pool is started on first use and reused across sweeps. Each shard's request metrics are sent
+    back with its results and added to the parent's registry. Workers fetch the full 2h window of
+    every product: the parent's CandleStore cache stays in the parent, which records the candles the
+    workers saw after each scan.
+
+    :param api_url: Exchange REST URL
+    :param credentials: (api_key, api_secret, passphrase) for signing in the workers
+    :param processes: Number of worker processes
+    :param start_method: multiprocessing start method; 'spawn' keeps the parent's threads and
+                         sockets out of the workers
+    :param metrics: Optional Metrics registry the workers' request metrics are added to
+    """
+
+    def __init__(self, api_url, credentials, processes=None, start_method='spawn', metrics=None):
+        self.api_url = api_url
+        self.credentials = credentials
+        self.metrics = metrics
+        self.processes = processes or multiprocessing.cpu_count()
+        self.context = multiprocessing.get_context(start_method)
+        self.public_bucket = SharedTokenBucket(PUBLIC_RATE, PUBLIC_BURST, self.context)
+        self.private_bucket = SharedTokenBucket(PRIVATE_RATE, PRIVATE_BURST, self.context)
+        self.pool = None
+
+    def _pool(self):
+        if self.pool is None:
+            self.pool = self.context.Pool(
+                self.processes, initializer=_init_worker,
+                initargs=(self.api_url, self.credentials, self.public_bucket, self.private_bucket))
+        return self.pool
+
+    def scan(self, product_ids, last_prices, start_time, end_time, granularity=300,
+             thresholds=DEFAULT_THRESHOLDS, clock_offset=0.0):
+        """
+        :param product_ids: Products to scan
+        :param last_prices: {product_id: last checked price}
+        :param start_time: Window start (datetime)
+        :param end_time: Window end (datetime)
+        :param clock_offset: Exchange clock offset for request timestamps
+        :return: (candidates from every shard strongest first, {product_id: (candle rows, current price)},
+                  elapsed seconds)
+        """
+        start = time.monotonic()
+        # Round-robin keeps shards the same size whatever the order of the product list
+        shards = [product_ids[i::self.processes] for i in range(self.processes)]
+        pending = [
+            self._pool().apply_async(scan_shard, (
+                shard, {product_id: last_prices.get(product_id) for product_id in shard},
+                start_time, end_time, granularity, thresholds, clock_offset))
+            for shard in shards if shard
+        ]
+        candidates = []
+        observed = {}
+        for result in pending:
+            try:
+                shard_candidates, shard_observed, shard_metrics = result.get()
+            except Exception as e:
+                logging.error(f"Error in scan shard: {e}")
+                continue
+            if self.metrics is not None:
+                self.metrics.merge(shard_metrics)
+            candidates.extend(shard_candidates)
+            observed.update(shard_observed)
+        candidates.sort(key=lambda candidate: -candidate.score)
+        elapsed = time.monotonic() - start
+        logging.info(f"Scanned {len(observed)} products in {elapsed:.2f}s across {len(pending)} processes")
+        return candidates, observed, elapsed
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+import numpy as np
+
+from src.rules import DEFAULT_THRESHOLDS, percent_change, is_buy_signal
+
+Candidate = namedtuple('Candidate', ['product_id', 'score', 'change_2h', 'change_1h', 'change_since_last'])
+
+
+def build_universe_arrays(windows, end_ts, granularity=300, window_seconds=7200):
+    """
+    Lays out the candles of every product on a shared time grid.
+
+    :param windows: {product_id: candle DataFrame} (any order of rows)
+    :param end_ts: Unix time the window ends at
+    :param granularity: Candle size in seconds
+    :param window_seconds: Window length in seconds
+    :return: (product_ids, bucket times, opens, closes); opens/closes are (products, buckets) arrays with NaN gaps
+    """
+    n_buckets = window_seconds // granularity + 1
+    first_bucket = int(end_ts - window_seconds) // granularity * granularity
+    times = first_bucket + granularity * np.arange(n_buckets)
+    product_ids = list(windows)
+    opens = np.full((len(product_ids), n_buckets), np.nan)
+    closes = np.full((len(product_ids), n_buckets), np.nan)
+
+    for row, product_id in enumerate(product_ids):
+        data = windows[product_id]
+        if data is None or data.empty:
+            continue
+        columns = (data['time'].to_numpy(dtype=np.int64) - first_bucket) // granularity
+        inside = (columns >= 0) & (columns < n_buckets)
+        opens[row, columns[inside]] = data['open'].to_numpy(dtype=float)[inside]
+        closes[row, columns[inside]] = data['close'].to_numpy(dtype=float)[inside]
+
+    return product_ids, times, opens, closes
+
+
+def first_valid(values):
+    """
+    First non-NaN value of each row (NaN for all-NaN rows).
+    """
+    valid = ~np.isnan(values)
+    index = valid.argmax(axis=1)
+    return np.where(valid.any(axis=1), values[np.arange(len(values)), index], np.nan)
+
+
+def last_valid(values):
+    """
+    Last non-NaN value of each row (NaN for all-NaN rows).
+    """
+    return first_valid(values[:, ::-1])
+
+
+def evaluate_universe(windows, current_prices, last_prices, end_ts, granularity=300,
+                      thresholds=DEFAULT_THRESHOLDS, changes=None):
+    """
+    Evaluates the 2h, 1h and since-last-check buy conditions for every product in one vectorized pass.
+
+    :param windows: {product_id: 2h candle DataFrame}
+    :param current_prices: {product_id: current price or None}
+    :param last_prices: {product_id: last checked price or None}
+    :param end_ts: Unix time the windows end at
+    :param granularity: Candle size in seconds
+    :param thresholds: Buy thresholds to apply
+    :param changes: Optional {product_id: (change_2h, change_1h)} already known (e.g. from streaming
+                    indicators); these products need no window
+    :return: Candidates meeting any buy condition, strongest first
+    """
+    product_ids, times, opens, closes = build_universe_arrays(windows, end_ts, granularity)
+    last_close = last_valid(closes)
+    change_2h = percent_change(last_close, first_valid(opens))
+    one_hour = times >= end_ts - 3600
+    change_1h = percent_change(last_close, first_valid(opens[:, one_hour]))
+
+    if changes:
+        known = [p for p in changes if p not in windows]
+        product_ids = product_ids + known
+        change_2h = np.concatenate((change_2h, np.array([changes[p][0] for p in known], dtype=float)))
+        change_1h = np.concatenate((change_1h, np.array([changes[p][1] for p in known], dtype=float)))
+    if not product_ids:
+        return []
+
+    current = np.array([current_prices.get(p) for p in product_ids], dtype=float)
+    last = np.array([last_prices.get(p) for p in product_ids], dtype=float)
+    # A missing or zero baseline can't produce a meaningful change
+    last[last == 0] = np.nan
+    change_since_last = percent_change(current, last)
+
+    with np.errstate(invalid='ignore'):
+        signal = is_buy_signal(change_2h, change_1h, change_since_last, thresholds)
+    score = np.fmax(np.fmax(change_2h, change_1h), change_since_last)
+
+    selected = np.flatnonzero(signal)
+    ranked = selected[np.argsort(-score[selected], kind='stable')]
+    return [Candidate(product_ids[i], score[i], change_2h[i], change_1h[i], change_since_last[i]) for i in ranked]
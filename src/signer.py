@@ -0,0 +1,83 @@
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+
+# Seconds between clock-offset calibrations against the exchange /time endpoint
+CALIBRATION_INTERVAL = 3600
+
+
+class RequestSigner:
+    """
+    Signs exchange requests with cached key material.
+
+    The secret is decoded once into a pre-keyed HMAC that is cloned per request, and headers are
+    built from a fixed template. Timestamps are corrected by a clock offset calibrated against the
+    exchange /time endpoint, so local clock drift doesn't get requests rejected.
+
+    :param api_key: API key
+    :param api_secret: Base64-encoded API secret
+    :param passphrase: API passphrase
+    """
+
+    def __init__(self, api_key, api_secret, passphrase):
+        self.api_secret = api_secret
+        self.template = {
+            'CB-ACCESS-KEY': api_key,
+            'CB-ACCESS-PASSPHRASE': passphrase,
+            'Content-Type': 'application/json'
+        }
+        self.offset = 0.0  # Server time minus local time, in seconds
+        self.calibrated_at = None
+        self._mac = None
+        self.lock = threading.Lock()
+
+    def _keyed_mac(self):
+        if self._mac is None:
+            with self.lock:
+                if self._mac is None:
+                    self._mac = hmac.new(base64.b64decode(self.api_secret), digestmod=hashlib.sha256)
+        return self._mac
+
+    def timestamp(self):
+        return str(time.time() + self.offset)
+
+    def sign(self, endpoint, method='GET', body=''):
+        """
+        :return: Request headers including the signature and timestamp
+        """
+        timestamp = self.timestamp()
+        mac = self._keyed_mac().copy()
+        mac.update((timestamp + method + endpoint + (body if body else '')).encode('utf-8'))
+        headers = dict(self.template)
+        headers['CB-ACCESS-SIGN'] = mac.hexdigest()
+        headers['CB-ACCESS-TIMESTAMP'] = timestamp
+        return headers
+
+    def needs_calibration(self, interval=CALIBRATION_INTERVAL):
+        return self.calibrated_at is None or time.monotonic() - self.calibrated_at >= interval
+
+    def calibrate(self, client):
+        """
+        Measures the offset between the exchange clock and the local clock, assuming the server
+        stamped its response halfway through the round trip.
+
+        :param client: ExchangeClient to query /time with
+        :return: The new offset in seconds, or None if the exchange time was unavailable
+        """
+        try:
+            sent = time.time()
+            response = client.get('/time')
+            received = time.time()
+            if response.status_code != 200:
+                logging.warning(f"Failed to fetch exchange time: {response.status_code}")
+                return None
+            self.offset = float(response.json()['epoch']) - (sent + received) / 2
+            self.calibrated_at = time.monotonic()
+            logging.info(f"Exchange clock offset {self.offset * 1000:.1f} ms (round trip {(received - sent) * 1000:.1f} ms)")
+            return self.offset
+        except Exception as e:
+            logging.error(f"Error calibrating exchange clock offset: {e}")
+            return None
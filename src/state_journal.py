@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+
+# Journal records after which maybe_compact() compacts; bounds the work a restart has to replay
+COMPACT_EVERY = 1000
+
+
+class StateJournal:
+    """
+    Append-only journal of position changes plus a compact snapshot, for a fast warm restart.
+
+    Every record carries a sequence number. compact() writes the full state atomically with the
+    last sequence it covers and then truncates the journal, so restore() reads one small snapshot
+    and about `compact_every` records, never the order history. append() never compacts, since it
+    runs on the sell path; call maybe_compact() from housekeeping. A torn last line from a crash is
+    ignored. Opens and closes are fsynced; price observations are only flushed, so a power loss
+    (not a process crash) can lose the last few trailing-price updates.
+
+    Files are opened on first use.
+
+    :param path: Journal file (JSON lines)
+    :param snapshot_path: Snapshot file; defaults to `path` + '.snapshot'
+    :param compact_every: Records after which maybe_compact() compacts the journal
+    """
+
+    def __init__(self, path='positions.journal', snapshot_path=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.snapshot_path = snapshot_path or path + '.snapshot'
+        self.compact_every = compact_every
+        self.file = None
+        self.sequence = 0
+        self.records = 0  # Records in the journal since the last compaction
+        self.state = {}  # product_id -> position dict, mirrors what restore() would rebuild
+        self.lock = threading.RLock()
+
+    def _open(self):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        return self.file
+
+    def append(self, op, product_id, durable=False, **fields):
+        """
+        Records one change: 'open' (all position fields), 'observe' (highest/previous price) or 'close'.
+        """
+        with self.lock:
+            self.sequence += 1
+            record = {'seq': self.sequence, 'op': op, 'product_id': product_id, **fields}
+            self._apply(record)
+            f = self._open()
+            f.write(json.dumps(record, default=str) + '\n')
+            f.flush()
+            if durable:
+                os.fsync(f.fileno())
+            self.records += 1
+
+    def _apply(self, record):
+        op = record['op']
+        product_id = record['product_id']
+        if op == 'open':
+            self.state[product_id] = {key: value for key, value in record.items()
+                                      if key not in ('seq', 'op')}
+        elif op == 'observe' and product_id in self.state:
+            self.state[product_id]['highest_price'] = record['highest_price']
+            self.state[product_id]['previous_price'] = record['previous_price']
+        elif op == 'close':
+            self.state.pop(product_id, None)
+
+    def maybe_compact(self):
+        """
+        Compacts once the journal holds `compact_every` records.
+
+        :return: True if it compacted
+        """
+        with self.lock:
+            if self.records < self.compact_every:
+                return False
+            self.compact()
+            return True
+
+    def compact(self):
+        """
+        Writes the current state as the snapshot and starts an empty journal.
+        """
+        with self.lock:
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'seq': self.sequence, 'positions': self.state}, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # A crash before the truncation is harmless: restore() skips records the snapshot covers
+            if self.file is not None:
+                self.file.close()
+            self.file = open(self.path, 'w', encoding='utf-8')
+            self.records = 0
+
+    def restore(self, clean=True):
+        """
+        Rebuilds the state from the snapshot and the journal records after it.
+
+        :param clean: Compact afterwards so new records never follow a torn line; pass False to
+                      only read the files
+        :return: {product_id: position dict}
+        """
+        with self.lock:
+            state, sequence = {}, 0
+            if os.path.isfile(self.snapshot_path):
+                with open(self.snapshot_path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                state, sequence = snapshot['positions'], snapshot['seq']
+            self.state = state
+            self.sequence = sequence
+            self.records = 0
+            if os.path.isfile(self.path):
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            logging.warning(f"Ignoring torn record at the end of {self.path}")
+                            break
+                        self.records += 1
+                        if record['seq'] > self.sequence:
+                            self._apply(record)
+                            self.sequence = record['seq']
+            logging.info(f"Restored {len(self.state)} positions from {self.snapshot_path} and "
+                         f"{self.records} journal records")
+            if clean:
+                self.compact()
+            return {product_id: dict(position) for product_id, position in self.state.items()}
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+try:
+    import websockets
+except ImportError:  # Optional dependency, only needed for the streaming feed
+    websockets = None
+
+# Coinbase Pro WebSocket feed
+WS_URL = 'wss://ws-feed.pro.coinbase.com'
+
+# Prices older than this are treated as stale and callers fall back to REST
+MAX_PRICE_AGE = 5
+
+
+class TickerFeed:
+    """
+    Streams prices from the exchange WebSocket feed on a background thread.
+
+    Subscribes to the ticker channel for the tracked products and keeps the latest price of each.
+    Dropped connections are re-established with exponential backoff and every tracked product is
+    re-subscribed.
+
+    :param url: WebSocket feed URL
+    :param product_ids: Products to subscribe to initially
+    :param on_price: Optional callback (product_id, price) called for every price update
+    :param max_reconnect_delay: Upper bound of the reconnect backoff, in seconds
+    """
+
+    def __init__(self, url=WS_URL, product_ids=(), on_price=None, max_reconnect_delay=30):
+        self.url = url
+        self.product_ids = set(product_ids)
+        self.on_price = on_price
+        self.max_reconnect_delay = max_reconnect_delay
+        self.prices = {}  # product_id -> (price, monotonic time received)
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.loop = None
+        self.websocket = None
+        self.thread = None
+        self.stopping = False
+
+    def start(self):
+        if websockets is None:
+            raise ImportError("The streaming ticker feed requires the 'websockets' package")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self._run(),),
+                                       name='ticker-feed', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        if self.loop is not None and self.websocket is not None:
+            asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def subscribe(self, product_ids):
+        new_ids = set(product_ids) - self.product_ids
+        if not new_ids:
+            return
+        self.product_ids |= new_ids
+        if self.loop is not None and self.websocket is not None:
+            asyncio.run_coroutine_threadsafe(self._send_subscribe(new_ids), self.loop)
+
+    def get_price(self, product_id, max_age=MAX_PRICE_AGE):
+        """
+        :return: The latest streamed price, or None if there is none newer than max_age seconds
+        """
+        entry = self.prices.get(product_id)
+        if entry is None or time.monotonic() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    async def _send_subscribe(self, product_ids):
+        await self.websocket.send(json.dumps({
+            'type': 'subscribe',
+            'product_ids': sorted(product_ids),
+            'channels': ['ticker']
+        }))
+
+    async def _run(self):
+        delay = 1
+        while not self.stopping:
+            try:
+                async with websockets.connect(self.url) as websocket:
+                    self.websocket = websocket
+                    if self.product_ids:
+                        await self._send_subscribe(self.product_ids)
+                    self.connected.set()
+                    delay = 1
+                    logging.info(f"Ticker feed connected to {self.url}")
+                    async for message in websocket:
+                        self._handle(message)
+            except Exception as e:
+                if not self.stopping:
+                    logging.warning(f"Ticker feed connection lost: {e}")
+            finally:
+                self.websocket = None
+                self.connected.clear()
+            if not self.stopping:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle(self, message):
+        try:
+            data = json.loads(message)
+            if data.get('type') not in ('ticker', 'match', 'last_match') or 'price' not in data:
+                return
+            product_id = data['product_id']
+            price = float(data['price'])
+            self.prices[product_id] = (price, time.monotonic())
+            if self.on_price is not None:
+                self.on_price(product_id, price)
+        except Exception as e:
+            logging.error(f"Error handling ticker message: {e}")
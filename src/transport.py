@@ -0,0 +1,219 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Scheduler jobs whose runs are recorded, so a replay can drive the bot through the same cycles
+RECORDED_JOBS = ('buy_sweep_job', 'sell_check_tick', 'housekeeping_job')
+# Records buffered between gzip flushes
+FLUSH_EVERY = 100
+
+
+class SessionRecorder:
+    """
+    Writes exchange responses and job runs to a gzipped JSON-lines file.
+
+    :param path: Recording file, e.g. 'session.jsonl.gz'
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'at', encoding='utf-8')
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line)
+            self.pending += 1
+            if self.pending >= FLUSH_EVERY:
+                self.file.flush()
+                self.pending = 0
+
+    def record_http(self, request, response):
+        self._write({'at': time.time(), 'kind': 'http', 'method': request.method, 'path': urlparse(request.url).path,
+                     'status': response.status_code, 'body': response.text})
+
+    def record_job(self, name):
+        self._write({'at': time.time(), 'kind': 'job', 'name': name})
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Passes requests to the wrapped adapter (keeping its pooling and retries) and records the responses.
+    """
+
+    def __init__(self, adapter, recorder):
+        super().__init__()
+        self.adapter = adapter
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        self.recorder.record_http(request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class SessionReplay:
+    """
+    A loaded recording: responses queued per (method, path) in recorded order, plus the job runs.
+
+    Requests are matched on method and path only, since query parameters such as candle windows
+    depend on the clock. A request with nothing left to replay gets the last response recorded for
+    it again, or a 404 if it was never recorded; both count as misses.
+
+    :param path: Recording written by SessionRecorder
+    """
+
+    def __init__(self, path):
+        self.responses = defaultdict(deque)
+        self.last = {}
+        self.jobs = []
+        self.served = 0
+        self.misses = Counter()
+        self.orders = []
+        self.lock = threading.Lock()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Recording cut off mid-write
+                if record['kind'] == 'http':
+                    self.responses[(record['method'], record['path'])].append((record['status'], record['body']))
+                else:
+                    self.jobs.append((record['at'], record['name']))
+
+    def next_response(self, method, path, body=None):
+        key = (method, path)
+        with self.lock:
+            if method == 'POST' and path == '/orders':
+                self.orders.append(json.loads(body or '{}'))
+            queue = self.responses.get(key)
+            if queue:
+                self.last[key] = queue.popleft()
+                self.served += 1
+                return self.last[key]
+            self.misses[f'{method} {path}'] += 1
+            return self.last.get(key, (404, '{"message": "Not recorded"}'))
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from a SessionReplay instead of the network.
+    """
+
+    def __init__(self, replay):
+        super().__init__()
+        self.replay = replay
+
+    def send(self, request, **kwargs):
+        body = request.body.decode() if isinstance(request.body, bytes) else request.body
+        status, text = self.replay.next_response(request.method, urlparse(request.url).path, body)
+        response = requests.Response()
+        response.status_code = status
+        response._content = text.encode()
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install_recorder(client, recorder):
+    """
+    Records every response the client receives, through its existing adapters.
+    """
+    for prefix, adapter in list(client.session.adapters.items()):
+        client.session.mount(prefix, RecordingAdapter(adapter, recorder))
+
+
+def install_replay(client, replay):
+    """
+    Serves every request the client makes from the replay.
+    """
+    adapter = ReplayAdapter(replay)
+    for prefix in list(client.session.adapters):
+        client.session.mount(prefix, adapter)
+
+
+def record_jobs(bot, recorder):
+    """
+    Wraps the bot's scheduler jobs so each run is recorded. Call before bot.main() schedules them.
+    Only REST traffic is recorded: a session using the WebSocket ticker feed can't be replayed.
+    """
+    for name in RECORDED_JOBS:
+        function = getattr(bot, name)
+
+        def recorded(function=function, name=name):
+            recorder.record_job(name)
+            return function()
+        recorded.__name__ = name
+        setattr(bot, name, recorded)
+
+
+def replay_session(bot, replay, speed=0.0):
+    """
+    Drives the bot through the recorded job runs, answering its requests from the replay. The
+    bot's clock (datetime.now in src.main) follows the recorded times.
+
+    :param bot: The src.main module
+    :param replay: SessionReplay
+    :param speed: 1.0 keeps the recorded pacing, 60 runs a minute per second; 0 runs as fast as possible
+    :return: Summary dict (jobs run, responses served, misses, orders placed, elapsed seconds)
+    """
+    install_replay(bot.client, replay)
+    install_replay(bot.order_router.client, replay)
+    clock = {'at': replay.jobs[0][0] if replay.jobs else time.time()}
+
+    class ReplayDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock['at'], tz)
+
+    real_datetime = bot.datetime
+    bot.datetime = ReplayDatetime
+    started = time.monotonic()
+    try:
+        previous_at = None
+        for at, name in replay.jobs:
+            if speed and previous_at is not None and at > previous_at:
+                time.sleep((at - previous_at) / speed)
+            previous_at = at
+            clock['at'] = at
+            try:
+                getattr(bot, name)()
+            except Exception as e:
+                logging.error(f"Error replaying {name}: {e}")
+    finally:
+        bot.datetime = real_datetime
+    return {
+        'jobs': len(replay.jobs),
+        'served': replay.served,
+        'misses': dict(replay.misses),
+        'orders': [(order.get('product_id'), order.get('side', 'buy' if 'funds' in order else 'sell'))
+                   for order in replay.orders],
+        'elapsed': time.monotonic() - started,
+    }
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+# Quote currencies the bot trades against
+QUOTE_CURRENCIES = ('USD',)
+# Seconds the product list is reused before it is downloaded again
+PRODUCTS_TTL = 3600
+# Seconds the 24h stats snapshot is reused
+STATS_TTL = 600
+
+
+class ProductUniverse:
+    """
+    Cached, pre-filtered list of the products worth scanning.
+
+    The product list is refreshed at most every `ttl` seconds and the bulk 24h stats snapshot every
+    `stats_ttl` seconds; a failed refresh keeps serving the previous data. Products are kept when
+    they are online, fully tradable and quoted in one of `quote_currencies`, and, when stats are
+    available, when their 24h quote volume and 24h high/low range reach the minimums.
+
+    :param fetch_products: Callable returning the exchange's product dicts, or None on failure
+    :param fetch_stats: Callable returning {product_id: {'stats_24hour': {...}}}, or None on failure
+    :param quote_currencies: Quote currencies to keep
+    :param min_quote_volume: Minimum 24h volume in the quote currency
+    :param min_range_percent: Minimum 24h (high - low) / low in percent
+    :param ttl: Seconds the product list is cached
+    :param stats_ttl: Seconds the stats snapshot is cached
+    """
+
+    def __init__(self, fetch_products, fetch_stats=None, quote_currencies=QUOTE_CURRENCIES, min_quote_volume=0.0,
+                 min_range_percent=0.0, ttl=PRODUCTS_TTL, stats_ttl=STATS_TTL):
+        self.fetch_products = fetch_products
+        self.fetch_stats = fetch_stats
+        self.quote_currencies = set(quote_currencies) if quote_currencies else None
+        self.min_quote_volume = min_quote_volume
+        self.min_range_percent = min_range_percent
+        self.ttl = ttl
+        self.stats_ttl = stats_ttl
+        self.products = None
+        self.products_at = None
+        self.stats = None
+        self.stats_at = None
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        with self.lock:
+            self.products_at = self.stats_at = None
+
+    def is_tradable(self, product):
+        if product.get('trading_disabled') or product.get('status', 'online') != 'online':
+            return False
+        if product.get('cancel_only') or product.get('post_only') or product.get('limit_only'):
+            return False  # Market orders would be rejected
+        return self.quote_currencies is None or product.get('quote_currency') in self.quote_currencies
+
+    def is_active(self, product_id):
+        """
+        Whether the 24h stats show enough volume and movement; True when there are no stats for it.
+        """
+        day = ((self.stats or {}).get(product_id) or {}).get('stats_24hour')
+        if not day:
+            return True
+        try:
+            last = float(day['last'])
+            low = float(day['low'])
+            high = float(day['high'])
+            volume = float(day['volume'])
+        except (KeyError, TypeError, ValueError):
+            return True
+        if volume * last < self.min_quote_volume:
+            return False
+        return low > 0 and (high - low) / low * 100 >= self.min_range_percent
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self.products_at is None or now - self.products_at >= self.ttl:
+            products = self.fetch_products()
+            if products is not None:
+                self.products = [product for product in products if self.is_tradable(product)]
+                self.products_at = now
+            elif self.products is None:
+                return False
+            else:
+                logging.warning("Product list refresh failed; using the cached list")
+        if self.fetch_stats is not None and (self.stats_at is None or now - self.stats_at >= self.stats_ttl):
+            stats = self.fetch_stats()
+            if stats is not None:
+                self.stats = stats
+                self.stats_at = now
+            else:
+                logging.warning("Product stats refresh failed; using the previous snapshot")
+        return True
+
+    def product_ids(self):
+        """
+        :return: Ids of the products worth scanning (empty if the list has never been fetched)
+        """
+        with self.lock:
+            if not self._refresh():
+                return []
+            selected = [product['id'] for product in self.products if self.is_active(product['id'])]
+        logging.info(f"Product universe: {len(selected)} of {len(self.products)} tradable products selected")
+        return selected
@@ -0,0 +1,142 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+
+class BufferedWriter:
+    """
+    Background writer that takes disk I/O off the trading path.
+
+    Rows are queued (bounded) and a single thread batches them per file, flushing when a file has
+    `batch_size` rows pending or `flush_interval` seconds have passed. Other deferred writes (e.g.
+    candle upserts) can be queued with submit(). close() drains everything and fsyncs the files.
+
+    All file I/O happens on the writer thread, so rows and submitted writes keep their order.
+
+    :param max_queue: Queue bound; when full, callers wait up to `put_timeout` for room
+    :param batch_size: Pending rows per file that trigger a flush
+    :param flush_interval: Maximum seconds a row waits before being written
+    :param put_timeout: Seconds a caller waits on a full queue before the write is dropped (and logged)
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=1.0, put_timeout=5.0):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.pending = {}  # file name -> list of row dicts
+        self.pending_rows = 0
+        self.written_files = set()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='buffered-writer', daemon=True)
+                self.thread.start()
+
+    def write_csv(self, file_name, data):
+        """
+        Queues rows to append to a CSV file (created with a header if it doesn't exist).
+
+        :param file_name: Target CSV file
+        :param data: DataFrame or list of row dicts
+        """
+        rows = data.to_dict('records') if hasattr(data, 'to_dict') else list(data)
+        self._put(('csv', file_name, rows))
+
+    def submit(self, function, *args):
+        """
+        Queues an arbitrary write, run on the writer thread in submission order relative to other
+        submitted writes (CSV rows are batched separately).
+        """
+        self._put(('call', function, args))
+
+    def flush(self):
+        """
+        Blocks until everything queued so far has been written.
+        """
+        done = threading.Event()
+        if self._put(('flush', done, None)):
+            done.wait()
+
+    def close(self):
+        """
+        Durable shutdown: drains the queue, writes all pending rows and fsyncs the files written.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(('stop', None, None))
+            self.thread.join()
+        self._flush_pending()
+        self._fsync()
+
+    def _put(self, item):
+        """
+        :return: False if the queue stayed full for put_timeout and the write was dropped
+        """
+        self.start()
+        try:
+            self.queue.put(item, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            target = item[1] if item[0] == 'csv' else getattr(item[1], '__name__', item[0])
+            logging.error(f"Write queue full for {self.put_timeout}s; dropped {item[0]} write to {target}")
+            return False
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is not None and item[0] == 'stop':
+                self._flush_pending()
+                return
+            if item is not None:
+                self._handle(item)
+            if (item is None or self.pending_rows >= self.batch_size or
+                    time.monotonic() - last_flush >= self.flush_interval):
+                self._flush_pending()
+                last_flush = time.monotonic()
+
+    def _handle(self, item):
+        kind, target, payload = item
+        if kind == 'csv':
+            with self.lock:
+                self.pending.setdefault(target, []).extend(payload)
+                self.pending_rows += len(payload)
+        elif kind == 'call':
+            try:
+                target(*payload)
+            except Exception as e:
+                logging.error(f"Error in deferred write {getattr(target, '__name__', target)}: {e}")
+        elif kind == 'flush':
+            self._flush_pending()
+            target.set()
+
+    def _flush_pending(self):
+        with self.lock:
+            pending, self.pending, self.pending_rows = self.pending, {}, 0
+        if pending:
+            import pandas as pd
+        for file_name, rows in pending.items():
+            try:
+                file_exists = os.path.isfile(file_name)
+                pd.DataFrame(rows).to_csv(file_name, mode='a', header=not file_exists, index=False)
+                self.written_files.add(file_name)
+                logging.info(f"Wrote {len(rows)} rows to {file_name}")
+            except Exception as e:
+                logging.error(f"Error appending data to CSV: {e}")
+
+    def _fsync(self):
+        for file_name in self.written_files:
+            try:
+                with open(file_name, 'a') as f:
+                    os.fsync(f.fileno())
+            except Exception as e:
+                logging.error(f"Error syncing {file_name}: {e}")
@@ -1,19 +1,31 @@
+import json
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 from datetime import datetime, timedelta
 import pandas as pd
+from src.market_store import MarketStore
+from src.portfolio import PositionBook
 from src.main import (
     fetch_historical_data,
     fetch_current_price_data,
     fetch_last_checked_price,
     get_available_products,
-    check_and_execute_buy
+    check_and_execute_buy,
+    candle_store,
+    price_index
 )
 
 
 class TestCryptoBot(unittest.TestCase):
 
-    @patch('src.main.requests.get')  # Updated patch path
+    def setUp(self):
+        # Fetched candles are upserted into the store; keep them out of market_data.db
+        store = MarketStore(':memory:')
+        for patcher in (patch('src.main.market_store', store), patch.object(candle_store, 'backend', store)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('src.main.client.session.get')  # Updated patch path
     def test_fetch_historical_data_success(self, mock_get):
         # Mock the response from the API call
         mock_response = MagicMock()
@@ -40,71 +52,71 @@ class TestCryptoBot(unittest.TestCase):
 
     # add more test methods here to test different scenarios
 
+    @patch('src.main.client.session.get')  # Patch the 'requests.get' call within 'fetch_current_price_data' function
+    def test_fetch_current_price_data_success(self, mock_get):
+        # Mock the response from the API call
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            'price': '50000.0'  # Sample price data
+        }
+        mock_get.return_value = mock_response
+
+        product_id = 'BTC-USD'
+
+        # Call the function with the mocked API response
+        price = fetch_current_price_data(product_id)
+
+        # Assertions to verify function behavior
+        self.assertIsNotNone(price)
+        self.assertEqual(price, 50000.0)  # Assert that the returned price is as expected
+
+    @patch('src.main.market_store.latest_close')
+    def test_fetch_last_checked_price_success(self, mock_latest_close):
+        # Mock the indexed lookup in the market store
+        mock_latest_close.return_value = 45000.0
+        price_index.prices.pop('BTC-USD', None)
+
+        product_id = 'BTC-USD'
+        # Call the function
+        last_checked_price = fetch_last_checked_price(product_id)
+
+        # Assertions to verify function behavior
+        self.assertEqual(last_checked_price, 45000.0)
 
-@patch('src.main.requests.get')  # Patch the 'requests.get' call within 'fetch_current_price_data' function
-def test_fetch_current_price_data_success(self, mock_get):
-    # Mock the response from the API call
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        'price': '50000.0'  # Sample price data
-    }
-    mock_get.return_value = mock_response
-
-    product_id = 'BTC-USD'
-
-    # Call the function with the mocked API response
-    price = fetch_current_price_data(product_id)
-
-    # Assertions to verify function behavior
-    self.assertIsNotNone(price)
-    self.assertEqual(price, 50000.0)  # Assert that the returned price is as expected
-
-@patch('src.main.pd.read_csv')
-def test_fetch_last_checked_price_success(self, mock_read_csv):
-    # Mock reading from a CSV file
-    mock_read_csv.return_value = pd.DataFrame({
-        'product_id': ['BTC-USD', 'ETH-USD'],
-        'close': [45000.0, 3000.0]
-    })
-
-    product_id = 'BTC-USD'
-    # Call the function
-    last_checked_price = fetch_last_checked_price(product_id)
-
-    # Assertions to verify function behavior
-    self.assertEqual(last_checked_price, 45000.0)
-
-@patch('src.main.requests.get')
-def test_get_available_products_success(self, mock_get):
-    # Mock the API response
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [
-        {'id': 'BTC-USD', 'trading_disabled': False},
-        {'id': 'ETH-USD', 'trading_disabled': True},  # This product should be filtered out
-    ]
-    mock_get.return_value = mock_response
-
-    # Call the function
-    available_products = get_available_products()
-
-    # Assertions to verify function behavior
-    self.assertIn('BTC-USD', available_products)
-    self.assertNotIn('ETH-USD', available_products)  # ETH-USD should not be in the list because trading is disabled
-
-@patch('src.main.requests.post')
-@patch('src.main.fetch_current_price_data')
-@patch('src.main.fetch_historical_data')
-gitdef test_check_and_execute_buy(self, mock_fetch_historical, mock_fetch_current, mock_post):
+    @patch('src.main.client.session.get')
+    def test_get_available_products_success(self, mock_get):
+        # Mock the API response
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps([
+            {'id': 'BTC-USD', 'trading_disabled': False},
+            {'id': 'ETH-USD', 'trading_disabled': True},  # This product should be filtered out
+        ])
+        mock_get.return_value = mock_response
+
+        # Call the function
+        available_products = get_available_products()
+
+        # Assertions to verify function behavior
+        self.assertIn('BTC-USD', available_products)
+        self.assertNotIn('ETH-USD', available_products)  # ETH-USD should not be in the list because trading is disabled
+
+    @patch('src.main.append_to_csv')
+    @patch('src.main.positions', PositionBook())
+    @patch('src.main.order_client.session.post')  # Orders go out on their own connection
+    @patch('src.main.fetch_current_price_data')
+    @patch('src.main.fetch_historical_data')
+    def test_check_and_execute_buy(self, mock_fetch_historical, mock_fetch_current, mock_post, mock_append_to_csv):
         # Setup mock responses
-        mock_fetch_historical.return_value = pd.DataFrame({'open': [44000], 'close': [50000]})
+        mock_fetch_historical.return_value = pd.DataFrame({'time': [int(datetime.now().timestamp())], 'low': [43000], 'high': [50500], 'open': [44000], 'close': [50000], 'volume': [10.0]})
         mock_fetch_current.return_value = 51000.0
 
         # Mock response for the POST request to execute buy order
         mock_post_response = MagicMock()
         mock_post_response.status_code = 200
-        mock_post_response.json.return_value = {'filled_size': 1.0, 'executed_value': 51000.0}
+        mock_post_response.json.return_value = {'id': 'order-1', 'status': 'done', 'settled': True,
+                                                'filled_size': 1.0, 'executed_value': 51000.0}
         mock_post.return_value = mock_post_response
 
         # Run the function with test data
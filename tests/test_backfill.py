@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.backfill import backfill, plan_pages
+from src.exchange_client import ExchangeClient, TokenBucket
+from src.market_store import MarketStore
+from src.mock_exchange import MockExchange
+
+
+class TestPlanPages(unittest.TestCase):
+
+    def test_pages_cover_range_without_overlap(self):
+        pages = plan_pages(1000, 1000 + 700 * 300, granularity=300, page_bars=300)
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages[0], (900, 900 + 299 * 300))
+        self.assertEqual(pages[1][0], pages[0][1] + 300)
+        self.assertEqual(pages[-1][1], (1000 + 700 * 300) // 300 * 300)
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = MockExchange(products={'BTC-USD': 45000.0, 'ETH-USD': 3000.0}).start()
+        self.client = ExchangeClient(self.exchange.url, max_retries=0, public_bucket=TokenBucket(1e9, 1e9))
+        self.store = MarketStore(':memory:')
+        self.end = time.time() // 300 * 300 - 3600
+        self.start = self.end - 2 * 86400
+
+    def tearDown(self):
+        self.store.close()
+        self.client.close()
+        self.exchange.stop()
+
+    def test_downloads_all_pages_concurrently(self):
+        result = backfill(self.client, self.store, ['BTC-USD', 'ETH-USD'], self.start, self.end)
+        self.assertEqual((result.pages, result.skipped, result.failed), (4, 0, 0))
+        stored = self.store.get_range('BTC-USD', self.start, self.end)
+        self.assertEqual(len(stored), 2 * 288 + 1)
+        self.assertTrue(stored['time'].is_monotonic_increasing)
+
+    def test_resumes_after_failures(self):
+        self.exchange.error_rate = 1.0
+        result = backfill(self.client, self.store, ['BTC-USD'], self.start, self.end)
+        self.assertEqual((result.pages, result.failed), (0, 2))
+
+        self.exchange.error_rate = 0.0
+        first = backfill(self.client, self.store, ['BTC-USD'], self.start, self.end)
+        self.assertEqual((first.pages, first.skipped), (2, 0))
+        requests = self.exchange.stats['requests']
+        again = backfill(self.client, self.store, ['BTC-USD'], self.start, self.end)
+        self.assertEqual((again.pages, again.skipped), (0, 2))
+        self.assertEqual(self.exchange.stats['requests'], requests)
+
+    def test_forming_page_is_not_checkpointed(self):
+        backfill(self.client, self.store, ['BTC-USD'], time.time() - 3600, time.time())
+        again = backfill(self.client, self.store, ['BTC-USD'], time.time() - 3600, time.time())
+        self.assertEqual(again.skipped, 0)
+
+    def test_interrupt_cancels_queued_pages(self):
+        release = threading.Event()
+        calls = []
+
+        def fetch(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise KeyboardInterrupt
+            release.wait(2)  # Still downloading when the interrupt arrives
+            return None
+
+        started = time.monotonic()
+        with patch('src.backfill.fetch_page', side_effect=fetch):
+            with self.assertRaises(KeyboardInterrupt):
+                backfill(self.client, self.store, ['BTC-USD'], self.start - 60 * 86400, self.end, max_workers=2)
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        self.assertLessEqual(len(calls), 3)  # Of 60 pages
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import prepare_market, simulate, find_exit, forward_fill, load_candles
+from src.market_store import MarketStore
+
+START = 1700002800  # on the hour
+
+
+def candles(product_id, closes, granularity=300):
+    closes = np.asarray(closes, dtype=float)
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    return pd.DataFrame({'product_id': product_id, 'time': START + granularity * np.arange(len(closes)),
+                         'low': closes, 'high': closes, 'open': opens, 'close': closes, 'volume': 1.0})
+
+
+class TestBacktest(unittest.TestCase):
+
+    def test_forward_fill(self):
+        values = np.array([[1.0, np.nan, 3.0, np.nan]])
+        np.testing.assert_array_equal(forward_fill(values), [[1.0, 1.0, 3.0, 3.0]])
+
+    def test_find_exit_trailing_high(self):
+        prices = np.array([100.0, 104.0, 108.0, 106.0, 102.0])
+        self.assertEqual(find_exit(prices, 100.0), 4)  # 102 is 5.6% under the 108 high
+        self.assertIsNone(find_exit(np.array([100.0, 101.0]), 100.0))
+
+    def test_buys_pump_and_takes_profit(self):
+        # Flat for 2h, then climbing into the 3h sweep (+18.8% over 1h), then +25% from entry
+        flat = [100.0] * 24
+        pump = flat + [101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112] + [120, 130, 140, 150]
+        data = pd.concat([candles('PUMP-USD', pump), candles('FLAT-USD', [100.0] * len(pump))])
+
+        result = simulate(prepare_market(data), fee=0, slippage=0)
+
+        self.assertEqual(len(result.trades), 1)
+        trade = result.trades.iloc[0]
+        self.assertEqual(trade['product_id'], 'PUMP-USD')
+        self.assertEqual(trade['entry_price'], 120.0)
+        self.assertEqual(trade['exit_price'], 150.0)
+        self.assertEqual(trade['status'], 'closed')
+        self.assertAlmostEqual(result.total_pnl, 250.0)
+        self.assertEqual(result.max_drawdown, 0.0)
+
+    def test_no_signal_no_trades(self):
+        result = simulate(prepare_market(candles('FLAT-USD', [100.0] * 100)))
+
+        self.assertTrue(result.trades.empty)
+        self.assertEqual(result.total_pnl, 0.0)
+
+    def test_load_csv_without_product_id(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'historical_data.csv')
+            candles('BTC-USD', [1.0, 2.0]).drop(columns='product_id').to_csv(path, index=False)
+
+            self.assertRaises(ValueError, load_candles, path)
+            self.assertEqual(set(load_candles(path, 'BTC-USD')['product_id']), {'BTC-USD'})
+
+    def test_load_db_reads_one_granularity(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'market_data.db')
+            store = MarketStore(path)
+            store.upsert_candles('BTC-USD', candles('BTC-USD', [1.0, 2.0, 3.0]).drop(columns='product_id'), 300)
+            store.upsert_candles('BTC-USD', candles('BTC-USD', [5.0], 3600).drop(columns='product_id'), 3600)
+            store.close()
+
+            self.assertEqual(list(load_candles(path)['close']), [1.0, 2.0, 3.0])
+            self.assertEqual(list(load_candles(path, granularity=3600)['close']), [5.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from src.candle_store import CandleStore, CANDLE_COLUMNS
+from src.market_store import MarketStore
+
+
+def make_candles(start_ts, end_ts, granularity=300):
+    # Exchange order: newest bar first
+    times = list(range(int(end_ts) - int(end_ts) % granularity, int(start_ts) - 1, -granularity))
+    return pd.DataFrame([[t, 1.0, 2.0, 1.5, 1.6, 10.0] for t in times], columns=CANDLE_COLUMNS)
+
+
+class TestCandleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.fetch = MagicMock(side_effect=lambda p, s, e, g: make_candles(s.timestamp(), e.timestamp(), g))
+
+    def test_window_sorted_oldest_first(self):
+        store = CandleStore(self.fetch)
+        now = datetime.now()
+        data = store.get_window('BTC-USD', now - timedelta(hours=2), now)
+
+        self.assertTrue(data['time'].is_monotonic_increasing)
+        self.assertGreaterEqual(len(data), 24)
+
+    def test_second_call_only_fetches_newer_bars(self):
+        store = CandleStore(self.fetch)
+        now = datetime.now()
+        first = store.get_window('BTC-USD', now - timedelta(hours=2), now)
+        later = now + timedelta(hours=1)
+        store.get_window('BTC-USD', later - timedelta(hours=2), later)
+
+        second_start = self.fetch.call_args_list[1][0][1]
+        self.assertEqual(second_start.timestamp(), first['time'].iloc[-1])
+
+    def test_window_before_cached_range_is_fetched_in_full(self):
+        store = CandleStore(self.fetch)
+        now = datetime.now()
+        store.get_window('BTC-USD', now - timedelta(hours=1), now)
+        start = now - timedelta(hours=2)
+        store.get_window('BTC-USD', start, now)
+
+        self.assertEqual(self.fetch.call_args_list[1][0][1], start)
+
+    def test_cold_start_seeds_from_backend(self):
+        store = MarketStore(':memory:')
+        now = datetime.now()
+        store.upsert_candles('BTC-USD', make_candles((now - timedelta(hours=2)).timestamp(), now.timestamp()))
+
+        CandleStore(self.fetch, backend=store).get_window('BTC-USD', now - timedelta(hours=1), now)
+
+        self.assertGreater(self.fetch.call_args_list[0][0][1], now - timedelta(hours=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src import cli
+from src.market_store import MarketStore
+from src.orders import OrderRouter
+from src.portfolio import PositionBook
+from src.state_journal import StateJournal
+import src.main as bot
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestDelegatedCommands(unittest.TestCase):
+
+    def test_argv_is_rewritten_for_the_module_parser(self):
+        with patch.object(sys, 'argv', ['cli.py']), patch('src.cli.importlib.import_module') as import_module:
+            cli.main(['backtest', 'data.csv', '--granularity', '60'])
+            self.assertEqual(sys.argv, ['cli.py backtest', 'data.csv', '--granularity', '60'])
+        import_module.assert_called_once_with('src.backtest')
+        import_module.return_value.main.assert_called_once_with()
+
+    def test_every_delegated_module_has_a_main(self):
+        for module_name in cli.DELEGATED.values():
+            with open(os.path.join(REPO_ROOT, *module_name.split('.')) + '.py') as f:
+                self.assertIn('\ndef main(', f.read(), module_name)
+
+    def test_recording_rejects_the_ticker_feed(self):
+        with patch.object(cli, 'run') as run, contextlib.redirect_stderr(io.StringIO()) as error:
+            with self.assertRaises(SystemExit):
+                cli.main(['run', '--record', 'session.jsonl.gz', '--ticker-feed'])
+        run.assert_not_called()
+        self.assertIn('--record cannot be combined with --ticker-feed', error.getvalue())
+
+
+class TestStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def status(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.main(['status', '--journal', self.path('positions.journal'), '--prices', self.path('prices.json'),
+                      '--db', self.path('market.db')])
+        return output.getvalue()
+
+    def test_reports_stored_state(self):
+        journal = StateJournal(self.path('positions.journal'))
+        journal.append('open', 'BTC-USD', purchase_price=100.0, amount=0.5, time='2024-01-01T00:00:00',
+                       highest_price=110.0, previous_price=105.0)
+        journal.close()
+        with open(self.path('prices.json'), 'w') as f:
+            json.dump({'BTC-USD': [105.0, time.time() - 30], 'ETH-USD': [3000.0, time.time() - 90]}, f)
+        store = MarketStore(self.path('market.db'))
+        store.upsert_candles('BTC-USD', pd.DataFrame({'time': [1700000000, 1700000300], 'low': 1.0, 'high': 1.0,
+                                                      'open': 1.0, 'close': 1.0, 'volume': 1.0}))
+        store.close()
+
+        output = self.status()
+        self.assertIn('Positions: 1', output)
+        self.assertIn('BTC-USD      bought 0.5 at 100.0', output)
+        self.assertIn('high 110.0, last 105.0', output)
+        self.assertIn('Last prices: 2 products (30s old)', output)
+        self.assertIn('Candles: 2 bars for 1 products', output)
+
+    def test_missing_files(self):
+        output = self.status()
+        self.assertIn('Positions: 0', output)
+        self.assertIn('prices.json not found', output)
+        self.assertIn('market.db not found', output)
+
+
+class TestScanOnceBuy(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.router = OrderRouter(MagicMock(), lambda *args: {}, fill_poll_interval=0.01, fill_timeout=0.05)
+        self.journal_path = os.path.join(self.tmp.name, 'positions.journal')
+        for name, value in (('order_router', self.router), ('positions', PositionBook()),
+                            ('state_journal', StateJournal(self.journal_path)), ('signer', MagicMock()),
+                            ('writer', MagicMock()), ('price_index', MagicMock()), ('append_to_csv', MagicMock()),
+                            ('start_sell_checks', MagicMock())):
+            patcher = patch.object(bot, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scan_once(self, fills_after, fill_wait):
+        polls = []
+
+        def fetch_fill(ack):
+            polls.append(ack)
+            return dict(ack, status='done', filled_size='2', executed_value='200') if len(polls) > fills_after else None
+
+        def sweep():
+            # As execute_buy_order does when the fill outlasts FILL_TIMEOUT
+            order = self.router.prepare('SOL-USD', 'buy', funds='200')
+            self.router.confirm(order, {'id': 'o-1', 'status': 'pending'},
+                                lambda order, fill: bot.record_buy_fill(order, fill, late=True))
+            return False
+
+        output = io.StringIO()
+        with patch.object(self.router, 'fetch_fill', side_effect=fetch_fill), \
+                patch.object(bot, 'run_buy_sweep', side_effect=sweep), contextlib.redirect_stdout(output):
+            cli.main(['scan-once', '--buy', '--fill-wait', str(fill_wait)])
+        return output.getvalue()
+
+    def test_waits_for_a_late_fill(self):
+        output = self.scan_once(fills_after=20, fill_wait=5)
+        self.assertIn('Bought: SOL-USD', output)
+        self.assertEqual(list(StateJournal(self.journal_path).restore(clean=False)), ['SOL-USD'])
+
+    def test_reports_an_order_still_unfilled(self):
+        with self.assertLogs(level='WARNING'):
+            output = self.scan_once(fills_after=10 ** 6, fill_wait=0.1)
+        self.assertIn('Unconfirmed: SOL-USD (client_oid ', output)
+        self.assertIn('Bought: nothing', output)
+        self.assertEqual(self.router.unconfirmed(), [])  # Stopped before the journal was closed
+
+
+class TestImports(unittest.TestCase):
+
+    def test_startup_does_not_import_pandas(self):
+        code = ('import sys; import src.main; import src.cli; '
+                'sys.argv = ["cli", "status"]; src.cli.main(); print("pandas" in sys.modules)')
+        with tempfile.TemporaryDirectory() as workdir:
+            # Run from a scratch directory: importing the bot opens its files in the working directory
+            output = subprocess.check_output([sys.executable, '-c', code], cwd=workdir, text=True,
+                                             env=dict(os.environ, PYTHONPATH=REPO_ROOT))
+        self.assertEqual(output.splitlines()[-1], 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.exchange_client import TokenBucket, ExchangeClient
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_is_not_throttled(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_waits_when_empty(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        bucket.acquire()
+        waited = bucket.acquire()
+        self.assertGreater(waited, 0)
+
+
+class TestExchangeClient(unittest.TestCase):
+
+    def test_get_uses_pooled_session(self):
+        client = ExchangeClient('https://example.test')
+        with patch.object(client.session, 'get', return_value=MagicMock(status_code=200)) as mock_get:
+            client.get('/products', params={'a': 1})
+        mock_get.assert_called_once_with('https://example.test/products', headers=None, params={'a': 1},
+                                         timeout=client.timeout)
+
+    def test_post_spends_private_budget(self):
+        client = ExchangeClient('https://example.test')
+        client.private_bucket = MagicMock()
+        client.public_bucket = MagicMock()
+        with patch.object(client.session, 'post', return_value=MagicMock(status_code=200)):
+            client.post('/orders', data='{}')
+        client.private_bucket.acquire.assert_called_once()
+        client.public_bucket.acquire.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
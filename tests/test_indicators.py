@@ -0,0 +1,77 @@
+import unittest
+
+import pandas as pd
+
+from src.indicators import IndicatorBook, RollingBars
+
+T0 = 1700002800  # on the hour
+
+
+class TestRollingBars(unittest.TestCase):
+
+    def test_ticks_build_bars(self):
+        bars = RollingBars(granularity=300, windows=(600,))
+        bars.update(T0, 10, 10, 10, tick=True)
+        bars.update(T0 + 10, 12, 12, 12, tick=True)
+        bars.update(T0 + 20, 11, 11, 11, tick=True)
+
+        self.assertEqual(bars.bar(T0), (10, 12, 11))
+
+    def test_running_high_expires(self):
+        bars = RollingBars(granularity=300, windows=(900,))
+        for i, high in enumerate([5, 9, 7, 6, 4]):
+            bars.update(T0 + 300 * i, high, high, high)
+
+        # Window holds the last three bars: 7, 6, 4
+        self.assertEqual(bars.high_deques[900][0][1], 7)
+
+    def test_out_of_order_bar_rebuilds_high(self):
+        bars = RollingBars(granularity=300, windows=(900,))
+        bars.update(T0, 1, 1, 1)
+        bars.update(T0 + 600, 2, 2, 2)
+        bars.update(T0 + 300, 8, 8, 8)
+
+        self.assertEqual(bars.high_deques[900][0][1], 8)
+
+
+class TestIndicatorBook(unittest.TestCase):
+
+    def test_change_needs_full_window(self):
+        book = IndicatorBook(granularity=300, windows=(3600, 7200))
+        for i in range(12):
+            book.on_bar('BTC-USD', T0 + 300 * i, 100 + i, 100 + i, 101 + i)
+
+        self.assertAlmostEqual(book.change('BTC-USD', 3600), 12.0)
+        self.assertIsNone(book.change('BTC-USD', 7200))
+        self.assertEqual(book.high('BTC-USD', 3600), 111)
+
+    def test_candles_and_ticks_agree(self):
+        book = IndicatorBook(granularity=300, windows=(3600,))
+        candles = pd.DataFrame({'time': [T0 + 300 * i for i in range(12)][::-1], 'open': 100.0, 'high': 100.0,
+                                'low': 100.0, 'close': 100.0, 'volume': 1.0})
+        book.on_candles('BTC-USD', candles)
+        book.on_tick('BTC-USD', 110.0, T0 + 300 * 11 + 30)
+
+        self.assertAlmostEqual(book.change('BTC-USD', 3600), 10.0)
+        self.assertEqual(book.close('BTC-USD'), 110.0)
+        self.assertEqual(book.high('BTC-USD', 3600), 110.0)
+
+    def test_high_since_skips_the_purchase_bar(self):
+        book = IndicatorBook(granularity=300, windows=(3600, 7200))
+        for i, high in enumerate([120, 104, 108, 103]):
+            book.on_bar('BTC-USD', T0 + 300 * i, 100, high, 100)
+
+        self.assertEqual(book.high_since('BTC-USD', T0 + 10), 108)  # 120 was in the purchase bar
+        self.assertEqual(book.high_since('BTC-USD', T0 + 300 * 2 + 10), 103)
+        self.assertIsNone(book.high_since('BTC-USD', T0 + 300 * 3 + 10))
+        self.assertIsNone(book.high_since('DOGE-USD', T0))
+
+    def test_unknown_product(self):
+        book = IndicatorBook()
+        self.assertIsNone(book.change('DOGE-USD', 3600))
+        self.assertIsNone(book.close('DOGE-USD'))
+        self.assertFalse(book.is_fresh('DOGE-USD', 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
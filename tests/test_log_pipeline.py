@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from src.log_pipeline import LogPipeline, RepeatFilter, RotatingLogFileHandler
+
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord('root', level, __file__, 1, message, None, None)
+
+
+class TestRepeatFilter(unittest.TestCase):
+
+    def test_repeats_are_dropped_and_counted(self):
+        repeat_filter = RepeatFilter(interval=0.05)
+        self.assertTrue(repeat_filter.filter(make_record("Sell conditions not met.")))
+        self.assertFalse(repeat_filter.filter(make_record("Sell conditions not met.")))
+        self.assertFalse(repeat_filter.filter(make_record("Sell conditions not met.")))
+        self.assertTrue(repeat_filter.filter(make_record("Other message")))
+        time.sleep(0.06)
+        record = make_record("Sell conditions not met.")
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertEqual(record.suppressed, 2)
+
+    def test_errors_are_never_dropped(self):
+        repeat_filter = RepeatFilter(interval=60)
+        for _ in range(3):
+            self.assertTrue(repeat_filter.filter(make_record("Order failed", logging.ERROR)))
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp.name, 'bot_log.txt')
+        self.root_level = logging.getLogger().level
+
+    def tearDown(self):
+        logging.getLogger().setLevel(self.root_level)
+        self.tmp.cleanup()
+
+    def test_writes_json_lines_from_listener(self):
+        pipeline = LogPipeline(self.file_name).start()
+        try:
+            for _ in range(5):
+                logging.info("Sell conditions not met.")
+            logging.warning("Failed to fetch products: 503")
+        finally:
+            pipeline.stop()
+        with open(self.file_name) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([entry['message'] for entry in entries],
+                         ["Sell conditions not met.", "Failed to fetch products: 503"])
+        self.assertEqual(entries[1]['level'], 'WARNING')
+        self.assertNotIn(pipeline.queue_handler, logging.getLogger().handlers)
+
+    def test_rotates_by_size(self):
+        handler = RotatingLogFileHandler(self.file_name, max_bytes=200, interval=0, backup_count=2)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        for i in range(20):
+            handler.emit(make_record(f"line {i:02d} " + 'x' * 40))
+        handler.close()
+        self.assertTrue(os.path.exists(self.file_name + '.1'))
+        self.assertTrue(os.path.exists(self.file_name + '.2'))
+        self.assertFalse(os.path.exists(self.file_name + '.3'))
+
+    def test_rotates_by_age(self):
+        handler = RotatingLogFileHandler(self.file_name, max_bytes=0, interval=0.05, backup_count=1)
+        handler.emit(make_record("before"))
+        time.sleep(0.06)
+        handler.emit(make_record("after"))
+        handler.close()
+        with open(self.file_name + '.1') as f:
+            self.assertIn("before", f.read())
+        with open(self.file_name) as f:
+            self.assertIn("after", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.market_store import MarketStore
+
+
+def candles(times, close=1.0):
+    return pd.DataFrame({'time': times, 'low': close, 'high': close, 'open': close, 'close': close, 'volume': 1.0})
+
+
+class TestMarketStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MarketStore(':memory:')
+
+    def test_latest_close_per_product(self):
+        self.store.upsert_candles('BTC-USD', candles([300, 600], close=45000.0))
+        self.store.upsert_candles('ETH-USD', candles([900], close=3000.0))
+
+        self.assertEqual(self.store.latest_close('BTC-USD'), 45000.0)
+        self.assertEqual(self.store.latest_close('ETH-USD'), 3000.0)
+        self.assertIsNone(self.store.latest_close('DOGE-USD'))
+
+    def test_upsert_replaces_existing_bucket(self):
+        self.store.upsert_candles('BTC-USD', candles([300], close=1.0))
+        self.store.upsert_candles('BTC-USD', candles([300], close=2.0))
+
+        data = self.store.get_range('BTC-USD', 0, 1000)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data['close'].iloc[0], 2.0)
+
+    def test_range_is_sorted_and_bounded(self):
+        self.store.upsert_candles('BTC-USD', candles([1200, 300, 900, 600]))
+
+        data = self.store.get_range('BTC-USD', 600, 900)
+        self.assertEqual(list(data['time']), [600, 900])
+
+    def test_migrate_csv_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'historical_data.csv')
+            data = candles([300, 600], close=5.0)
+            data['product_id'] = 'BTC-USD'
+            data.to_csv(file_name, index=False)
+
+            self.assertEqual(self.store.migrate_csv(file_name), 2)
+            self.assertEqual(self.store.migrate_csv(file_name), 0)
+            self.assertEqual(self.store.latest_close('BTC-USD'), 5.0)
+
+    def test_migrate_skips_rows_without_product(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'historical_data.csv')
+            candles([300]).to_csv(file_name, index=False)
+
+            self.assertEqual(self.store.migrate_csv(file_name), 0)
+            self.assertEqual(self.store.migrate_csv(file_name, product_id='BTC-USD'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
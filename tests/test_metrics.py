@@ -0,0 +1,109 @@
+import pickle
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import patch, MagicMock
+
+from src.exchange_client import ExchangeClient
+from src.metrics import Metrics, MetricsServer, SWEEP_BUCKETS
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counters_and_gauges_render(self):
+        metrics = Metrics()
+        metrics.describe('requests_total', 'Requests')
+        metrics.inc('requests_total', endpoint='ticker', status=200)
+        metrics.inc('requests_total', 2, endpoint='ticker', status=200)
+        metrics.set('candidates', 4)
+        text = metrics.render()
+        self.assertIn('# HELP bot_requests_total Requests', text)
+        self.assertIn('# TYPE bot_requests_total counter', text)
+        self.assertIn('bot_requests_total{endpoint="ticker",status="200"} 3', text)
+        self.assertIn('bot_candidates 4', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = Metrics()
+        for value in (0.004, 0.02, 0.02, 3.0):
+            metrics.observe('latency_seconds', value, buckets=(0.01, 0.1, 1.0), endpoint='candles')
+        text = metrics.render()
+        self.assertIn('bot_latency_seconds_bucket{endpoint="candles",le="0.01"} 1', text)
+        self.assertIn('bot_latency_seconds_bucket{endpoint="candles",le="0.1"} 3', text)
+        self.assertIn('bot_latency_seconds_bucket{endpoint="candles",le="1.0"} 3', text)
+        self.assertIn('bot_latency_seconds_bucket{endpoint="candles",le="+Inf"} 4', text)
+        self.assertIn('bot_latency_seconds_count{endpoint="candles"} 4', text)
+        self.assertEqual(metrics.get('latency_seconds', endpoint='candles')[0], 4)
+
+    def test_timer_takes_buckets(self):
+        metrics = Metrics()
+        with patch('src.metrics.time.perf_counter', side_effect=[0.0, 95.0]):
+            with metrics.timer('sweep_seconds', buckets=SWEEP_BUCKETS):
+                pass
+        self.assertIn('bot_sweep_seconds_bucket{le="60.0"} 0', metrics.render())
+        self.assertIn('bot_sweep_seconds_bucket{le="120.0"} 1', metrics.render())
+
+    def test_type_conflict_is_rejected(self):
+        metrics = Metrics()
+        metrics.inc('x')
+        with self.assertRaises(ValueError):
+            metrics.observe('x', 1.0)
+
+    def test_snapshot_merges_into_another_registry(self):
+        worker = Metrics()
+        worker.inc('requests_total', 2, endpoint='ticker')
+        worker.set('candidates', 1)
+        worker.observe('latency_seconds', 0.02, buckets=(0.01, 0.1))
+        parent = Metrics()
+        parent.inc('requests_total', endpoint='ticker')
+        parent.observe('latency_seconds', 0.005, buckets=(0.01, 0.1))
+
+        snapshot = pickle.loads(pickle.dumps(worker.snapshot()))  # As sent back by a worker process
+        parent.merge(snapshot)
+        parent.merge(snapshot)
+        self.assertEqual(parent.get('requests_total', endpoint='ticker'), 5)
+        self.assertEqual(parent.get('candidates'), 1)
+        self.assertEqual(parent.get('latency_seconds')[0], 3)
+        self.assertIn('bot_latency_seconds_bucket{le="0.01"} 1', parent.render())
+        self.assertEqual(worker.get('requests_total', endpoint='ticker'), 2)
+
+    def test_server_exposes_metrics(self):
+        metrics = Metrics()
+        metrics.inc('scrapes_total')
+        server = MetricsServer(metrics, port=0).start()
+        try:
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                self.assertEqual(response.status, 200)
+                self.assertIn(b'bot_scrapes_total 1', response.read())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(server.url.replace('/metrics', '/other'), timeout=5)
+        finally:
+            server.stop()
+
+
+class TestClientInstrumentation(unittest.TestCase):
+
+    def test_records_calls_by_name(self):
+        metrics = Metrics()
+        client = ExchangeClient('https://example.test', metrics=metrics)
+        response = MagicMock(status_code=200, content=b'{"price": "1.0"}')
+        response.raw.retries.history = (None, None)
+        with patch.object(client.session, 'get', return_value=response):
+            client.get('/products/BTC-USD/ticker', name='fetch_current_price_data')
+        self.assertEqual(metrics.get('exchange_requests_total', endpoint='fetch_current_price_data',
+                                     method='GET', status=200), 1)
+        self.assertEqual(metrics.get('exchange_retries_total', endpoint='fetch_current_price_data'), 2)
+        self.assertEqual(metrics.get('exchange_response_bytes_total', endpoint='fetch_current_price_data'), 16)
+        self.assertEqual(metrics.get('exchange_request_seconds', endpoint='fetch_current_price_data')[0], 1)
+
+    def test_records_failures(self):
+        metrics = Metrics()
+        client = ExchangeClient('https://example.test', metrics=metrics)
+        with patch.object(client.session, 'post', side_effect=TimeoutError):
+            with self.assertRaises(TimeoutError):
+                client.post('/orders', data='{}', name='sell_order')
+        self.assertEqual(metrics.get('exchange_requests_total', endpoint='sell_order', method='POST',
+                                     status='TimeoutError'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.exchange_client import ExchangeClient
+from src.market_store import MarketStore
+from src.mock_exchange import MockExchange
+import src.main as bot
+
+
+class TestMockExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = MockExchange(trends={'SOL-USD': 30}).start()
+        self.client = ExchangeClient(self.exchange.url, max_retries=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.exchange.stop()
+
+    def test_payload_shapes(self):
+        products = self.client.get('/products').json()
+        self.assertIn({'id': 'BTC-USD', 'base_currency': 'BTC', 'quote_currency': 'USD', 'status': 'online',
+                       'trading_disabled': False}, products)
+
+        stats = self.client.get('/products/stats').json()
+        self.assertEqual(set(stats), {'BTC-USD', 'ETH-USD', 'SOL-USD', 'DOGE-USD'})
+        day = stats['BTC-USD']['stats_24hour']
+        self.assertLessEqual(float(day['low']), float(day['last']))
+        self.assertAlmostEqual(float(day['volume']) * float(day['last']), 5000000.0, places=0)
+
+        ticker = self.client.get('/products/BTC-USD/ticker').json()
+        self.assertGreater(float(ticker['price']), 0)
+
+        now = datetime.now()
+        candles = self.client.get('/products/BTC-USD/candles', params={
+            'start': (now - timedelta(hours=2)).isoformat(), 'end': now.isoformat(), 'granularity': 300}).json()
+        self.assertGreaterEqual(len(candles), 24)
+        self.assertGreater(candles[0][0], candles[-1][0])  # Newest first
+        self.assertEqual(len(candles[0]), 6)
+
+        order = self.client.post('/orders', data='{"type": "market", "product_id": "BTC-USD", "funds": "100"}').json()
+        self.assertAlmostEqual(order['executed_value'], 100.0)
+
+    def test_rate_limit_and_errors(self):
+        self.exchange.bucket = MockExchange(rate_limit=2).bucket
+        statuses = [self.client.get('/time').status_code for _ in range(5)]
+        self.assertIn(429, statuses)
+
+        self.exchange.bucket = None
+        self.exchange.error_rate = 1.0
+        self.assertIn(self.client.get('/time').status_code, (500, 502, 503))
+
+    def test_retries_recover_from_throttling(self):
+        self.exchange.bucket = MockExchange(rate_limit=5).bucket
+        client = ExchangeClient(self.exchange.url, max_retries=5, backoff_factor=0.1)
+        statuses = [client.get('/time').status_code for _ in range(8)]
+        self.assertEqual(set(statuses), {200})
+        self.assertGreater(self.exchange.stats['throttled'], 0)
+
+    def test_buy_sweep_end_to_end(self):
+        store = MarketStore(':memory:')
+        # The candle cache writes through its own reference to the store, not bot.market_store
+        with patch.object(bot, 'client', self.client), patch.object(bot, 'market_store', store), \
+                patch.object(bot.candle_store, 'backend', store), \
+                patch.object(bot, 'execute_buy_order', return_value=True) as execute_buy_order:
+            bot.candle_store.candles.clear()
+            bot.universe.invalidate()
+            start = time.monotonic()
+            self.assertTrue(bot.run_buy_sweep())
+            elapsed = time.monotonic() - start
+
+        execute_buy_order.assert_called_once_with('SOL-USD')
+        self.assertLess(elapsed, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from src.exchange_client import ExchangeClient, TokenBucket
+from src.metrics import Metrics
+from src.mock_exchange import MockExchange
+from src.orders import OrderRouter
+from src.portfolio import PositionBook
+import src.main as bot
+
+
+def sign(endpoint, method, body):
+    return {'CB-ACCESS-SIGN': 'test'}
+
+
+class TestOrderRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = MockExchange().start()
+        self.client = ExchangeClient(self.exchange.url, pool_size=1, max_retries=0,
+                                     private_bucket=TokenBucket(1e9, 1e9))
+        self.metrics = Metrics()
+        self.router = OrderRouter(self.client, sign, self.metrics, fill_poll_interval=0.01, fill_timeout=2,
+                                  backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        self.exchange.stop()
+
+    def test_submit_sends_client_oid_and_records_latency(self):
+        order = self.router.prepare_sell('BTC-USD', 0.5)
+        ack = self.router.submit(order, tick_at=time.perf_counter())
+        self.assertEqual(ack['client_oid'], order.client_oid)
+        self.assertEqual(ack['filled_size'], 0.5)
+        self.assertEqual(self.metrics.get('tick_to_order_ack_seconds', side='sell')[0], 1)
+        self.assertEqual(self.metrics.get('order_ack_seconds', side='sell')[0], 1)
+
+    def test_timeout_is_retried_without_placing_twice(self):
+        post = self.client.post
+
+        def lost_response(*args, **kwargs):
+            post(*args, **kwargs)  # Reaches the exchange, but the answer never arrives
+            raise requests.exceptions.ReadTimeout('read timed out')
+
+        with patch.object(self.client, 'post', side_effect=lost_response):
+            order = self.router.prepare('ETH-USD', 'buy', funds='100')
+            ack = self.router.submit(order)
+
+        self.assertEqual(ack['client_oid'], order.client_oid)
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertEqual(self.metrics.get('order_lookups_total', side='buy'), 1)
+
+    def test_unplaced_order_is_resent_with_same_client_oid(self):
+        post = self.client.post
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(json.loads(kwargs['data'])['client_oid'])
+            if len(calls) == 1:
+                raise requests.exceptions.ConnectionError('connection reset')
+            return post(*args, **kwargs)
+
+        with patch.object(self.client, 'post', side_effect=flaky):
+            order = self.router.prepare('ETH-USD', 'buy', funds='100')
+            ack = self.router.submit(order)
+
+        self.assertIsNotNone(ack)
+        self.assertEqual(calls, [order.client_oid, order.client_oid])
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertEqual(self.metrics.get('order_retries_total', side='buy'), 1)
+        self.assertEqual(self.metrics.get('order_lookups_total', side='buy'), 3)  # Absent every time
+
+    def test_order_visible_late_is_not_resent(self):
+        post = self.client.post
+        lookup = self.router.lookup
+        answers = []
+
+        def lost_response(*args, **kwargs):
+            post(*args, **kwargs)
+            raise requests.exceptions.ReadTimeout('read timed out')
+
+        def slow_lookup(order):
+            # Still being processed on the first lookup
+            answers.append(lookup(order) if answers else None)
+            return answers[-1]
+
+        with patch.object(self.client, 'post', side_effect=lost_response), \
+                patch.object(self.router, 'lookup', side_effect=slow_lookup):
+            order = self.router.prepare('ETH-USD', 'buy', funds='100')
+            ack = self.router.submit(order)
+
+        self.assertEqual(ack['client_oid'], order.client_oid)
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertIsNone(self.metrics.get('order_retries_total', side='buy'))
+
+    def test_failed_lookups_do_not_resend(self):
+        with patch.object(self.client, 'post', side_effect=requests.exceptions.ReadTimeout('read timed out')) as post, \
+                patch.object(self.router, 'lookup', side_effect=requests.HTTPError('Order lookup failed: 503')):
+            self.assertIsNone(self.router.submit(self.router.prepare('ETH-USD', 'buy', funds='100')))
+        self.assertEqual(post.call_count, 1)
+
+    def test_throttled_order_is_retried(self):
+        post = self.client.post
+        throttled = requests.Response()
+        throttled.status_code = 429
+        throttled.headers['Retry-After'] = '0.01'
+        responses = [throttled]
+
+        with patch.object(self.client, 'post', side_effect=lambda *args, **kwargs:
+                          responses.pop() if responses else post(*args, **kwargs)):
+            ack = self.router.submit(self.router.prepare('ETH-USD', 'buy', funds='100'))
+
+        self.assertIsNotNone(ack)
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertEqual(self.metrics.get('order_retries_total', side='buy'), 1)
+
+    def test_rejection_is_not_retried(self):
+        self.assertIsNone(self.router.submit(self.router.prepare('NOPE-USD', 'buy', funds='100')))
+        self.assertEqual(self.exchange.stats['POST /orders'], 1)
+        self.assertIsNone(self.metrics.get('order_retries_total', side='buy'))
+
+    def test_prepared_sell_is_reused_until_size_changes(self):
+        prepared = self.router.prepare_sell('BTC-USD', 1.5)
+        self.assertIs(self.router.take_sell('BTC-USD', 1.5), prepared)
+        self.assertIsNot(self.router.take_sell('BTC-USD', 1.5), prepared)  # Taken already: a new one is built
+
+        self.router.prepare_sell('BTC-USD', 1.5)
+        rebuilt = self.router.take_sell('BTC-USD', 2.0)
+        self.assertEqual(json.loads(rebuilt.body)['size'], '2.0')
+
+    def test_pending_order_is_confirmed_in_background(self):
+        order = self.router.prepare_sell('BTC-USD', 0.25)
+        ack = self.router.submit(order)
+        filled = threading.Event()
+        fills = []
+
+        def on_fill(order, fill):
+            fills.append(fill)
+            filled.set()
+
+        self.router.confirm(order, dict(ack, status='pending'), on_fill)
+        self.assertTrue(filled.wait(2))
+        self.assertEqual(fills[0]['id'], ack['id'])
+        self.assertEqual(self.metrics.get('order_fill_seconds', side='sell')[0], 1)
+
+
+    def test_close_stops_confirmation_threads(self):
+        order = self.router.prepare_sell('BTC-USD', 0.25)
+        fills = []
+        with patch.object(self.router, 'fetch_fill', return_value=None):
+            self.router.confirm(order, {'id': 'never-filled', 'status': 'pending'}, lambda *args: fills.append(args))
+            self.assertEqual(len(self.router.confirming), 1)
+            started = time.monotonic()
+            self.router.close(timeout=2)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.router.unconfirmed(), [])
+        self.assertEqual(fills, [])
+
+    def test_fill_polls_stay_off_the_order_connection(self):
+        status_client = ExchangeClient(self.exchange.url, private_bucket=TokenBucket(1e9, 1e9))
+        self.addCleanup(status_client.close)
+        router = OrderRouter(self.client, sign, fill_poll_interval=0.01, fill_timeout=2, status_client=status_client)
+        order = router.prepare_sell('BTC-USD', 0.25)
+        ack = router.submit(order)
+        with patch.object(self.client, 'get') as order_get, \
+                patch.object(status_client, 'get', wraps=status_client.get) as status_get:
+            self.assertIsNotNone(router.wait_for_fill(order, dict(ack, status='pending')))
+        order_get.assert_not_called()
+        self.assertGreaterEqual(status_get.call_count, 1)
+
+    def test_keepalive_skipped_while_order_in_flight(self):
+        with patch.object(self.client, 'get') as get:
+            with self.router.in_flight:
+                self.router.keepalive()
+            get.assert_not_called()
+            self.router.keepalive()
+            get.assert_called_once()
+
+
+class TestBuyPath(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = MockExchange().start()
+        self.client = ExchangeClient(self.exchange.url, pool_size=1, max_retries=0,
+                                     private_bucket=TokenBucket(1e9, 1e9))
+        self.router = OrderRouter(self.client, sign, fill_poll_interval=0.01, fill_timeout=0.05, backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        self.exchange.stop()
+
+    def test_late_fill_still_opens_position(self):
+        submit, fetch_fill = self.router.submit, self.router.fetch_fill
+        polls = []
+
+        def slow_fill(ack):
+            polls.append(ack)
+            return fetch_fill(dict(ack, status='done')) if len(polls) > 20 else None
+
+        started = threading.Event()
+        with patch.object(bot, 'order_router', self.router), patch.object(bot, 'positions', PositionBook()), \
+                patch.object(bot, 'append_to_csv'), \
+                patch.object(bot, 'start_sell_checks', side_effect=started.set), \
+                patch.object(self.router, 'submit', side_effect=lambda order: dict(submit(order), status='pending')), \
+                patch.object(self.router, 'fetch_fill', side_effect=slow_fill):
+            self.assertFalse(bot.execute_buy_order('BTC-USD'))
+            self.assertNotIn('BTC-USD', bot.positions)  # Not filled yet
+            self.assertTrue(started.wait(2))
+            self.assertIn('BTC-USD', bot.positions)
+            self.assertIn('BTC-USD', self.router.prepared)
+
+    def test_unfilled_buy_opens_nothing(self):
+        submit = self.router.submit
+        with patch.object(bot, 'order_router', self.router), patch.object(bot, 'positions', PositionBook()), \
+                patch.object(bot, 'append_to_csv') as append_to_csv, \
+                patch.object(self.router, 'submit', side_effect=lambda order: dict(
+                    submit(order), status='done', filled_size='0', executed_value='0', done_reason='canceled')):
+            with self.assertLogs(level='WARNING') as logs:
+                self.assertFalse(bot.execute_buy_order('BTC-USD'))
+            self.assertNotIn('BTC-USD', bot.positions)
+        append_to_csv.assert_not_called()
+        self.assertIn('finished unfilled (canceled)', '\n'.join(logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
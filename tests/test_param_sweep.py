@@ -0,0 +1,54 @@
+import unittest
+
+import pandas as pd
+
+from src.backtest import prepare_market, simulate
+from src.param_sweep import grid_thresholds, parse_grid, sample_thresholds, sweep
+from src.rules import DEFAULT_THRESHOLDS, Thresholds
+from test_backtest import candles
+
+
+class TestParamSweep(unittest.TestCase):
+
+    def setUp(self):
+        # Flat for 2h, a climb into the 3h sweep, a spike to +25% and a slide back
+        flat = [100.0] * 24
+        pump = flat + list(range(101, 113)) + [120, 130, 140, 150, 145, 138, 130, 125, 120] + [120.0] * 15
+        self.market = prepare_market(pd.concat([candles('PUMP-USD', pump), candles('FLAT-USD', [100.0] * len(pump))]))
+
+    def test_grid_covers_every_combination(self):
+        combinations = grid_thresholds({'buy_change_1h': (5, 10), 'sell_gain_from_purchase': (20, 25, 30)})
+        self.assertEqual(len(combinations), 6)
+        self.assertEqual(len(set(combinations)), 6)
+        self.assertTrue(all(c.buy_change_2h == DEFAULT_THRESHOLDS.buy_change_2h for c in combinations))
+        self.assertEqual(len(grid_thresholds()), 8000)
+
+    def test_sample_is_distinct_and_reproducible(self):
+        grid = parse_grid(['buy_change_2h=1,2,3'])
+        sample = sample_thresholds(grid, 50, seed=7)
+        self.assertEqual(len(set(sample)), 50)
+        self.assertEqual(sample, sample_thresholds(grid, 50, seed=7))
+        self.assertTrue(set(sample) <= set(grid_thresholds(grid)))
+        self.assertRaises(ValueError, parse_grid, ['buy_change_3h=1'])
+
+    def test_pool_matches_direct_backtest(self):
+        combinations = grid_thresholds({'sell_gain_from_purchase': (10, 25, 60), 'sell_drop_from_highest': (-5, -15)})
+        ranked = sweep(self.market, combinations, processes=2, chunk_size=2, fee=0, slippage=0)
+
+        self.assertEqual(len(ranked), len(combinations))
+        self.assertTrue(ranked['total_return'].is_monotonic_decreasing)
+        for row in ranked.itertuples(index=False):
+            thresholds = Thresholds(*row[:len(Thresholds._fields)])
+            expected = simulate(self.market, thresholds, fee=0, slippage=0)
+            self.assertAlmostEqual(row.total_return, expected.total_return)
+            self.assertAlmostEqual(row.max_drawdown, expected.max_drawdown)
+            self.assertEqual(row.trades, len(expected.trades))
+
+    def test_in_process_sweep(self):
+        ranked = sweep(self.market, [DEFAULT_THRESHOLDS], processes=0, fee=0, slippage=0)
+        self.assertAlmostEqual(ranked['total_return'][0], 25.0)
+        self.assertEqual(ranked['win_rate'][0], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.indicators import IndicatorBook
+from src.portfolio import Position, PositionBook
+import src.main as bot
+
+
+class TestPositionBook(unittest.TestCase):
+
+    def test_observe_tracks_high_and_previous(self):
+        position = Position('BTC-USD', 100.0, 1.0, datetime.now())
+
+        self.assertEqual(position.observe(105.0), 105.0)  # First tick: previous is itself
+        self.assertEqual(position.observe(110.0), 105.0)
+        self.assertEqual(position.observe(104.0), 110.0)
+        self.assertEqual(position.highest_price, 110.0)
+        self.assertEqual(position.previous_price, 104.0)
+
+    def test_observe_takes_streamed_high(self):
+        position = Position('BTC-USD', 100.0, 1.0, datetime.now())
+        position.observe(104.0, high=109.0)  # Traded at 109 between checks
+        self.assertEqual(position.highest_price, 109.0)
+        self.assertEqual(position.previous_price, 104.0)
+        position.observe(110.0, high=None)
+        self.assertEqual(position.highest_price, 110.0)
+
+    def test_slots(self):
+        position = Position('BTC-USD', 100.0, 1.0, datetime.now())
+        with self.assertRaises(AttributeError):
+            position.extra = 1
+
+    def test_open_close(self):
+        book = PositionBook()
+        book.open('BTC-USD', 100.0, 1.0, datetime.now())
+        book.open('ETH-USD', 10.0, 2.0, datetime.now())
+
+        self.assertEqual(len(book), 2)
+        self.assertIn('ETH-USD', book)
+        self.assertEqual(book.close('BTC-USD').purchase_price, 100.0)
+        self.assertEqual(book.product_ids(), ['ETH-USD'])
+        self.assertIsNone(book.close('BTC-USD'))
+
+
+class TestSellCheckTick(unittest.TestCase):
+
+    def setUp(self):
+        bot.positions.positions.clear()
+        patcher = patch.object(bot, 'indicators', IndicatorBook())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        bot.positions.positions.clear()
+
+    def test_batched_prices_and_sell(self):
+        bot.positions.open('BTC-USD', 100.0, 1.0, datetime.now())
+        bot.positions.open('ETH-USD', 100.0, 1.0, datetime.now())
+        prices = {'BTC-USD': 101.0, 'ETH-USD': 130.0}  # ETH is up 30%: take profit
+
+        with patch.object(bot, 'get_current_prices', return_value=prices) as get_current_prices, \
+                patch.object(bot, 'check_and_execute_sell_order',
+                             side_effect=lambda p, *args: p == 'ETH-USD' and bool(bot.positions.close(p))) as sell:
+            bot.sell_check_tick()
+
+        get_current_prices.assert_called_once_with(['BTC-USD', 'ETH-USD'])
+        self.assertEqual(sell.call_count, 2)
+        self.assertEqual(bot.positions.product_ids(), ['BTC-USD'])
+        self.assertEqual(bot.positions.get('BTC-USD').highest_price, 101.0)
+
+    def test_trailing_high_includes_streamed_trades(self):
+        bought_at = datetime.now() - timedelta(minutes=30)
+        bot.positions.open('BTC-USD', 100.0, 1.0, bought_at)
+        # A spike to 112 streamed between two checks, after the purchase bar
+        bot.indicators.on_tick('BTC-USD', 112.0, bought_at.timestamp() + 600)
+
+        with patch.object(bot, 'get_current_prices', return_value={'BTC-USD': 105.0}), \
+                patch.object(bot, 'check_and_execute_sell_order', return_value=False) as sell:
+            bot.sell_check_tick()
+
+        self.assertEqual(bot.positions.get('BTC-USD').highest_price, 112.0)
+        self.assertEqual(sell.call_args[0][2], 112.0)  # The sell rules see the streamed high
+
+
+    def test_prices_fetched_on_a_long_lived_pool(self):
+        threads = set()
+
+        def fetch(product_id):
+            threads.add(threading.current_thread().name)
+            return 100.0
+
+        with patch.object(bot, 'ticker_feed', None), patch.object(bot, 'fetch_current_price_data', side_effect=fetch):
+            self.assertEqual(bot.get_current_prices(['BTC-USD']), {'BTC-USD': 100.0})
+            self.assertEqual(threads, {threading.current_thread().name})  # One price: no pool at all
+
+            threads.clear()
+            for _ in range(20):
+                self.assertEqual(bot.get_current_prices(['BTC-USD', 'ETH-USD']), {'BTC-USD': 100.0, 'ETH-USD': 100.0})
+        self.assertTrue(all(name.startswith('price-fetch') for name in threads))
+        self.assertLessEqual(len(threads), bot.SCAN_WORKERS)
+
+
+class TestBuySweepDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        for name, value in (('sweep_executor', self.executor), ('sweep_future', None)):
+            patcher = patch.object(bot, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_sweep_runs_off_the_scheduler_thread(self):
+        release = threading.Event()
+        threads = []
+
+        def slow_sweep():
+            threads.append(threading.current_thread())
+            release.wait(2)  # e.g. an order waiting for its fill
+
+        with patch.object(bot, 'buy_sweep_job', side_effect=slow_sweep) as sweep:
+            self.assertTrue(bot.dispatch_buy_sweep())  # Returns while the sweep is still running
+            self.assertFalse(bot.dispatch_buy_sweep())  # Overlapping run skipped
+            release.set()
+            bot.sweep_future.result(2)
+            self.assertTrue(bot.dispatch_buy_sweep())
+            bot.sweep_future.result(2)
+
+        self.assertEqual(sweep.call_count, 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_sell_checks_survive_a_concurrent_buy(self):
+        bot.positions.positions.clear()
+        self.addCleanup(bot.positions.positions.clear)
+        with patch.object(bot, 'scheduler') as scheduler, patch.object(bot, 'sell_check_job', None):
+            bot.positions.open('BTC-USD', 100.0, 1.0, datetime.now())
+            bot.start_sell_checks()
+            bot.stop_sell_checks()  # From a tick that saw the book empty just before the buy
+            scheduler.cancel.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from src.price_index import LastPriceIndex
+
+
+class TestLastPriceIndex(unittest.TestCase):
+
+    def test_update_and_get(self):
+        index = LastPriceIndex()
+        index.update('BTC-USD', 45000.0)
+
+        self.assertEqual(index.get('BTC-USD'), 45000.0)
+        self.assertIsNone(index.get('ETH-USD'))
+        self.assertEqual(index.get('ETH-USD', 0), 0)
+
+    def test_older_observation_does_not_overwrite(self):
+        index = LastPriceIndex()
+        index.update('BTC-USD', 2.0, seen_at=200)
+        index.update('BTC-USD', 1.0, seen_at=100)
+
+        self.assertEqual(index.get('BTC-USD'), 2.0)
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'last_prices.json')
+            index = LastPriceIndex(path)
+            index.update('BTC-USD', 45000.0)
+            index.snapshot()
+
+            restored = LastPriceIndex(path)
+            self.assertEqual(restored.load(), 1)
+            self.assertEqual(restored.get('BTC-USD'), 45000.0)
+
+    def test_maybe_snapshot_respects_interval(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'last_prices.json')
+            index = LastPriceIndex(path, snapshot_interval=3600)
+            index.update('BTC-USD', 1.0)
+            index.maybe_snapshot()
+            self.assertFalse(os.path.exists(path))
+
+            index.snapshot_interval = 0
+            index.maybe_snapshot()
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
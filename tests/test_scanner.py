@@ -0,0 +1,35 @@
+import time
+import unittest
+import random
+
+from src.scanner import scan_products
+
+
+class TestScanner(unittest.TestCase):
+
+    def test_results_keep_input_order(self):
+        product_ids = [f'P{i}-USD' for i in range(20)]
+
+        def evaluate(product_id):
+            time.sleep(random.uniform(0, 0.01))
+            return product_id.lower()
+
+        results, elapsed = scan_products(product_ids, evaluate, max_workers=5)
+
+        self.assertEqual([p for p, _ in results], product_ids)
+        self.assertEqual([r for _, r in results], [p.lower() for p in product_ids])
+        self.assertGreaterEqual(elapsed, 0)
+
+    def test_failed_product_does_not_stop_sweep(self):
+        def evaluate(product_id):
+            if product_id == 'BAD-USD':
+                raise ValueError('boom')
+            return True
+
+        results, _ = scan_products(['BTC-USD', 'BAD-USD', 'ETH-USD'], evaluate)
+
+        self.assertEqual(results, [('BTC-USD', True), ('BAD-USD', None), ('ETH-USD', True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+
+from src.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.thread = threading.Thread(target=self.scheduler.run, daemon=True)
+
+    def tearDown(self):
+        self.scheduler.stop()
+        if self.thread.is_alive():
+            self.thread.join(timeout=2)
+
+    def test_runs_jobs_in_deadline_order(self):
+        order = []
+        now = time.time()
+        self.scheduler.every(10, lambda: order.append('b'), start=now + 0.05)
+        self.scheduler.every(10, lambda: order.append('a'), start=now + 0.01)
+        self.thread.start()
+        time.sleep(0.2)
+
+        self.assertEqual(order, ['a', 'b'])
+
+    def test_recurring_and_cancel(self):
+        runs = []
+        job = self.scheduler.every(0.02, lambda: runs.append(1))
+        self.thread.start()
+        time.sleep(0.15)
+        self.scheduler.cancel(job)
+        count = len(runs)
+        time.sleep(0.1)
+
+        self.assertGreaterEqual(count, 4)
+        self.assertEqual(len(runs), count)
+
+    def test_missed_deadline_and_skipped_runs(self):
+        job = self.scheduler.every(0.05, lambda: time.sleep(0.12), tolerance=0.01)
+        self.thread.start()
+        time.sleep(0.3)
+
+        self.assertGreaterEqual(job.missed, 2)
+        self.assertLess(job.runs, 6)
+
+    def test_trigger_runs_early(self):
+        runs = []
+        job = self.scheduler.every(3600, lambda: runs.append(time.time()), start=time.time() + 3600)
+        self.thread.start()
+        time.sleep(0.05)
+        self.scheduler.trigger(job)
+        time.sleep(0.05)
+
+        self.assertEqual(len(runs), 1)
+        self.assertGreater(job.deadline, time.time() + 3000)
+
+    def test_aligned_deadline(self):
+        job = self.scheduler.every(3600, lambda: None, align=True)
+        local = time.localtime(job.deadline)
+
+        self.assertEqual((local.tm_min, local.tm_sec), (0, 0))
+        self.assertLessEqual(job.deadline - time.time(), 3600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.rules import DEFAULT_THRESHOLDS, is_buy_signal, is_sell_signal
+from src.signals import evaluate_universe, first_valid, last_valid
+
+END_TS = 1700006400  # aligned to 5-minute buckets
+
+
+def window(open_2h, open_1h, close, granularity=300):
+    # 24 bars over 2 hours, oldest first: open_2h at the start, open_1h at the 1h mark, close at the end
+    times = END_TS - 7200 + granularity * np.arange(25)
+    opens = np.where(times < END_TS - 3600, open_2h, open_1h).astype(float)
+    closes = opens.copy()
+    closes[-1] = close
+    return pd.DataFrame({'time': times, 'low': opens, 'high': opens, 'open': opens, 'close': closes, 'volume': 1.0})
+
+
+class TestSignals(unittest.TestCase):
+
+    def test_first_and_last_valid(self):
+        values = np.array([[np.nan, 1.0, 2.0, np.nan], [np.nan, np.nan, np.nan, np.nan]])
+        np.testing.assert_array_equal(first_valid(values), [1.0, np.nan])
+        np.testing.assert_array_equal(last_valid(values), [2.0, np.nan])
+
+    def test_ranked_candidates(self):
+        windows = {
+            'FLAT-USD': window(100, 100, 101),
+            'TWOHOUR-USD': window(100, 105, 112),    # +12% over 2h, +6.7% over 1h
+            'ONEHOUR-USD': window(100, 100, 130),    # +30% over both
+            'LASTCHECK-USD': window(100, 100, 100),
+        }
+        current = {p: windows[p]['close'].iloc[-1] for p in windows}
+        last = {'LASTCHECK-USD': 90.0}
+        current['LASTCHECK-USD'] = 100.0             # +11.1% since last check
+
+        candidates = evaluate_universe(windows, current, last, END_TS)
+
+        self.assertEqual([c.product_id for c in candidates], ['ONEHOUR-USD', 'TWOHOUR-USD', 'LASTCHECK-USD'])
+        self.assertAlmostEqual(candidates[1].change_2h, 12.0)
+
+    def test_newest_first_input_and_missing_data(self):
+        windows = {'UP-USD': window(100, 100, 120).iloc[::-1], 'EMPTY-USD': pd.DataFrame()}
+        candidates = evaluate_universe(windows, {}, {'UP-USD': 0}, END_TS)
+
+        self.assertEqual([c.product_id for c in candidates], ['UP-USD'])
+
+    def test_known_changes_skip_windows(self):
+        windows = {'FLAT-USD': window(100, 100, 101)}
+        candidates = evaluate_universe(windows, {}, {}, END_TS, changes={'STREAMED-USD': (15.0, 3.0)})
+
+        self.assertEqual([c.product_id for c in candidates], ['STREAMED-USD'])
+        self.assertEqual(candidates[0].change_2h, 15.0)
+
+    def test_rules_match_scalar_and_array(self):
+        self.assertTrue(is_buy_signal(10, 0, 0))
+        self.assertFalse(is_buy_signal(9.9, 9.9, 4.9))
+        self.assertTrue(is_sell_signal(0, -5, 0))
+        self.assertFalse(is_sell_signal(np.nan, np.nan, np.nan))
+        np.testing.assert_array_equal(
+            is_sell_signal(np.array([-6, 0]), np.array([0, 0]), np.array([0, 30]), DEFAULT_THRESHOLDS), [True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import base64
+import hashlib
+import hmac
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.signer import RequestSigner
+
+SECRET = base64.b64encode(b'secret-key').decode()
+
+
+class TestRequestSigner(unittest.TestCase):
+
+    def test_signature_matches_fresh_hmac(self):
+        signer = RequestSigner('key', SECRET, 'pass')
+        with patch('src.signer.time.time', return_value=1700000000.0):
+            headers = signer.sign('/orders', 'POST', '{"a": 1}')
+
+        expected = hmac.new(b'secret-key', b'1700000000.0POST/orders{"a": 1}', hashlib.sha256).hexdigest()
+        self.assertEqual(headers['CB-ACCESS-SIGN'], expected)
+        self.assertEqual(headers['CB-ACCESS-TIMESTAMP'], '1700000000.0')
+        self.assertEqual(headers['CB-ACCESS-KEY'], 'key')
+        self.assertEqual(headers['CB-ACCESS-PASSPHRASE'], 'pass')
+
+    def test_template_is_not_mutated(self):
+        signer = RequestSigner('key', SECRET, 'pass')
+        signer.sign('/a')
+        signer.sign('/b')
+        self.assertNotIn('CB-ACCESS-SIGN', signer.template)
+
+    def test_calibrate_applies_offset(self):
+        signer = RequestSigner('key', SECRET, 'pass')
+        client = MagicMock()
+        client.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={'epoch': 1000.0}))
+        with patch('src.signer.time.time', side_effect=[990.0, 990.2, 995.0]):
+            self.assertAlmostEqual(signer.calibrate(client), 9.9)
+            self.assertEqual(signer.timestamp(), str(995.0 + signer.offset))
+        self.assertFalse(signer.needs_calibration())
+
+    def test_calibrate_failure_keeps_offset(self):
+        signer = RequestSigner('key', SECRET, 'pass')
+        client = MagicMock()
+        client.get.return_value = MagicMock(status_code=503)
+        self.assertIsNone(signer.calibrate(client))
+        self.assertEqual(signer.offset, 0.0)
+        self.assertTrue(signer.needs_calibration())
+
+
+if __name__ == '__main__':
+    unittest.main()
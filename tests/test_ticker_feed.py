@@ -0,0 +1,95 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.indicators import IndicatorBook
+from src.ticker_feed import TickerFeed, websockets
+import src.main as bot
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@unittest.skipIf(websockets is None, "websockets is not installed")
+class TestTickerFeed(unittest.TestCase):
+
+    def setUp(self):
+        from src.mock_ticker_server import MockTickerServer
+        self.server = MockTickerServer({'BTC-USD': 45000.0, 'ETH-USD': 3000.0}, interval=0.01).start()
+        self.received = []
+        self.feed = TickerFeed(self.server.url, ['BTC-USD'], on_price=lambda p, price: self.received.append(p))
+        self.feed.start()
+
+    def tearDown(self):
+        self.feed.stop()
+        self.server.stop()
+
+    def test_streams_prices_for_subscribed_products(self):
+        self.assertTrue(wait_for(lambda: self.feed.get_price('BTC-USD') is not None))
+        self.assertIsNone(self.feed.get_price('ETH-USD'))
+        self.assertIn('BTC-USD', self.received)
+
+    def test_subscribe_after_connect(self):
+        self.assertTrue(self.feed.connected.wait(5))
+        self.feed.subscribe(['ETH-USD'])
+        self.assertTrue(wait_for(lambda: self.feed.get_price('ETH-USD') is not None))
+
+    def test_reconnects_and_resubscribes(self):
+        self.assertTrue(wait_for(lambda: self.feed.get_price('BTC-USD') is not None))
+        self.server.drop_connections()
+        self.assertTrue(wait_for(lambda: self.feed.reconnects >= 1 and self.server.subscribe_count >= 2))
+        self.feed.prices.clear()
+        self.assertTrue(wait_for(lambda: self.feed.get_price('BTC-USD') is not None))
+
+    def test_stale_price_is_ignored(self):
+        self.feed.prices['XRP-USD'] = (1.0, time.monotonic() - 60)
+        self.assertIsNone(self.feed.get_price('XRP-USD'))
+
+
+
+class TestStreamedSweepInputs(unittest.TestCase):
+
+    def setUp(self):
+        self.feed = TickerFeed(product_ids=['BTC-USD'])  # Never started; marked connected below
+        self.feed.connected.set()
+        self.indicators = IndicatorBook()
+        now = time.time()
+        # 2h of bars, the last trade a minute ago: older than INDICATOR_MAX_AGE
+        for i in range(25):
+            self.indicators.on_bar('BTC-USD', now - 7200 + 300 * i, 100.0, 100.0, 100.0 + i)
+            self.indicators.on_bar('ETH-USD', now - 7200 + 300 * i, 100.0, 100.0, 100.0 + i)
+        for bars in self.indicators.series.values():
+            bars.updated_at = now - 60
+
+    def test_subscribed_product_uses_indicators(self):
+        now = datetime.now()
+        with patch.object(bot, 'ticker_feed', self.feed), patch.object(bot, 'indicators', self.indicators), \
+                patch.object(bot, 'fetch_last_checked_price', return_value=100.0), \
+                patch.object(bot.candle_store, 'get_window') as get_window, \
+                patch.object(bot, 'get_current_price'), patch.object(bot, 'price_index'):
+            window, _, price, changes = bot.fetch_sweep_inputs('BTC-USD', now - timedelta(hours=2), now)
+            self.assertIsNone(window)
+            self.assertEqual(price, 124.0)  # Last close streamed in
+            self.assertIsNotNone(changes)
+            get_window.assert_not_called()
+
+            # Not streamed: a minute-old indicator is too stale, so candles are fetched
+            bot.fetch_sweep_inputs('ETH-USD', now - timedelta(hours=2), now)
+            get_window.assert_called_once()
+
+    def test_feed_covers_the_universe(self):
+        with patch.object(bot, 'ticker_feed', self.feed), \
+                patch.object(bot.universe, 'product_ids', return_value=['BTC-USD', 'SOL-USD']):
+            bot.subscribe_universe()
+        self.assertEqual(self.feed.product_ids, {'BTC-USD', 'SOL-USD'})
+
+
+if __name__ == '__main__':
+    unittest.main()
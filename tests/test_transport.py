@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import src.main as bot
+from src.exchange_client import ExchangeClient, TokenBucket
+from src.indicators import IndicatorBook
+from src.market_store import MarketStore
+from src.mock_exchange import MockExchange
+from src.portfolio import PositionBook
+from src.price_index import LastPriceIndex
+from src.transport import SessionRecorder, SessionReplay, install_recorder, record_jobs, replay_session
+from src.universe import ProductUniverse
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.recording = os.path.join(self.tmp.name, 'session.jsonl.gz')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fresh_bot(self, stack, client):
+        """
+        Patches the bot's state so each phase starts from scratch.
+        """
+        stack.enter_context(patch.object(bot, 'client', client))
+        stack.enter_context(patch.object(bot.order_router, 'client', client))
+        stack.enter_context(patch.object(bot.order_router, 'status_client', client))
+        store = MarketStore(':memory:')
+        stack.enter_context(patch.object(bot, 'market_store', store))
+        stack.enter_context(patch.object(bot.candle_store, 'backend', store))
+        stack.enter_context(patch.object(bot, 'positions', PositionBook()))
+        stack.enter_context(patch.object(bot, 'indicators', IndicatorBook()))
+        stack.enter_context(patch.object(bot, 'price_index', LastPriceIndex(os.path.join(self.tmp.name, 'p.json'))))
+        stack.enter_context(patch.object(bot, 'universe', ProductUniverse(bot.fetch_products, bot.fetch_product_stats)))
+        stack.enter_context(patch.object(bot, 'append_to_csv'))
+        stack.enter_context(patch.object(bot, 'sell_check_job', None))
+        bot.candle_store.candles.clear()
+        bot.candle_store.covered_from.clear()
+
+    def test_replay_reproduces_recorded_session(self):
+        exchange = MockExchange(trends={'SOL-USD': 30}).start()
+        recorder = SessionRecorder(self.recording)
+        try:
+            with ExitStack() as stack:
+                client = ExchangeClient(exchange.url, public_bucket=TokenBucket(1e9, 1e9))
+                self.fresh_bot(stack, client)
+                install_recorder(client, recorder)
+                for name in ('buy_sweep_job', 'sell_check_tick', 'housekeeping_job'):
+                    stack.enter_context(patch.object(bot, name, getattr(bot, name)))
+                stack.enter_context(patch.object(bot, 'start_sell_checks'))
+                record_jobs(bot, recorder)
+                bot.buy_sweep_job()
+                for _ in range(3):
+                    bot.sell_check_tick()
+                recorded_positions = bot.positions.product_ids()
+        finally:
+            recorder.close()
+            exchange.stop()
+
+        with gzip.open(self.recording, 'rt') as f:
+            kinds = [json.loads(line)['kind'] for line in f]
+        self.assertEqual(kinds.count('job'), 4)
+        self.assertEqual(recorded_positions, ['SOL-USD'])
+
+        # Offline: nothing is listening at the exchange URL any more
+        with ExitStack() as stack:
+            self.fresh_bot(stack, ExchangeClient(exchange.url, max_retries=0))
+            stack.enter_context(patch.object(bot, 'start_sell_checks'))
+            summary = replay_session(bot, SessionReplay(self.recording))
+            replayed_positions = bot.positions.product_ids()
+
+        self.assertEqual(summary['jobs'], 4)
+        self.assertEqual(summary['orders'], [('SOL-USD', 'buy')])
+        self.assertEqual(summary['misses'], {})
+        self.assertEqual(replayed_positions, recorded_positions)
+
+
+if __name__ == '__main__':
+    unittest.main()
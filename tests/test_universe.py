@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.universe import ProductUniverse
+
+
+def product(product_id, **fields):
+    base, quote = product_id.split('-')
+    return {'id': product_id, 'base_currency': base, 'quote_currency': quote, 'status': 'online',
+            'trading_disabled': False, **fields}
+
+
+def day(last, low, high, volume):
+    return {'stats_24hour': {'open': str(last), 'last': str(last), 'low': str(low), 'high': str(high),
+                             'volume': str(volume)}}
+
+
+PRODUCTS = [
+    product('BTC-USD'),
+    product('ETH-USD'),
+    product('ETH-EUR'),
+    product('OLD-USD', trading_disabled=True),
+    product('HALT-USD', status='delisted'),
+    product('LIM-USD', limit_only=True),
+    product('THIN-USD'),
+    product('FLAT-USD'),
+]
+
+STATS = {
+    'BTC-USD': day(50000, 48000, 51000, 1000),
+    'ETH-USD': day(3000, 2900, 3100, 1000),
+    'THIN-USD': day(1.0, 0.9, 1.1, 10),
+    'FLAT-USD': day(1.0, 0.999, 1.001, 10000000),
+}
+
+
+class TestProductUniverse(unittest.TestCase):
+
+    def make_universe(self, **kwargs):
+        self.fetch_products = MagicMock(return_value=PRODUCTS)
+        self.fetch_stats = MagicMock(return_value=STATS)
+        return ProductUniverse(self.fetch_products, self.fetch_stats, ('USD',), min_quote_volume=100000,
+                               min_range_percent=1.0, **kwargs)
+
+    def test_filters_by_product_and_stats(self):
+        universe = self.make_universe()
+        self.assertEqual(universe.product_ids(), ['BTC-USD', 'ETH-USD'])
+
+    def test_list_is_cached_for_ttl(self):
+        universe = self.make_universe()
+        universe.product_ids()
+        universe.product_ids()
+        self.assertEqual(self.fetch_products.call_count, 1)
+        self.assertEqual(self.fetch_stats.call_count, 1)
+
+        universe.invalidate()
+        universe.product_ids()
+        self.assertEqual(self.fetch_products.call_count, 2)
+
+    def test_failed_refresh_keeps_cached_list(self):
+        universe = self.make_universe(ttl=0, stats_ttl=0)
+        universe.product_ids()
+        self.fetch_products.return_value = None
+        self.fetch_stats.return_value = None
+        self.assertEqual(universe.product_ids(), ['BTC-USD', 'ETH-USD'])
+
+    def test_missing_stats_do_not_exclude(self):
+        universe = self.make_universe()
+        self.fetch_stats.return_value = None
+        self.assertEqual(universe.product_ids(), ['BTC-USD', 'ETH-USD', 'THIN-USD', 'FLAT-USD'])
+
+    def test_never_fetched(self):
+        universe = self.make_universe()
+        self.fetch_products.return_value = None
+        self.assertEqual(universe.product_ids(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
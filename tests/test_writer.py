@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from src.writer import BufferedWriter
+
+
+class TestBufferedWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'orders.csv')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_batches_rows_and_writes_header_once(self):
+        writer = BufferedWriter(batch_size=1000, flush_interval=60)
+        for i in range(3):
+            writer.write_csv(self.file_name, pd.DataFrame([{'product_id': 'BTC-USD', 'amount': i}]))
+        self.assertFalse(os.path.exists(self.file_name))  # Still buffered
+
+        writer.flush()
+        writer.write_csv(self.file_name, [{'product_id': 'ETH-USD', 'amount': 3}])
+        writer.close()
+
+        data = pd.read_csv(self.file_name)
+        self.assertEqual(list(data['amount']), [0, 1, 2, 3])
+
+    def test_flushes_on_time_threshold(self):
+        writer = BufferedWriter(batch_size=1000, flush_interval=0.05)
+        writer.write_csv(self.file_name, [{'a': 1}])
+        deadline = time.monotonic() + 2
+        while not os.path.exists(self.file_name) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+
+        self.assertTrue(os.path.exists(self.file_name))
+
+    def test_submitted_calls_run_in_order(self):
+        calls = []
+        writer = BufferedWriter()
+        for i in range(5):
+            writer.submit(calls.append, i)
+        writer.close()
+
+        self.assertEqual(calls, [0, 1, 2, 3, 4])
+
+    def test_full_queue_never_writes_from_caller(self):
+        writer = BufferedWriter(max_queue=1, batch_size=1000, flush_interval=60, put_timeout=0.05)
+        writer.start = lambda: None  # No writer thread: the queue stays full
+        writer.write_csv(self.file_name, [{'a': 1}])
+        with self.assertLogs(level='ERROR'):
+            writer.write_csv(self.file_name, [{'a': 2}])
+        writer.flush()  # Dropped as well, so it must not block
+
+        self.assertFalse(os.path.exists(self.file_name))
+
+if __name__ == '__main__':
+    unittest.main()